@@ -1,12 +1,44 @@
 import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
 from dataclasses import fields
-from typing import Any, List
-from datamodel.datamodel import SystemObs, Command
+from itertools import chain
+from operator import attrgetter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from core.dispatch import dispatch_fleet_command
+from datamodel.columnar import BessColumns, PvColumns
+from datamodel.datamodel import SystemObs, Command, EquipmentType
 from communication.interface import Driver, Server
+from monitoring.metrics import (
+    DEFAULT_METRICS,
+    MetricsRegistry,
+    StageStats,
+    Stages,
+    unique_stage_names,
+)
 
 
 logger = logging.getLogger(__name__)
 
+# Plan d'agrégation : champs liste de SystemObs à accumuler, calculés une seule fois
+# à partir du schéma (le timestamp, l'index et les colonnes sont exclus, l'index et les
+# colonnes étant reconstruits)
+_NON_AGGREGATED_FIELDS = ("timestamp", "project_data_index", "bess_columns", "pv_columns")
+AGGREGATION_PLAN: tuple[str, ...] = tuple(
+    field_info.name
+    for field_info in fields(SystemObs)
+    if field_info.name not in _NON_AGGREGATED_FIELDS
+)
+_AGGREGATION_GETTERS = tuple((name, attrgetter(name)) for name in AGGREGATION_PLAN)
+
+# Champs liste disposant d'une représentation en colonnes : (liste, colonnes, type)
+COLUMNAR_PLAN: tuple[tuple[str, str, type[BessColumns] | type[PvColumns]], ...] = (
+    ("bess", "bess_columns", BessColumns),
+    ("pv", "pv_columns", PvColumns),
+)
+
 
 class Adapter:
     """
@@ -15,16 +47,107 @@ class Adapter:
     et de l'envoi des commandes aux drivers appropriés.
     """
 
-    def __init__(self, drivers: List[Driver], server: Server):
+    def __init__(
+        self,
+        drivers: List[Driver],
+        server: Server,
+        concurrent_read: bool = False,
+        read_timeout: Optional[float] = None,
+        driver_read_timeouts: Optional[Dict[Driver, float]] = None,
+        concurrent_write: bool = False,
+        write_timeout: Optional[float] = None,
+        columnar: bool = False,
+        dispatch_weights: Optional[Dict[str, float]] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
         """
         Initialise l'Adapter avec la liste des drivers.
 
         Args:
             drivers: Liste des drivers de communication (Modbus, etc.)
+            server: Serveur exposant les données agrégées
+            concurrent_read: Si True, les drivers sont lus en parallèle dans un pool de threads
+            read_timeout: Délai maximal (secondes) accordé à chaque driver en mode concurrent.
+                          Si None, on attend la fin de toutes les lectures.
+            driver_read_timeouts: Délais spécifiques par driver, prioritaires sur read_timeout
+            concurrent_write: Si True, les écritures vers des drivers différents
+                              sont faites en parallèle
+            write_timeout: Délai maximal (secondes) d'attente des écritures en mode concurrent
+            columnar: Si True, l'agrégat porte aussi les mesures bess et pv en colonnes numpy
+                      (bess_columns, pv_columns), en réutilisant celles fournies par les drivers
+            dispatch_weights: Poids de répartition des commandes de flotte par device_id
+                              (par exemple la capacité de chaque BESS). Par défaut,
+                              répartition égale entre les équipements du type.
+            metrics: Registre des durées d'étapes (registre partagé par défaut)
         """
         self.drivers = drivers
         self.server = server
         self.global_system_obs = SystemObs()
+        self.metrics = metrics or DEFAULT_METRICS
+
+        self.concurrent_read = concurrent_read
+        self.read_timeout = read_timeout
+        self.driver_read_timeouts: Dict[Driver, float] = driver_read_timeouts or {}
+
+        self.columnar = columnar
+
+        # Dernières sorties des drivers, réutilisées pour intégrer une écriture client
+        # sans relire les drivers (refresh_server_data). Le verrou sérialise les agrégations.
+        self._last_driver_outputs: list[SystemObs] = []
+        # Clés des données de projet fournies par le serveur au dernier cycle (storage_snapshot)
+        self._server_key_ids: set[int] = set()
+        self._aggregate_lock = threading.Lock()
+
+        # Drivers n'ayant pas répondu dans leur délai lors du dernier cycle
+        self.late_drivers: List[Driver] = []
+
+        # Lectures encore en cours (driver bloqué) : on ne relance pas un driver
+        # tant que sa lecture précédente n'est pas terminée
+        self._pending_reads: Dict[Driver, Future[SystemObs]] = {}
+        self._read_executor: Optional[ThreadPoolExecutor] = None
+        if self.concurrent_read and self.drivers:
+            self._read_executor = ThreadPoolExecutor(
+                max_workers=len(self.drivers), thread_name_prefix="driver-read"
+            )
+
+        # Table de routage des commandes, construite une seule fois. La flotte d'un type
+        # liste ses équipements (driver, device_id), device_id None pour un driver
+        # d'un seul équipement sans identifiant.
+        self.dispatch_weights: Dict[str, float] = dispatch_weights or {}
+        self._fleet_by_type: Dict[EquipmentType, List[Tuple[Driver, Optional[str]]]] = {}
+        self._routes_by_device: Dict[str, Driver] = {}
+        for driver in self.drivers:
+            fleet = self._fleet_by_type.setdefault(driver.get_equipment_type(), [])
+            device_ids = driver.get_device_ids()
+            if not device_ids:
+                fleet.append((driver, None))
+            for device_id in device_ids:
+                if device_id in self._routes_by_device:
+                    raise ValueError(f"Identifiant d'équipement en double: {device_id}")
+                self._routes_by_device[device_id] = driver
+                fleet.append((driver, device_id))
+
+        # Nom d'étape de lecture de chaque driver : driver.read.<device_id ou classe>,
+        # les drivers sans identifiant d'une même classe étant numérotés
+        self._read_stage_names: Dict[Driver, str] = dict(
+            zip(
+                self.drivers,
+                unique_stage_names(
+                    Stages.DRIVER_READ,
+                    [type(driver).__name__ for driver in self.drivers],
+                    [driver.get_device_id() for driver in self.drivers],
+                ),
+            )
+        )
+
+        self.concurrent_write = concurrent_write
+        self.write_timeout = write_timeout
+        self._pending_writes: Dict[Driver, Future[bool]] = {}
+        self._write_executor: Optional[ThreadPoolExecutor] = None
+        if self.concurrent_write and self.drivers:
+            self._write_executor = ThreadPoolExecutor(
+                max_workers=len(self.drivers), thread_name_prefix="driver-write"
+            )
 
     def read_and_aggregate(self) -> SystemObs:
         """
@@ -34,11 +157,68 @@ class Adapter:
             SystemObs agrégé contenant toutes les données des drivers
         """
         # Lire les données de tous les drivers
+        if self._read_executor is not None:
+            external_outputs = self._read_concurrently(self._read_executor)
+        else:
+            external_outputs = self._read_sequentially()
+
+        with self._aggregate_lock:
+            self._last_driver_outputs = external_outputs
+            return self._aggregate_with_server(list(external_outputs))
+
+    def refresh_server_data(self) -> SystemObs:
+        """
+        Intègre les dernières données du serveur (consignes écrites par les clients)
+        aux dernières mesures des drivers, sans relire les drivers.
+
+        Returns:
+            SystemObs agrégé
+        """
+        with self._aggregate_lock:
+            return self._aggregate_with_server(list(self._last_driver_outputs))
+
+    def _aggregate_with_server(self, external_outputs: list[SystemObs]) -> SystemObs:
+        """Ajoute les données du serveur aux sorties des drivers et les agrège."""
+        server_system_obs = self.server.fill_system_obs()  # data from server
+        self._server_key_ids = {
+            project_data.key_id for project_data in server_system_obs.project_data
+        }
+        external_outputs.append(server_system_obs)
+
+        # Agrégation des données
+        with self.metrics.timer(Stages.AGGREGATE):
+            aggregated_system_obs = self._aggregate(external_outputs)
+        self.global_system_obs = aggregated_system_obs
+        return aggregated_system_obs
+
+    def storage_snapshot(self, system_obs: SystemObs) -> SystemObs:
+        """
+        Retourne le snapshot à enregistrer en base de données : les données du serveur
+        reprises telles quelles d'un cycle à l'autre (consigne client non réécrite) en
+        sont retirées, seules les nouvelles écritures des clients sont conservées.
+
+        Args:
+            system_obs: SystemObs agrégé (read_and_aggregate)
+
+        Returns:
+            SystemObs partageant les mesures de system_obs
+        """
+        server_key_ids = self._server_key_ids
+        project_data = [
+            project_data
+            for project_data in system_obs.project_data
+            if project_data.key_id not in server_key_ids
+        ]
+        project_data.extend(self.server.take_new_data())
+        return system_obs.with_project_data(project_data)
+
+    def _read_sequentially(self) -> list[SystemObs]:
+        """Lit les drivers les uns après les autres."""
         external_outputs: list[SystemObs] = []
 
         for driver in self.drivers:
             try:
-                system_obs = driver.read()
+                system_obs = self._timed_read(driver)
                 external_outputs.append(system_obs)
             except Exception as e:
                 logger.error(
@@ -46,42 +226,243 @@ class Adapter:
                     exc_info=True,
                 )
 
-        external_outputs.append(self.server.fill_system_obs())  # data from server
+        return external_outputs
 
-        # Agrégation des données
-        aggregated_system_obs = self._aggregate(external_outputs)
-        self.global_system_obs = aggregated_system_obs
-        return aggregated_system_obs
+    def _read_concurrently(self, executor: ThreadPoolExecutor) -> list[SystemObs]:
+        """
+        Lit tous les drivers en parallèle, chacun avec sa propre échéance.
+        Un driver qui dépasse son échéance est ignoré pour ce cycle et marqué en retard :
+        la durée du cycle est bornée par le driver le plus lent, et non par la somme des drivers.
+
+        Args:
+            executor: Pool de threads utilisé pour les lectures
+
+        Returns:
+            Liste des SystemObs des drivers ayant répondu à temps
+        """
+        cycle_start = time.monotonic()
+        late_drivers: List[Driver] = []
+
+        # Soumettre les lectures (sauf pour les drivers dont la lecture précédente est bloquée)
+        for driver in self.drivers:
+            pending = self._pending_reads.get(driver)
+            if pending is not None and not pending.done():
+                continue
+            self._pending_reads[driver] = executor.submit(self._timed_read, driver)
+
+        external_outputs: list[SystemObs] = []
+        for driver in self.drivers:
+            future = self._pending_reads[driver]
+            timeout = self.driver_read_timeouts.get(driver, self.read_timeout)
+            remaining = (
+                None
+                if timeout is None
+                else max(0.0, cycle_start + timeout - time.monotonic())
+            )
+            try:
+                external_outputs.append(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                late_drivers.append(driver)
+                logger.warning(
+                    f"Le driver {type(driver).__name__} n'a pas répondu dans le délai "
+                    f"de {timeout}s, ignoré pour ce cycle"
+                )
+            except Exception as e:
+                logger.error(
+                    f"Erreur lors de la lecture du driver {type(driver).__name__}: {e}",
+                    exc_info=True,
+                )
+
+        self.late_drivers = late_drivers
+        return external_outputs
+
+    def _timed_read(self, driver: Driver) -> SystemObs:
+        """Lit un driver en mesurant la durée de lecture."""
+        with self.metrics.timer(self._read_stage_names[driver]):
+            return driver.read()
+
+    def close(self) -> None:
+        """
+        Libère les pools de threads sans attendre les drivers bloqués,
+        puis ferme les drivers (connexions, boucles de communication).
+        """
+        if self._read_executor is not None:
+            self._read_executor.shutdown(wait=False, cancel_futures=True)
+            self._read_executor = None
+        if self._write_executor is not None:
+            self._write_executor.shutdown(wait=False, cancel_futures=True)
+            self._write_executor = None
+        for driver in self.drivers:
+            try:
+                driver.close()
+            except Exception as e:
+                logger.error(
+                    f"Erreur lors de la fermeture du driver {type(driver).__name__}: {e}",
+                    exc_info=True,
+                )
+
+    def route_commands(self, commands: List[Command]) -> Dict[Driver, List[Command]]:
+        """
+        Regroupe les commandes par driver destinataire à l'aide de la table de routage.
+        Une commande avec device_id va au driver de cet équipement. Une commande sans
+        device_id est une consigne pour toute la flotte de son type : elle est répartie
+        entre les équipements (dispatch_fleet_command, selon dispatch_weights) et chaque
+        part est envoyée au driver de son équipement.
+
+        Args:
+            commands: Liste des commandes à router
 
-    def send_commands(self, commands: List[Command]) -> None:
+        Returns:
+            Commandes à écrire, par driver (ordre des commandes conservé)
         """
-        Envoie les commandes aux drivers appropriés selon leur type d'équipement.
+        batches: Dict[Driver, List[Command]] = {}
+        for cmd in commands:
+            if cmd.device_id is not None:
+                driver = self._routes_by_device.get(cmd.device_id)
+                if driver is None:
+                    logger.warning(f"Aucun driver pour l'équipement {cmd.device_id}")
+                    continue
+                batches.setdefault(driver, []).append(cmd)
+            else:
+                fleet = self._fleet_by_type.get(cmd.equipment_type, [])
+                shares = dispatch_fleet_command(
+                    cmd, [device_id for _, device_id in fleet], self.dispatch_weights
+                )
+                for (driver, _), share in zip(fleet, shares):
+                    batches.setdefault(driver, []).append(share)
+        return batches
+
+    def send_commands(self, commands: List[Command]) -> List[Command]:
+        """
+        Envoie les commandes aux drivers appropriés selon leur type d'équipement
+        (ou leur device_id). Les commandes d'un même driver sont écrites en un seul
+        appel write_batch ; en mode concurrent, les drivers sont écrits en parallèle.
 
         Args:
             commands: Liste des commandes à envoyer
+
+        Returns:
+            Commandes écrites avec succès sur tous leurs drivers destinataires
+            (une commande sans driver, ignorée, en erreur ou hors délai en est exclue)
         """
+        with self.metrics.timer(Stages.SEND_COMMANDS):
+            failed_drivers = self._send_batches(self.route_commands(commands))
+        if not failed_drivers:
+            # Cas nominal : seules les commandes sans driver destinataire sont exclues
+            routes_by_device = self._routes_by_device
+            fleet_by_type = self._fleet_by_type
+            return [
+                cmd
+                for cmd in commands
+                if (
+                    cmd.device_id in routes_by_device
+                    if cmd.device_id is not None
+                    else cmd.equipment_type in fleet_by_type
+                )
+            ]
+        written: List[Command] = []
         for cmd in commands:
-            for driver in self.drivers:
-                try:
-                    # Vérifier si le driver gère le type d'équipement de la commande
-                    if driver.get_equipment_type() == cmd.equipment_type:
-                        driver.write(cmd)
-                        logger.debug(
-                            f"Commande envoyée à {type(driver).__name__}: "
-                            f"pSp={cmd.pSp}, qSp={cmd.qSp}"
-                        )
-                        break  # Une commande envoyée, passer à la suivante
-                except Exception as e:
-                    logger.error(
-                        f"Erreur lors de l'écriture au driver {type(driver).__name__}: {e}",
-                        exc_info=True,
-                    )
+            drivers = self._destination_drivers(cmd)
+            if drivers and failed_drivers.isdisjoint(drivers):
+                written.append(cmd)
+        return written
+
+    def _destination_drivers(self, cmd: Command) -> List[Driver]:
+        """Drivers auxquels route_commands envoie une commande (ou sa part de flotte)."""
+        if cmd.device_id is not None:
+            driver = self._routes_by_device.get(cmd.device_id)
+            return [] if driver is None else [driver]
+        return [driver for driver, _ in self._fleet_by_type.get(cmd.equipment_type, [])]
+
+    def _send_batches(self, batches: Dict[Driver, List[Command]]) -> set[Driver]:
+        """
+        Écrit les lots de commandes, en parallèle si le mode concurrent est actif.
+
+        Args:
+            batches: Commandes à écrire, par driver
+
+        Returns:
+            Drivers dont l'écriture a échoué, n'a pas été lancée ou n'a pas abouti
+            dans le délai
+        """
+        failed: set[Driver] = set()
+        if self._write_executor is None or len(batches) <= 1:
+            for driver, driver_commands in batches.items():
+                if not self._write_batch(driver, driver_commands):
+                    failed.add(driver)
+            return failed
+
+        start = time.monotonic()
+        submitted: Dict[Driver, Future[bool]] = {}
+        for driver, driver_commands in batches.items():
+            pending = self._pending_writes.get(driver)
+            if pending is not None and not pending.done():
+                logger.warning(
+                    f"Écriture précédente toujours en cours pour {type(driver).__name__}, "
+                    f"{len(driver_commands)} commande(s) ignorée(s)"
+                )
+                failed.add(driver)
+                continue
+            future = self._write_executor.submit(
+                self._write_batch, driver, driver_commands
+            )
+            self._pending_writes[driver] = future
+            submitted[driver] = future
+
+        for driver, future in submitted.items():
+            remaining = (
+                None
+                if self.write_timeout is None
+                else max(0.0, start + self.write_timeout - time.monotonic())
+            )
+            try:
+                if not future.result(timeout=remaining):
+                    failed.add(driver)
+            except FutureTimeoutError:
+                logger.warning(
+                    f"Le driver {type(driver).__name__} n'a pas terminé son écriture "
+                    f"dans le délai de {self.write_timeout}s"
+                )
+                failed.add(driver)
+        return failed
+
+    def _write_batch(self, driver: Driver, commands: List[Command]) -> bool:
+        """
+        Écrit un lot de commandes sur un driver en journalisant les erreurs.
+
+        Args:
+            driver: Driver destinataire
+            commands: Commandes à écrire
+
+        Returns:
+            True si l'écriture a réussi
+        """
+        try:
+            driver.write_batch(commands)
+            logger.debug(
+                f"{len(commands)} commande(s) envoyée(s) à {type(driver).__name__}"
+            )
+            return True
+        except Exception as e:
+            logger.error(
+                f"Erreur lors de l'écriture au driver {type(driver).__name__}: {e}",
+                exc_info=True,
+            )
+            return False
 
     def _aggregate(self, external_outputs: list[SystemObs]) -> SystemObs:
         """
         Agrège les sorties de tous les drivers dans un SystemObs global.
-        Accumule automatiquement tous les champs de type liste (sauf timestamp).
-        Cette méthode est générique et s'adapte automatiquement aux évolutions de SystemObs.
+        Accumule tous les champs de type liste (sauf timestamp) selon AGGREGATION_PLAN,
+        calculé une seule fois à partir du schéma de SystemObs, et construit l'index
+        des données de projet.
+        L'agrégat est reconstruit à chaque cycle, sans mode incrémental : les drivers
+        construisent de nouvelles listes à chaque lecture (un segment inchangé ne se
+        détecte pas par identité), et une passe chain par champ est plus rapide que la
+        comparaison des segments à l'échelle d'une flotte.
+
+        En mode colonnes, les colonnes de chaque segment (fournies par le driver, sinon
+        construites à partir de ses objets) sont concaténées dans le même ordre que les listes.
 
         Args:
             external_outputs: Liste des SystemObs provenant des drivers et du serveur
@@ -89,31 +470,37 @@ class Adapter:
         Returns:
             SystemObs agrégé
         """
-        # Obtenir tous les champs du dataclass SystemObs
-        system_obs_fields = fields(SystemObs)
+        # Une seule liste par champ, remplie par chain (pas de boucle Python par segment)
+        accumulated_values: dict[str, Any] = {
+            field_name: list(chain.from_iterable(map(getter, external_outputs)))
+            for field_name, getter in _AGGREGATION_GETTERS
+        }
 
-        # Dictionnaire pour stocker les valeurs accumulées de chaque champ
-        accumulated_values: dict[str, Any] = {}
+        # Index identifiant de clé -> ProjectData construit une seule fois par cycle
+        accumulated_values["project_data_index"] = SystemObs.index_project_data(
+            accumulated_values["project_data"]
+        )
 
-        # Pour chaque champ de SystemObs (sauf timestamp)
-        for field_info in system_obs_fields:
-            field_name = field_info.name
-            # Exclure le champ timestamp s'il existe
-            if field_name == "timestamp":
-                continue
-
-            # Initialiser la liste accumulée pour ce champ
-            accumulated_list: list[Any] = []
-
-            # Parcourir tous les SystemObs des drivers
-            for system_obs in external_outputs:
-                field_value = getattr(system_obs, field_name)
-                if field_value:
-                    accumulated_list.extend(field_value)
-
-            accumulated_values[field_name] = accumulated_list
+        if self.columnar:
+            for field_name, columns_name, columns_type in COLUMNAR_PLAN:
+                parts = []
+                for system_obs in external_outputs:
+                    segment = getattr(system_obs, field_name)
+                    if not segment:
+                        continue
+                    columns = getattr(system_obs, columns_name)
+                    if columns is None:
+                        columns = columns_type.from_units(segment)
+                    parts.append(columns)
+                accumulated_values[columns_name] = columns_type.concatenate(parts)
 
         return SystemObs(**accumulated_values)
 
     def sync_server(self):
         self.server.expose_server(self.global_system_obs)
+
+    def publish_metrics(self, stats: Dict[str, StageStats]) -> None:
+        self.server.publish_metrics(stats)
+
+    def set_server_write_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        self.server.set_write_listener(listener)
@@ -3,33 +3,35 @@ import threading
 from collections import deque
 import time
 import logging
-from datetime import datetime
-from pathlib import Path
-from typing import Optional, List
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Dict, Optional, List, Tuple
 
 from communication.interface import Driver
 from communication.interface import Server
 from adapter.adapter import Adapter
+from application.scheduler import FixedRateScheduler, OverrunPolicy, SchedulerStats
+from core.command_filter import CommandFilter, CommandFilterStats
 from core.orchestrator import Orchestrator
 from datamodel.datamodel import SystemObs, Command
 from database.database import Database
+from database.interface import Storage
+from database.partitioned_database import PartitionedDatabase
+from database.query import DatabaseQuery
+from database.writer import DatabaseWriter
+from monitoring.metrics import DEFAULT_METRICS, MetricsRegistry, StageStats, Stages
 
 logger = logging.getLogger(__name__)
 
 
-def get_daily_db_path() -> str:
-    """
-    Génère le chemin de la base de données basé sur la date du jour.
-    Format: db/YYYY_MM_DD.db
+@dataclass(frozen=True)
+class CommandLatencyStats:
+    """Latence entre la disponibilité d'une mesure agrégée et l'envoi des commandes associées."""
 
-    Returns:
-        Chemin vers le fichier de base de données
-    """
-    today = datetime.now()
-    db_dir = Path("db")
-    db_dir.mkdir(exist_ok=True)
-    db_filename = f"{today.year}_{today.month:02d}_{today.day:02d}.db"
-    return str(db_dir / db_filename)
+    count: int
+    last: float
+    mean: float
+    max: float
 
 
 class Application:
@@ -48,6 +50,22 @@ class Application:
         communication_interval: float = 1.0,
         process_interval: float = 1.0,
         db_path: Optional[str] = None,
+        concurrent_read: bool = False,
+        read_timeout: Optional[float] = None,
+        driver_read_timeouts: Optional[Dict[Driver, float]] = None,
+        concurrent_write: bool = False,
+        write_timeout: Optional[float] = None,
+        columnar_aggregation: bool = False,
+        dispatch_weights: Optional[Dict[str, float]] = None,
+        event_driven: bool = False,
+        push_server_writes: bool = True,
+        command_filter: Optional[CommandFilter] = None,
+        overrun_policy: OverrunPolicy = OverrunPolicy.SKIP,
+        db_commit_interval: float = 1.0,
+        db_queue_size: int = 1000,
+        db_partition_period: timedelta = timedelta(days=1),
+        db_retention: Optional[timedelta] = None,
+        metrics: Optional[MetricsRegistry] = None,
     ):
         """
         Initialise l'application.
@@ -55,40 +73,130 @@ class Application:
         Args:
             drivers: Liste des drivers de communication (Modbus, etc.)
             orchestrator: Orchestrateur pour le traitement des mesures
-            communication_interval: Intervalle entre les lectures/écritures (secondes)
-            process_interval: Intervalle entre les traitements (secondes)
+            communication_interval: Période des lectures/écritures (secondes)
+            process_interval: Période des traitements (secondes)
             db_path: Chemin vers le fichier de base de données (.db).
-                     Si None, utilise automatiquement db/YYYY_MM_DD.db basé sur la date du jour.
+                     Si None, utilise un stockage partitionné dans db/ (db/YYYY_MM_DD.db
+                     par défaut) qui bascule automatiquement à chaque nouvelle période.
+            concurrent_read: Si True, les drivers sont lus en parallèle
+            read_timeout: Échéance de lecture par driver en mode concurrent (secondes)
+            driver_read_timeouts: Échéances spécifiques par driver, prioritaires sur read_timeout
+            concurrent_write: Si True, les commandes sont écrites en parallèle sur les drivers
+            write_timeout: Délai maximal d'attente des écritures en mode concurrent (secondes)
+            columnar_aggregation: Si True, le SystemObs agrégé porte aussi les mesures des
+                                  BESS et PV en colonnes numpy (calculs vectorisés sur la flotte)
+            dispatch_weights: Poids de répartition, par device_id, des commandes sans
+                              device_id entre les équipements de leur type (par exemple
+                              la capacité de chaque BESS). Par défaut, parts égales.
+            event_driven: Si True, le traitement est réveillé par chaque nouveau snapshot
+                          (une seule exécution par snapshot) et les commandes sont envoyées
+                          dès leur production, au lieu d'attendre les intervalles fixes
+            push_server_writes: Si True, chaque écriture d'un client du serveur (consigne,
+                                watchdog) produit aussitôt un nouveau snapshot, sans attendre
+                                le cycle d'agrégation suivant. En mode événementiel, le
+                                traitement est réveillé immédiatement.
+            command_filter: Filtre appliqué aux commandes avant leur envoi aux drivers
+                            (bande morte, débit maximal, renvoi périodique).
+                            Si None, toutes les commandes sont envoyées.
+            overrun_policy: Comportement des boucles lorsqu'un cycle dépasse sa période
+            db_commit_interval: Fenêtre de regroupement des écritures en base (secondes)
+            db_queue_size: Nombre maximal de snapshots en attente d'écriture en base
+            db_partition_period: Durée d'une partition du stockage partitionné
+            db_retention: Durée de conservation des partitions (None : pas de suppression)
+            metrics: Registre des durées d'étapes (registre partagé par défaut)
         """
         self.orchestrator = orchestrator
+        self.metrics = metrics or DEFAULT_METRICS
 
         # Adapter gère la communication avec les drivers
-        self.adapter: Adapter = Adapter(drivers=drivers, server=server)
+        self.adapter: Adapter = Adapter(
+            drivers=drivers,
+            server=server,
+            concurrent_read=concurrent_read,
+            read_timeout=read_timeout,
+            driver_read_timeouts=driver_read_timeouts,
+            concurrent_write=concurrent_write,
+            write_timeout=write_timeout,
+            columnar=columnar_aggregation,
+            dispatch_weights=dispatch_weights,
+            metrics=self.metrics,
+        )
         self.communication_interval = communication_interval
         self.process_interval = process_interval
+        self.event_driven = event_driven
+        self.push_server_writes = push_server_writes
+        self.command_filter = command_filter
 
         # Base de données pour sauvegarder les données agrégées
-        # Utilise le chemin basé sur la date du jour si non spécifié
+        # Utilise un stockage partitionné par période si aucun fichier n'est spécifié
+        self.database: Storage
         if db_path is None:
-            db_path = get_daily_db_path()
-        self.database = Database(db_path)
+            self.database = PartitionedDatabase(
+                directory="db",
+                partition_period=db_partition_period,
+                retention=db_retention,
+            )
+        else:
+            self.database = Database(db_path)
+        # Lectures par plage de temps et sous-échantillonnage (IHM, analyses)
+        self.query = DatabaseQuery(self.database)
+        # Les écritures sont faites par un thread dédié pour ne pas bloquer l'acquisition
+        self.db_writer = DatabaseWriter(
+            self.database,
+            max_queue_size=db_queue_size,
+            commit_interval=db_commit_interval,
+            metrics=self.metrics,
+        )
 
-        # Deques avec maxlen=1 : remplace automatiquement l'ancien élément
-        self.dataobs_deque: deque[SystemObs] = deque(maxlen=1)
-        self.cmd_deque: deque[List[Command]] = deque(maxlen=1)
+        # Deques avec maxlen=1 : remplace automatiquement l'ancien élément.
+        # Chaque élément est accompagné de l'instant (monotonic) d'acquisition de la mesure.
+        self.dataobs_deque: deque[Tuple[SystemObs, float]] = deque(maxlen=1)
+        self.cmd_deque: deque[Tuple[List[Command], float]] = deque(maxlen=1)
 
         # Verrous pour la sécurité thread
         self.dataobs_lock = threading.Lock()
         self.cmd_lock = threading.Lock()
 
+        # Notification des nouveaux snapshots (mode événementiel) : numéro de séquence
+        # incrémenté à chaque agrégation, protégé par dataobs_lock
+        self._new_dataobs = threading.Condition(self.dataobs_lock)
+        self._dataobs_seq = 0
+
+        # Écritures des clients du serveur à intégrer au pipeline (signalées par le serveur)
+        self._server_write_event = threading.Event()
+        if self.push_server_writes:
+            self.adapter.set_server_write_listener(self._server_write_event.set)
+
+        # Latence mesure -> commande
+        self._latency_lock = threading.Lock()
+        self._latency_count = 0
+        self._latency_last = 0.0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+
         # Event pour signaler l'arrêt propre
         self._stop_event = threading.Event()
         self._running = False
 
+        # Ordonnanceurs à période fixe (horloge monotone) : les intervalles sont
+        # des périodes, la durée du travail ne s'y ajoute pas
+        self.schedulers: dict[str, FixedRateScheduler] = {
+            "aggregation": FixedRateScheduler(
+                communication_interval, self._stop_event, overrun_policy, "aggregation"
+            ),
+            "process": FixedRateScheduler(
+                process_interval, self._stop_event, overrun_policy, "process"
+            ),
+            "server": FixedRateScheduler(
+                communication_interval, self._stop_event, overrun_policy, "server"
+            ),
+        }
+
         # Références aux threads
         self._aggregation_thread: Optional[threading.Thread] = None
         self._process_thread: Optional[threading.Thread] = None
         self._server_thread: Optional[threading.Thread] = None
+        self._server_write_thread: Optional[threading.Thread] = None
 
     def start(self) -> None:
         """Démarre les threads de communication et traitement."""
@@ -97,16 +205,28 @@ class Application:
 
         self._stop_event.clear()
         self._running = True
+        for scheduler in self.schedulers.values():
+            scheduler.reset()
 
         # Thread pour l'agrégation des données
         self._aggregation_thread = threading.Thread(
             target=self._aggregation_loop, daemon=True
         )
         # Thread pour le traitement
-        self._process_thread = threading.Thread(target=self._process_loop, daemon=True)
+        process_target = (
+            self._event_process_loop if self.event_driven else self._process_loop
+        )
+        self._process_thread = threading.Thread(target=process_target, daemon=True)
         # Thread pour la synchronisation du serveur Modbus
         self._server_thread = threading.Thread(target=self._server_loop, daemon=True)
+        # Thread pour l'intégration des écritures des clients du serveur
+        if self.push_server_writes:
+            self._server_write_thread = threading.Thread(
+                target=self._server_write_loop, daemon=True
+            )
+            self._server_write_thread.start()
 
+        self.db_writer.start()
         self._aggregation_thread.start()
         self._process_thread.start()
         self._start_modbus_server()
@@ -119,6 +239,10 @@ class Application:
 
         self._running = False
         self._stop_event.set()
+        # Réveiller le thread de traitement en attente d'un snapshot
+        with self._new_dataobs:
+            self._new_dataobs.notify_all()
+        self._server_write_event.set()
 
         # Attendre que les threads se terminent (avec timeout)
         if self._aggregation_thread:
@@ -127,12 +251,18 @@ class Application:
             self._process_thread.join(timeout=2.0)
         if self._server_thread:
             self._server_thread.join(timeout=2.0)
+        if self._server_write_thread:
+            self._server_write_thread.join(timeout=2.0)
 
         # Arrêter le serveur Modbus
         self._stop_modbus_server()
 
-        # Fermer la connexion à la base de données
-        self.database.close()
+        # Libérer les pools et fermer les drivers, puis le pool des fonctions métier
+        self.adapter.close()
+        self.orchestrator.close()
+
+        # Vider la file d'écriture puis fermer la connexion à la base de données
+        self.db_writer.close()
 
     def run(self) -> None:
         """
@@ -153,37 +283,78 @@ class Application:
         Boucle d'agrégation : délègue la collecte et l'agrégation des données à l'Adapter,
         puis met les données à disposition pour le traitement.
         """
-        while not self._stop_event.is_set():
+        scheduler = self.schedulers["aggregation"]
+        while scheduler.wait_next():
             try:
                 # Déléguer la lecture et l'agrégation à l'Adapter
                 aggregated_data = self.adapter.read_and_aggregate()
+                acquired_at = time.monotonic()
 
-                # Stocker les données agrégées
-                with self.dataobs_lock:
-                    self.dataobs_deque.append(aggregated_data)
+                # Stocker les données agrégées et réveiller le traitement
+                self._publish_dataobs(aggregated_data, acquired_at)
 
-                # Sauvegarder les données agrégées dans la base de données
-                try:
-                    self.database.save_system_obs(aggregated_data)
-                except Exception as e:
-                    logger.error(
-                        f"Erreur lors de la sauvegarde en base de données: {e}",
-                        exc_info=True,
-                    )
+                # Déposer les données agrégées dans la file d'écriture en base de données
+                # (sans les données du serveur reprises du cycle précédent)
+                self.db_writer.save_system_obs(
+                    self.adapter.storage_snapshot(aggregated_data)
+                )
 
                 logger.debug(f"Données agrégées: {aggregated_data}")
 
-                # Envoyer les commandes si disponibles (délégué à l'Adapter)
+                # Envoyer les commandes si disponibles (délégué à l'Adapter).
+                # En mode événementiel, elles sont envoyées par le thread de traitement.
                 with self.cmd_lock:
                     if self.cmd_deque:
-                        commands = self.cmd_deque.popleft()
-                        self.adapter.send_commands(commands)
+                        commands, measured_at = self.cmd_deque.popleft()
+                        self._send_commands(commands, measured_at)
 
             except Exception as e:
                 logger.error(f"Erreur dans la boucle d'agrégation: {e}", exc_info=True)
 
-            # Attendre l'intervalle ou l'arrêt
-            self._stop_event.wait(self.communication_interval)
+    def _publish_dataobs(self, dataobs: SystemObs, acquired_at: float) -> None:
+        """
+        Met un snapshot à disposition du traitement et réveille la boucle événementielle.
+
+        Args:
+            dataobs: SystemObs agrégé
+            acquired_at: Instant (time.monotonic) de disponibilité du snapshot
+        """
+        with self._new_dataobs:
+            self.dataobs_deque.append((dataobs, acquired_at))
+            self._dataobs_seq += 1
+            self._new_dataobs.notify_all()
+
+    def _server_write_loop(self) -> None:
+        """
+        Boucle d'intégration des écritures des clients du serveur : à chaque consigne ou
+        watchdog écrit, ré-agrège les dernières mesures des drivers avec les données du
+        serveur et publie le snapshot, sans attendre le cycle d'agrégation suivant.
+        Les données écrites sont aussi enregistrées en base dès leur réception.
+        Plusieurs écritures rapprochées sont intégrées en un seul snapshot.
+        """
+        while not self._stop_event.is_set():
+            self._server_write_event.wait()
+            if self._stop_event.is_set():
+                return
+            self._server_write_event.clear()
+            with self.dataobs_lock:
+                if self._dataobs_seq == 0:
+                    # Pas encore de mesures : l'écriture sera prise au premier cycle
+                    continue
+
+            try:
+                dataobs = self.adapter.refresh_server_data()
+                self._publish_dataobs(dataobs, time.monotonic())
+                # Seules les écritures des clients sont nouvelles : les mesures des drivers,
+                # reprises du dernier cycle, ont déjà été déposées par la boucle d'agrégation
+                new_data = self.adapter.server.take_new_data()
+                if new_data:
+                    self.db_writer.save_system_obs(SystemObs(project_data=new_data))
+            except Exception as e:
+                logger.error(
+                    f"Erreur lors de l'intégration d'une écriture du serveur: {e}",
+                    exc_info=True,
+                )
 
     def _start_modbus_server(self) -> None:
         """
@@ -219,25 +390,28 @@ class Application:
 
     def _server_loop(self) -> None:
         """Boucle de synchronisation avec le serveur Modbus."""
-        while not self._stop_event.is_set():
+        scheduler = self.schedulers["server"]
+        while scheduler.wait_next():
             try:
                 # Synchroniser le serveur avec les données agrégées actuelles
                 self.adapter.sync_server()
+                # Publier les durées d'étapes du cycle pour la supervision
+                self.adapter.publish_metrics(self.metrics.get_stats())
             except Exception as e:
                 logger.error(
                     f"Erreur dans la boucle de synchronisation avec le serveur: {e}",
                     exc_info=True,
                 )
-            self._stop_event.wait(self.communication_interval)
 
     def _process_loop(self) -> None:
         """Boucle de traitement : traite les mesures agrégées et génère les commandes."""
-        while not self._stop_event.is_set():
+        scheduler = self.schedulers["process"]
+        while scheduler.wait_next():
             try:
                 # Lire la dernière mesure disponible
                 with self.dataobs_lock:
                     if self.dataobs_deque:
-                        dataobs = self.dataobs_deque[0]
+                        dataobs, acquired_at = self.dataobs_deque[0]
                     else:
                         dataobs = None
 
@@ -246,10 +420,111 @@ class Application:
                     # append() remplace automatiquement l'ancienne liste de commandes si maxlen=1
                     if commands:
                         with self.cmd_lock:
-                            self.cmd_deque.append(commands)
+                            self.cmd_deque.append((commands, acquired_at))
 
             except Exception as e:
                 logger.error(f"Erreur dans la boucle de traitement: {e}", exc_info=True)
 
-            # Attendre l'intervalle ou l'arrêt
-            self._stop_event.wait(self.process_interval)
+    def _event_process_loop(self) -> None:
+        """
+        Boucle de traitement événementielle : attend chaque nouveau snapshot, exécute
+        l'Orchestrator exactement une fois dessus et envoie aussitôt les commandes.
+        Si plusieurs snapshots arrivent pendant un traitement, seul le plus récent est traité.
+        """
+        last_seq = 0
+        while not self._stop_event.is_set():
+            with self._new_dataobs:
+                self._new_dataobs.wait_for(
+                    lambda: self._dataobs_seq != last_seq or self._stop_event.is_set()
+                )
+                if self._stop_event.is_set():
+                    return
+                dataobs, acquired_at = self.dataobs_deque[0]
+                last_seq = self._dataobs_seq
+
+            try:
+                commands = self.orchestrator.step(dataobs)
+                if commands:
+                    self._send_commands(commands, acquired_at)
+            except Exception as e:
+                logger.error(f"Erreur dans la boucle de traitement: {e}", exc_info=True)
+
+    def _send_commands(self, commands: List[Command], acquired_at: float) -> None:
+        """
+        Filtre les commandes puis envoie celles qui restent aux drivers.
+        Le filtre ne mémorise que les commandes écrites avec succès.
+
+        Args:
+            commands: Commandes produites par l'Orchestrator
+            acquired_at: Instant (time.monotonic) de disponibilité du snapshot agrégé
+        """
+        if self.command_filter is not None:
+            commands = self.command_filter.filter(commands)
+            if not commands:
+                return
+        written = self.adapter.send_commands(commands)
+        if self.command_filter is not None:
+            self.command_filter.mark_sent(written)
+        self._record_command_latency(acquired_at)
+
+    def _record_command_latency(self, acquired_at: float) -> None:
+        """
+        Enregistre la latence entre l'acquisition d'une mesure et l'envoi des commandes.
+
+        Args:
+            acquired_at: Instant (time.monotonic) de disponibilité du snapshot agrégé
+        """
+        latency = time.monotonic() - acquired_at
+        self.metrics.record(Stages.COMMAND_LATENCY, latency)
+        with self._latency_lock:
+            self._latency_count += 1
+            self._latency_last = latency
+            self._latency_total += latency
+            self._latency_max = max(self._latency_max, latency)
+
+    def get_scheduler_stats(self) -> dict[str, SchedulerStats]:
+        """
+        Retourne les statistiques (jitter, dépassements) de chaque boucle périodique.
+
+        Returns:
+            Statistiques par nom de boucle (aggregation, process, server)
+        """
+        return {name: scheduler.get_stats() for name, scheduler in self.schedulers.items()}
+
+    def get_stage_stats(self) -> dict[str, StageStats]:
+        """
+        Retourne les durées (p50/p99/max) de chaque étape du cycle.
+
+        Returns:
+            StageStats par nom d'étape
+        """
+        return self.metrics.get_stats()
+
+    def get_command_latency(self) -> CommandLatencyStats:
+        """
+        Retourne les statistiques de latence mesure -> commande.
+
+        Returns:
+            CommandLatencyStats (secondes)
+        """
+        with self._latency_lock:
+            mean = (
+                self._latency_total / self._latency_count if self._latency_count else 0.0
+            )
+            return CommandLatencyStats(
+                count=self._latency_count,
+                last=self._latency_last,
+                mean=mean,
+                max=self._latency_max,
+            )
+
+    def get_command_filter_stats(self) -> Optional[CommandFilterStats]:
+        """
+        Retourne les compteurs du filtre de commandes (écritures supprimées...).
+
+        Returns:
+            CommandFilterStats, ou None si aucun filtre n'est configuré
+        """
+        if self.command_filter is None:
+            return None
+        return self.command_filter.get_stats()
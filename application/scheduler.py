@@ -0,0 +1,171 @@
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from enum import Enum
+from typing import Optional
+
+
+logger = logging.getLogger(__name__)
+
+
+class OverrunPolicy(Enum):
+    """Comportement lorsqu'un cycle dépasse sa période."""
+
+    SKIP = "skip"  # abandonner les échéances manquées et se réaligner sur la grille
+    CATCH_UP = "catch_up"  # enchaîner immédiatement les cycles en retard
+    LOG = "log"  # journaliser et repartir de l'instant présent
+
+
+@dataclass(frozen=True)
+class SchedulerStats:
+    """Statistiques d'un ordonnanceur à période fixe (durées en secondes)."""
+
+    period: float
+    cycles: int
+    overruns: int
+    skipped_cycles: int
+    last_jitter: float
+    mean_jitter: float
+    max_jitter: float
+
+
+class FixedRateScheduler:
+    """
+    Ordonnanceur à période fixe basé sur l'horloge monotone.
+
+    Les échéances sont calculées sur une grille start + k * period : la durée du
+    travail ne s'ajoute pas à la période et il n'y a pas de dérive. Le retard au
+    réveil (jitter) et les dépassements de période sont mesurés.
+
+    Utilisation :
+        while scheduler.wait_next():
+            travail()
+    """
+
+    def __init__(
+        self,
+        period: float,
+        stop_event: threading.Event,
+        overrun_policy: OverrunPolicy = OverrunPolicy.SKIP,
+        name: str = "",
+    ):
+        """
+        Initialise l'ordonnanceur.
+
+        Args:
+            period: Période des cycles (secondes)
+            stop_event: Event d'arrêt, interrompt l'attente
+            overrun_policy: Comportement en cas de dépassement de période
+            name: Nom utilisé dans les logs
+        """
+        if period <= 0:
+            raise ValueError(f"La période doit être strictement positive, reçu {period}")
+
+        self.period = period
+        self.stop_event = stop_event
+        self.overrun_policy = overrun_policy
+        self.name = name
+
+        self._lock = threading.Lock()
+        self._next_deadline: Optional[float] = None
+        self._cycles = 0
+        self._overruns = 0
+        self._skipped_cycles = 0
+        self._last_jitter = 0.0
+        self._total_jitter = 0.0
+        self._max_jitter = 0.0
+
+    def reset(self) -> None:
+        """Réinitialise la grille d'échéances : le prochain cycle démarre immédiatement."""
+        with self._lock:
+            self._next_deadline = None
+
+    def wait_next(self) -> bool:
+        """
+        Attend l'échéance du prochain cycle.
+
+        Returns:
+            True si le cycle doit être exécuté, False si l'arrêt est demandé
+        """
+        now = time.monotonic()
+        with self._lock:
+            if self._next_deadline is None:
+                # Premier cycle : exécution immédiate, la grille part de maintenant
+                self._next_deadline = now
+                self._cycles += 1
+                return not self.stop_event.is_set()
+
+            deadline = self._next_deadline + self.period
+            if now > deadline:
+                deadline = self._handle_overrun(deadline, now)
+            self._next_deadline = deadline
+
+        delay = deadline - time.monotonic()
+        if delay > 0 and self.stop_event.wait(delay):
+            return False
+        if self.stop_event.is_set():
+            return False
+
+        jitter = max(0.0, time.monotonic() - deadline)
+        with self._lock:
+            self._cycles += 1
+            self._last_jitter = jitter
+            self._total_jitter += jitter
+            self._max_jitter = max(self._max_jitter, jitter)
+        return True
+
+    def get_stats(self) -> SchedulerStats:
+        """
+        Retourne les statistiques de l'ordonnanceur.
+
+        Returns:
+            SchedulerStats avec le nombre de cycles, de dépassements et le jitter
+        """
+        with self._lock:
+            # Le premier cycle n'a pas d'échéance, il n'entre pas dans le jitter
+            timed_cycles = max(1, self._cycles - 1)
+            return SchedulerStats(
+                period=self.period,
+                cycles=self._cycles,
+                overruns=self._overruns,
+                skipped_cycles=self._skipped_cycles,
+                last_jitter=self._last_jitter,
+                mean_jitter=self._total_jitter / timed_cycles,
+                max_jitter=self._max_jitter,
+            )
+
+    def _handle_overrun(self, deadline: float, now: float) -> float:
+        """
+        Applique la politique de dépassement. Appelée sous verrou.
+
+        Args:
+            deadline: Échéance dépassée
+            now: Instant courant (monotonic)
+
+        Returns:
+            Nouvelle échéance du prochain cycle
+        """
+        self._overruns += 1
+        lateness = now - deadline
+
+        if self.overrun_policy == OverrunPolicy.SKIP:
+            missed = int(lateness // self.period) + 1
+            self._skipped_cycles += missed
+            logger.debug(
+                f"Ordonnanceur {self.name}: dépassement de {lateness:.3f}s, "
+                f"{missed} cycle(s) sauté(s)"
+            )
+            return deadline + missed * self.period
+
+        if self.overrun_policy == OverrunPolicy.CATCH_UP:
+            logger.debug(
+                f"Ordonnanceur {self.name}: dépassement de {lateness:.3f}s, rattrapage"
+            )
+            return deadline
+
+        logger.warning(
+            f"Ordonnanceur {self.name}: dépassement de période de {lateness:.3f}s "
+            f"(période {self.period}s)"
+        )
+        return now
@@ -0,0 +1,419 @@
+"""
+Suite de benchmarks des chemins principaux du cycle.
+
+Utilisation :
+    python -m benchmarks.run_benchmarks --scales 1,10,100,1000 --project-keys 200 \
+        --output benchmarks/results.json
+
+Chaque benchmark est exécuté pour chaque échelle (nombre de BESS et de PV) avec des
+données générées de façon déterministe. Les résultats (débit et latences) sont écrits
+en JSON avec la version du code, pour comparer deux versions entre elles.
+"""
+
+import argparse
+import atexit
+import contextlib
+import io
+import itertools
+import json
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+from adapter.adapter import Adapter
+from communication.interface import Driver, Server
+from communication.server.modbus_server import ModbusServer
+from communication.server.register_map import build_fleet_register_map
+from core.clock import VirtualClock
+from core.orchestrator import Orchestrator
+from database.database import Database
+from datamodel.datamodel import Command, EquipmentType, SystemObs
+from datamodel.project_data import ProjectData
+from datamodel.standard_data import Bess, Pv
+from keys.keys import Keys
+from keys.registry import DEFAULT_KEY_REGISTRY
+from metier.voltage_support.state_machine import StateMachine
+from metier.voltage_support.voltage_support import VoltageSupport
+from monitoring.metrics import MetricsRegistry
+
+
+# Un benchmark prépare ses données pour une échelle et retourne l'opération à mesurer
+Setup = Callable[["Scenario"], Callable[[], object]]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    """Taille des données d'un benchmark."""
+
+    n_bess: int
+    n_pv: int
+    n_project_keys: int
+
+
+@dataclass(frozen=True)
+class BenchmarkResult:
+    """Durées d'un benchmark à une échelle donnée (secondes par opération)."""
+
+    name: str
+    n_bess: int
+    n_pv: int
+    n_project_keys: int
+    iterations: int
+    ops_per_second: float
+    mean: float
+    p50: float
+    p99: float
+    min: float
+    max: float
+
+
+class _NullDriver(Driver):
+    """Driver sans I/O : retourne un SystemObs préparé et ignore les écritures."""
+
+    def __init__(
+        self,
+        equipment_type: EquipmentType,
+        device_id: Optional[str] = None,
+        system_obs: Optional[SystemObs] = None,
+    ):
+        self.equipment_type = equipment_type
+        self.device_id = device_id
+        self.system_obs = system_obs or SystemObs()
+
+    def read(self) -> SystemObs:
+        return self.system_obs
+
+    def write(self, command: Command):
+        pass
+
+    def get_equipment_type(self) -> EquipmentType:
+        return self.equipment_type
+
+    def get_device_id(self) -> Optional[str]:
+        return self.device_id
+
+
+class _NullServer(Server):
+    def expose_server(self, system_obs: SystemObs):
+        pass
+
+    def fill_system_obs(self) -> SystemObs:
+        return SystemObs()
+
+
+def project_keys(n_project_keys: int) -> List[str]:
+    """Clés de projet du scénario : clés du contrôleur puis clés génériques."""
+    base = [Keys.BESS_SETPOINT_KEY, Keys.WATCHDOG_BESS_KEY, Keys.TEMPERATURE_BESS_KEY]
+    generic = [f"key_{i:04d}" for i in range(max(0, n_project_keys - len(base)))]
+    return (base + generic)[:n_project_keys]
+
+
+def make_driver_outputs(scenario: Scenario, timestamp: float) -> List[SystemObs]:
+    """
+    Génère les sorties des drivers : un SystemObs par équipement, les données de
+    projet étant réparties sur les sorties BESS.
+    """
+    outputs = [
+        SystemObs(bess=[Bess(p=i, q=0.0, soc=50.0, timestamp=timestamp)])
+        for i in range(scenario.n_bess)
+    ]
+    outputs += [
+        SystemObs(pv=[Pv(p=i, q=0.0, timestamp=timestamp)])
+        for i in range(scenario.n_pv)
+    ]
+    if not outputs:
+        outputs.append(SystemObs())
+    for i, key in enumerate(project_keys(scenario.n_project_keys)):
+        outputs[i % len(outputs)].project_data.append(
+            ProjectData(name=key, value=float(i), timestamp=timestamp)
+        )
+    return outputs
+
+
+def make_system_obs(scenario: Scenario, timestamp: float) -> SystemObs:
+    """Génère un SystemObs agrégé (avec index des données de projet)."""
+    adapter = Adapter(drivers=[], server=_NullServer(), metrics=MetricsRegistry())
+    return adapter._aggregate(make_driver_outputs(scenario, timestamp))
+
+
+def bench_aggregate(scenario: Scenario) -> Callable[[], object]:
+    adapter = Adapter(
+        drivers=[],
+        server=_NullServer(),
+        metrics=MetricsRegistry(),
+    )
+    outputs = make_driver_outputs(scenario, 0.0)
+    return lambda: adapter._aggregate(outputs)
+
+
+def bench_get_project_data(scenario: Scenario) -> Callable[[], object]:
+    system_obs = make_system_obs(scenario, 0.0)
+    keys = project_keys(scenario.n_project_keys)
+
+    # Une opération = recherche de toutes les clés du scénario
+    def lookup_all() -> None:
+        for key in keys:
+            system_obs.get_project_data(key)
+
+    return lookup_all
+
+
+def bench_get_project_data_by_id(scenario: Scenario) -> Callable[[], object]:
+    system_obs = make_system_obs(scenario, 0.0)
+    key_ids = [
+        DEFAULT_KEY_REGISTRY.register(key)
+        for key in project_keys(scenario.n_project_keys)
+    ]
+
+    # Une opération = recherche de toutes les clés du scénario, par identifiant
+    def lookup_all() -> None:
+        for key_id in key_ids:
+            system_obs.get_project_data_by_id(key_id)
+
+    return lookup_all
+
+
+def bench_database_save(scenario: Scenario) -> Callable[[], object]:
+    directory = tempfile.mkdtemp(prefix="ppc_bench_")
+    database = Database(str(Path(directory) / "bench.db"))
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    atexit.register(database.close)
+    start = time.time()
+    system_obs = make_system_obs(scenario, start)
+    iteration = itertools.count(1)
+
+    # Une opération = sauvegarde d'un snapshot ; chaque itération est un nouvel
+    # échantillon (horodatage des données de projet avancé d'un cycle)
+    def save() -> None:
+        timestamp = start + next(iteration)
+        for project_data in system_obs.project_data:
+            project_data.timestamp = timestamp
+        database.save_system_obs(system_obs)
+
+    return save
+
+
+def bench_orchestrator_step(scenario: Scenario) -> Callable[[], object]:
+    clock = VirtualClock(start_time=1_700_000_000.0)
+    orchestrator = Orchestrator(
+        [VoltageSupport(StateMachine(clock=clock))], metrics=MetricsRegistry()
+    )
+    system_obs = make_system_obs(scenario, clock.time())
+
+    def step() -> None:
+        clock.advance(1.0)
+        # Les lois de contrôle écrivent sur la sortie standard
+        with contextlib.redirect_stdout(io.StringIO()):
+            orchestrator.step(system_obs)
+
+    return step
+
+
+def bench_send_commands(scenario: Scenario) -> Callable[[], object]:
+    drivers: List[Driver] = [
+        _NullDriver(EquipmentType.BESS, f"bess_{i}") for i in range(scenario.n_bess)
+    ] + [_NullDriver(EquipmentType.PV, f"pv_{i}") for i in range(scenario.n_pv)]
+    adapter = Adapter(drivers=drivers, server=_NullServer(), metrics=MetricsRegistry())
+    commands = [
+        Command(
+            pSp=1.0,
+            qSp=0.0,
+            equipment_type=driver.get_equipment_type(),
+            device_id=driver.get_device_id(),
+        )
+        for driver in drivers
+    ]
+    return lambda: adapter.send_commands(commands)
+
+
+def bench_update_holding_registers(scenario: Scenario) -> Callable[[], object]:
+    keys = project_keys(scenario.n_project_keys)
+    server = ModbusServer(
+        register_map=build_fleet_register_map(scenario.n_bess, scenario.n_pv, keys),
+        metrics=MetricsRegistry(),
+    )
+    # Deux snapshots alternés : chaque mise à jour réécrit réellement les registres
+    snapshots = [make_system_obs(scenario, 0.0), make_system_obs(scenario, 1.0)]
+    snapshots[1] = SystemObs(
+        bess=[Bess(p=b.p + 1, q=b.q, soc=b.soc, timestamp=1.0) for b in snapshots[1].bess],
+        pv=[Pv(p=p.p + 1, q=p.q, timestamp=1.0) for p in snapshots[1].pv],
+        project_data=snapshots[1].project_data,
+        project_data_index=snapshots[1].project_data_index,
+    )
+    counter = iter(range(sys.maxsize))
+
+    def update() -> None:
+        server.current_system_obs = snapshots[next(counter) % 2]
+        server._update_holding_registers()
+
+    return update
+
+
+BENCHMARKS: Dict[str, Setup] = {
+    "adapter.aggregate": bench_aggregate,
+    "system_obs.get_project_data": bench_get_project_data,
+    "system_obs.get_project_data_by_id": bench_get_project_data_by_id,
+    "database.save_system_obs": bench_database_save,
+    "orchestrator.step": bench_orchestrator_step,
+    "adapter.send_commands": bench_send_commands,
+    "modbus_server.update_holding_registers": bench_update_holding_registers,
+}
+
+
+def measure(
+    operation: Callable[[], object],
+    min_time: float,
+    max_iterations: int,
+    warmup: int,
+) -> List[float]:
+    """
+    Mesure une opération appel par appel.
+
+    Args:
+        operation: Opération à mesurer
+        min_time: Durée minimale de mesure (secondes)
+        max_iterations: Nombre maximal d'appels mesurés
+        warmup: Nombre d'appels non mesurés avant la mesure
+
+    Returns:
+        Durée de chaque appel (secondes)
+    """
+    for _ in range(warmup):
+        operation()
+
+    samples: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(samples) < max_iterations and (
+        len(samples) < 5 or time.perf_counter() < deadline
+    ):
+        start = time.perf_counter()
+        operation()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def summarize(name: str, scenario: Scenario, samples: List[float]) -> BenchmarkResult:
+    ordered = sorted(samples)
+
+    def percentile(q: float) -> float:
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    mean = sum(ordered) / len(ordered)
+    return BenchmarkResult(
+        name=name,
+        n_bess=scenario.n_bess,
+        n_pv=scenario.n_pv,
+        n_project_keys=scenario.n_project_keys,
+        iterations=len(ordered),
+        ops_per_second=1.0 / mean if mean > 0 else 0.0,
+        mean=mean,
+        p50=percentile(0.50),
+        p99=percentile(0.99),
+        min=ordered[0],
+        max=ordered[-1],
+    )
+
+
+def run(
+    scales: List[int],
+    n_project_keys: int,
+    names: Optional[List[str]] = None,
+    min_time: float = 0.5,
+    max_iterations: int = 10_000,
+    warmup: int = 10,
+) -> Iterator[BenchmarkResult]:
+    """
+    Exécute les benchmarks demandés à chaque échelle.
+
+    Args:
+        scales: Nombres de BESS (et de PV) à simuler
+        n_project_keys: Nombre de clés de projet
+        names: Benchmarks à exécuter (tous si None)
+        min_time: Durée minimale de mesure par benchmark et par échelle (secondes)
+        max_iterations: Nombre maximal d'appels mesurés
+        warmup: Nombre d'appels non mesurés
+
+    Yields:
+        BenchmarkResult par benchmark et par échelle
+    """
+    for name in names or list(BENCHMARKS):
+        setup = BENCHMARKS[name]
+        for scale in scales:
+            scenario = Scenario(n_bess=scale, n_pv=scale, n_project_keys=n_project_keys)
+            operation = setup(scenario)
+            samples = measure(operation, min_time, max_iterations, warmup)
+            yield summarize(name, scenario, samples)
+
+
+def _git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Benchmarks des chemins principaux du cycle")
+    parser.add_argument(
+        "--scales",
+        default="1,10,100,1000",
+        help="Nombres de BESS/PV, séparés par des virgules",
+    )
+    parser.add_argument("--project-keys", type=int, default=200)
+    parser.add_argument(
+        "--benchmarks",
+        default=None,
+        help=f"Benchmarks à exécuter, séparés par des virgules ({', '.join(BENCHMARKS)})",
+    )
+    parser.add_argument("--min-time", type=float, default=0.5)
+    parser.add_argument("--max-iterations", type=int, default=10_000)
+    parser.add_argument("--output", default=None, help="Fichier JSON (stdout par défaut)")
+    args = parser.parse_args(argv)
+
+    scales = [int(scale) for scale in args.scales.split(",")]
+    names = args.benchmarks.split(",") if args.benchmarks else None
+    for name in names or []:
+        if name not in BENCHMARKS:
+            parser.error(f"Benchmark inconnu: {name}")
+
+    results = []
+    for result in run(
+        scales, args.project_keys, names, args.min_time, args.max_iterations
+    ):
+        results.append(asdict(result))
+        print(
+            f"{result.name:<40} bess/pv={result.n_bess:<5} "
+            f"p50={result.p50 * 1e6:10.1f}us p99={result.p99 * 1e6:10.1f}us "
+            f"{result.ops_per_second:10.0f} op/s",
+            file=sys.stderr,
+        )
+
+    report = {
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "project_keys": args.project_keys,
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output is None:
+        print(output)
+    else:
+        Path(args.output).write_text(output + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,15 +1,21 @@
 import datamodel.standard_data as std_data
 import time
+from typing import Optional
 from communication.interface import Driver
+from core.clock import DEFAULT_CLOCK, Clock
 from datamodel.datamodel import SystemObs, Command, EquipmentType
 from keys.keys import Keys
 from datamodel.project_data import ProjectData
 
 
 class BessDriver(Driver):
+    def __init__(self, clock: Optional[Clock] = None):
+        self.clock = clock or DEFAULT_CLOCK
+
     def read(self) -> SystemObs:
-        current_second = time.localtime().tm_sec
-        bess = std_data.Bess(p=current_second, q=20, soc=50, timestamp=time.time())
+        now = self.clock.time()
+        current_second = time.localtime(now).tm_sec
+        bess = std_data.Bess(p=current_second, q=20, soc=50, timestamp=now)
 
         return SystemObs(
             bess=[bess],
@@ -17,7 +23,7 @@ class BessDriver(Driver):
                 ProjectData(
                     name=Keys.TEMPERATURE_BESS_KEY,
                     value=20.0,
-                    timestamp=time.time(),
+                    timestamp=now,
                 )
             ],
         )
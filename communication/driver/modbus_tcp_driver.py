@@ -0,0 +1,406 @@
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+
+from pymodbus.client import AsyncModbusTcpClient  # type: ignore
+
+import datamodel.standard_data as std_data
+from communication.interface import Driver
+from communication.modbus_codec import (
+    DataType,
+    FieldLayout,
+    decode_block,
+    encode_value,
+    register_count,
+)
+from core.clock import DEFAULT_CLOCK, Clock
+from core.dispatch import dispatch_fleet_command
+from datamodel.datamodel import SystemObs, Command, EquipmentType
+from datamodel.project_data import ProjectData
+from keys.registry import DEFAULT_KEY_REGISTRY
+
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximal de registres par requête de lecture (limite du protocole Modbus)
+MAX_REGISTERS_PER_READ = 125
+
+# Champs de mesure obligatoires par type d'équipement
+REQUIRED_MEASUREMENTS: dict[EquipmentType, set[str]] = {
+    EquipmentType.BESS: {"p", "q", "soc"},
+    EquipmentType.PV: {"p", "q"},
+}
+
+# Champs de mesure facultatifs par type d'équipement (None dans Bess/Pv s'ils ne sont pas lus)
+OPTIONAL_MEASUREMENTS: dict[EquipmentType, set[str]] = {
+    EquipmentType.BESS: {"capacity"},
+    EquipmentType.PV: set(),
+}
+
+
+@dataclass(frozen=True)
+class RegisterField:
+    """Valeur lue ou écrite dans les registres d'un équipement."""
+
+    name: str  # attribut de Bess/Pv (p, q, soc, capacity) ou clé de projet (Keys)
+    address: int
+    data_type: DataType = DataType.INT16
+    scale: float = 1.0  # valeur physique = valeur brute * scale
+    function_code: int = 3  # 3 : holding registers, 4 : input registers
+
+
+@dataclass(frozen=True)
+class DeviceRegisterMap:
+    """Table des registres d'un équipement."""
+
+    measurements: tuple[RegisterField, ...]  # champs de Bess/Pv
+    project_data: tuple[RegisterField, ...] = ()
+    p_setpoint: Optional[RegisterField] = None
+    q_setpoint: Optional[RegisterField] = None
+
+
+@dataclass(frozen=True)
+class ModbusDevice:
+    """Équipement Modbus TCP interrogé par le driver."""
+
+    device_id: str
+    host: str
+    register_map: DeviceRegisterMap
+    port: int = 502
+    unit_id: int = 1
+
+
+@dataclass(frozen=True)
+class ReadBlock:
+    """Requête de lecture d'une plage de registres contigus."""
+
+    function_code: int
+    address: int
+    count: int
+    fields: tuple[RegisterField, ...]
+    layouts: tuple[FieldLayout, ...]
+
+
+def plan_block_reads(
+    fields: Sequence[RegisterField],
+    max_gap: int = 8,
+    max_block_size: int = MAX_REGISTERS_PER_READ,
+) -> list[ReadBlock]:
+    """
+    Regroupe les registres en un minimum de requêtes de lecture.
+    Deux champs sont lus dans la même requête s'ils utilisent le même code fonction,
+    sont séparés d'au plus max_gap registres inutilisés et que le bloc ne dépasse
+    pas max_block_size registres.
+
+    Args:
+        fields: Champs à lire
+        max_gap: Nombre maximal de registres inutilisés lus entre deux champs
+        max_block_size: Taille maximale d'un bloc (registres)
+
+    Returns:
+        Blocs de lecture, avec la position de chaque champ dans son bloc
+    """
+    blocks: list[ReadBlock] = []
+    ordered = sorted(fields, key=lambda f: (f.function_code, f.address))
+
+    current: list[RegisterField] = []
+    start = end = 0
+    for field_info in ordered:
+        field_end = field_info.address + register_count(field_info.data_type)
+        if (
+            current
+            and field_info.function_code == current[0].function_code
+            and field_info.address - end <= max_gap
+            and max(end, field_end) - start <= max_block_size
+        ):
+            current.append(field_info)
+            end = max(end, field_end)
+            continue
+
+        if current:
+            blocks.append(_make_block(current, start, end))
+        current = [field_info]
+        start, end = field_info.address, field_end
+
+    if current:
+        blocks.append(_make_block(current, start, end))
+    return blocks
+
+
+def _make_block(fields: list[RegisterField], start: int, end: int) -> ReadBlock:
+    return ReadBlock(
+        function_code=fields[0].function_code,
+        address=start,
+        count=end - start,
+        fields=tuple(fields),
+        layouts=tuple(
+            FieldLayout(f.address - start, f.data_type, f.scale) for f in fields
+        ),
+    )
+
+
+class _DeviceConnection:
+    """Connexion persistante et plan de lecture précompilé d'un équipement."""
+
+    def __init__(self, device: ModbusDevice, timeout: float, max_gap: int):
+        self.device = device
+        self.client = AsyncModbusTcpClient(
+            device.host, port=device.port, timeout=timeout
+        )
+        register_map = device.register_map
+        self.measurement_names = {f.name for f in register_map.measurements}
+        # Données de projet lues : (nom, identifiant de clé), résolus une seule fois
+        self.project_keys = tuple(
+            (f.name, DEFAULT_KEY_REGISTRY.register(f.name))
+            for f in register_map.project_data
+        )
+        self.blocks = plan_block_reads(
+            register_map.measurements + register_map.project_data, max_gap=max_gap
+        )
+
+    async def ensure_connected(self) -> None:
+        if not self.client.connected:
+            await self.client.connect()
+            if not self.client.connected:
+                raise ConnectionError(
+                    f"Connexion impossible à {self.device.host}:{self.device.port}"
+                )
+
+    async def read(self) -> dict[str, float]:
+        """Lit tous les blocs de l'équipement et retourne les valeurs décodées par nom."""
+        await self.ensure_connected()
+        values: dict[str, float] = {}
+        for block in self.blocks:
+            if block.function_code == 4:
+                response = await self.client.read_input_registers(
+                    block.address, count=block.count, slave=self.device.unit_id
+                )
+            else:
+                response = await self.client.read_holding_registers(
+                    block.address, count=block.count, slave=self.device.unit_id
+                )
+            if response.isError():
+                raise IOError(f"Réponse Modbus en erreur: {response}")
+            decoded = decode_block(response.registers, block.layouts)
+            for field_info, value in zip(block.fields, decoded):
+                values[field_info.name] = value
+        return values
+
+    async def write(self, values: Sequence[tuple[RegisterField, float]]) -> None:
+        """
+        Écrit des valeurs dans les registres de l'équipement : les champs contigus
+        sont écrits ensemble, en une seule requête write_registers.
+
+        Args:
+            values: Couples (champ, valeur physique)
+        """
+        await self.ensure_connected()
+        for address, registers in _contiguous_writes(values):
+            response = await self.client.write_registers(
+                address, registers, slave=self.device.unit_id
+            )
+            if response.isError():
+                raise IOError(f"Réponse Modbus en erreur: {response}")
+
+
+def _contiguous_writes(
+    values: Sequence[tuple[RegisterField, float]],
+) -> list[tuple[int, list[int]]]:
+    """
+    Encode des valeurs et regroupe les champs contigus en plages de registres.
+
+    Args:
+        values: Couples (champ, valeur physique)
+
+    Returns:
+        Plages (adresse de début, registres) triées par adresse
+    """
+    writes: list[tuple[int, list[int]]] = []
+    for field_info, value in sorted(values, key=lambda item: item[0].address):
+        registers = encode_value(value, field_info.data_type, field_info.scale)
+        if writes and writes[-1][0] + len(writes[-1][1]) == field_info.address:
+            writes[-1][1].extend(registers)
+        else:
+            writes.append((field_info.address, registers))
+    return writes
+
+
+class ModbusTcpDriver(Driver):
+    """
+    Driver Modbus TCP asynchrone pour une flotte d'équipements de même type.
+
+    Chaque équipement a sa connexion persistante. Ses registres sont regroupés en
+    un minimum de blocs contigus, lus en une requête chacun puis décodés en une passe.
+    Tous les équipements sont interrogés en parallèle sur une boucle asyncio dédiée :
+    la durée d'une lecture est celle de l'équipement le plus lent, et non la somme.
+    """
+
+    def __init__(
+        self,
+        devices: List[ModbusDevice],
+        equipment_type: EquipmentType,
+        timeout: float = 1.0,
+        max_gap: int = 8,
+        clock: Optional[Clock] = None,
+        dispatch_weights: Optional[Dict[str, float]] = None,
+    ):
+        """
+        Initialise le driver.
+
+        Args:
+            devices: Équipements à interroger
+            equipment_type: Type des équipements (BESS ou PV)
+            timeout: Délai maximal d'une lecture ou écriture par équipement (secondes)
+            max_gap: Nombre maximal de registres inutilisés lus pour fusionner deux blocs
+            clock: Source de temps des horodatages (horloge système par défaut)
+            dispatch_weights: Poids de répartition par device_id d'une commande sans
+                              device_id (parts égales par défaut, voir dispatch_fleet_command)
+        """
+        for device in devices:
+            names = {f.name for f in device.register_map.measurements}
+            required = REQUIRED_MEASUREMENTS[equipment_type]
+            if not required <= names <= required | OPTIONAL_MEASUREMENTS[equipment_type]:
+                raise ValueError(
+                    f"Mesures de {device.device_id} incompatibles avec "
+                    f"{equipment_type.value}: {sorted(names)}"
+                )
+
+        self.devices = devices
+        self.equipment_type = equipment_type
+        self.timeout = timeout
+        self._max_gap = max_gap
+        self.clock = clock or DEFAULT_CLOCK
+        self.dispatch_weights: Dict[str, float] = dispatch_weights or {}
+
+        # Boucle asyncio dédiée, partagée par toutes les connexions du driver
+        self._loop = asyncio.new_event_loop()
+        self._loop_thread = threading.Thread(
+            target=self._loop.run_forever, name="modbus-tcp-driver", daemon=True
+        )
+        self._loop_thread.start()
+        self._connections = self._run(self._create_connections())
+
+    def read(self) -> SystemObs:
+        results = self._run(self._read_all())
+
+        bess: list[std_data.Bess] = []
+        pv: list[std_data.Pv] = []
+        project_data: list[ProjectData] = []
+        timestamp = self.clock.time()
+
+        for connection, values in zip(self._connections, results):
+            if isinstance(values, BaseException):
+                logger.error(
+                    f"Erreur de lecture de l'équipement {connection.device.device_id}: "
+                    f"{values}"
+                )
+                continue
+
+            measurements = {
+                name: value
+                for name, value in values.items()
+                if name in connection.measurement_names
+            }
+            if self.equipment_type == EquipmentType.BESS:
+                bess.append(std_data.Bess(timestamp=timestamp, **measurements))
+            else:
+                pv.append(std_data.Pv(timestamp=timestamp, **measurements))
+
+            for name, key_id in connection.project_keys:
+                project_data.append(
+                    ProjectData(
+                        name=name,
+                        value=values[name],
+                        timestamp=timestamp,
+                        key_id=key_id,
+                    )
+                )
+
+        return SystemObs(bess=bess, pv=pv, project_data=project_data)
+
+    def write(self, command: Command):
+        self.write_batch([command])
+
+    def write_batch(self, commands: List[Command]):
+        # Dernière consigne par équipement : une commande sans device_id est répartie
+        # entre les équipements de la flotte
+        device_ids = self.get_device_ids()
+        setpoints: dict[Optional[str], Command] = {}
+        for command in commands:
+            for share in dispatch_fleet_command(command, device_ids, self.dispatch_weights):
+                setpoints[share.device_id] = share
+
+        results = self._run(self._write_all(setpoints))
+        errors = [result for result in results if isinstance(result, BaseException)]
+        for error in errors:
+            logger.error(f"Erreur d'écriture Modbus: {error}")
+        if errors:
+            # Signalé à l'Adapter : les consignes seront retransmises au cycle suivant
+            raise IOError(
+                f"Écriture Modbus en échec sur {len(errors)} équipement(s) "
+                f"sur {len(results)}"
+            )
+
+    def get_equipment_type(self) -> EquipmentType:
+        return self.equipment_type
+
+    def get_device_ids(self) -> List[str]:
+        return [device.device_id for device in self.devices]
+
+    def close(self) -> None:
+        """Ferme les connexions (sur la boucle du driver) et arrête la boucle asyncio."""
+        future = asyncio.run_coroutine_threadsafe(self._close_connections(), self._loop)
+        try:
+            future.result(timeout=self.timeout)
+        except Exception as e:
+            logger.error(f"Erreur à la fermeture des connexions Modbus: {e}")
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop_thread.join(timeout=2.0)
+
+    def _run(self, coroutine: Any) -> Any:
+        """Exécute une coroutine sur la boucle du driver et attend son résultat."""
+        return asyncio.run_coroutine_threadsafe(coroutine, self._loop).result()
+
+    async def _create_connections(self) -> list[_DeviceConnection]:
+        # Les clients pymodbus doivent être créés dans la boucle qui les utilise
+        return [
+            _DeviceConnection(device, self.timeout, self._max_gap)
+            for device in self.devices
+        ]
+
+    async def _close_connections(self) -> None:
+        # Les clients pymodbus ne sont pas thread-safe : fermés dans leur boucle
+        for connection in self._connections:
+            connection.client.close()
+
+    async def _read_all(self) -> list[Any]:
+        return await asyncio.gather(
+            *(
+                asyncio.wait_for(connection.read(), self.timeout)
+                for connection in self._connections
+            ),
+            return_exceptions=True,
+        )
+
+    async def _write_all(self, setpoints: dict[Optional[str], Command]) -> list[Any]:
+        writes = []
+        for connection in self._connections:
+            command = setpoints.get(connection.device.device_id)
+            if command is None:
+                continue
+            writes.append(
+                asyncio.wait_for(self._write_device(connection, command), self.timeout)
+            )
+        return await asyncio.gather(*writes, return_exceptions=True)
+
+    async def _write_device(self, connection: _DeviceConnection, command: Command):
+        register_map = connection.device.register_map
+        values: list[tuple[RegisterField, float]] = []
+        if register_map.p_setpoint is not None and command.pSp is not None:
+            values.append((register_map.p_setpoint, command.pSp))
+        if register_map.q_setpoint is not None:
+            values.append((register_map.q_setpoint, command.qSp))
+        # pSp et qSp en une seule requête si leurs registres sont contigus
+        await connection.write(values)
@@ -1,23 +1,26 @@
 import datamodel.standard_data as std_data
-import time
+from typing import Optional
 from communication.interface import Driver
+from core.clock import DEFAULT_CLOCK, Clock
 from datamodel.datamodel import SystemObs, Command, EquipmentType
 from keys.keys import Keys
 from datamodel.project_data import ProjectData
 
 
 class PvDriver(Driver):
-    def __init__(self):
+    def __init__(self, clock: Optional[Clock] = None):
         self.n = 0
+        self.clock = clock or DEFAULT_CLOCK
 
     def read(self) -> SystemObs:
         self.n += 1
-        pv = std_data.Pv(p=self.n, q=self.n * 10, timestamp=time.time())
+        now = self.clock.time()
+        pv = std_data.Pv(p=self.n, q=self.n * 10, timestamp=now)
         return SystemObs(
             pv=[pv],
             project_data=[
                 ProjectData(
-                    name=Keys.IRRADIANCE_KEY, value=1000.0, timestamp=time.time()
+                    name=Keys.IRRADIANCE_KEY, value=1000.0, timestamp=now
                 )
             ],
         )
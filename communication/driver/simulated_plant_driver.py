@@ -0,0 +1,317 @@
+import logging
+import math
+import random
+import threading
+from abc import abstractmethod
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional
+
+import datamodel.standard_data as std_data
+from communication.interface import Driver
+from core.clock import DEFAULT_CLOCK, Clock
+from core.dispatch import dispatch_fleet_command
+from datamodel.datamodel import SystemObs, Command, EquipmentType
+
+
+logger = logging.getLogger(__name__)
+
+# Pas maximal d'intégration de la physique (secondes)
+MAX_INTEGRATION_STEP = 1.0
+
+
+class SimulatedDeviceError(IOError):
+    """Erreur de communication injectée sur un équipement simulé."""
+
+
+@dataclass
+class FaultProfile:
+    """Défauts de communication injectés à chaque lecture et écriture d'un équipement."""
+
+    latency: float = 0.0  # délai fixe (secondes)
+    jitter: float = 0.0  # délai aléatoire supplémentaire, uniforme dans [0, jitter] (secondes)
+    timeout_rate: float = 0.0  # probabilité qu'un appel reste bloqué timeout_duration
+    timeout_duration: float = 5.0  # durée d'un appel bloqué (secondes)
+    error_rate: float = 0.0  # probabilité qu'un appel lève SimulatedDeviceError
+
+
+@dataclass(frozen=True)
+class BessUnitConfig:
+    """Caractéristiques d'un BESS simulé (P > 0 : décharge)."""
+
+    p_max: float = 100.0  # kW
+    q_max: float = 50.0  # kvar
+    capacity: float = 200.0  # kWh
+    ramp_rate: float = 20.0  # kW/s et kvar/s
+    initial_soc: float = 50.0  # %
+
+
+@dataclass(frozen=True)
+class PvUnitConfig:
+    """Caractéristiques d'un onduleur PV simulé."""
+
+    p_peak: float = 100.0  # kW
+    q_max: float = 50.0  # kvar
+    ramp_rate: float = 20.0  # kW/s et kvar/s
+    # Fraction de p_peak disponible en fonction de l'heure murale (1.0 si None)
+    availability: Optional[Callable[[float], float]] = None
+
+
+def _ramp(value: float, target: float, max_delta: float) -> float:
+    """Rapproche value de target d'au plus max_delta."""
+    return value + max(-max_delta, min(max_delta, target - value))
+
+
+class _SimulatedUnitDriver(Driver):
+    """
+    Base des drivers d'équipements simulés : horloge, défauts injectés et intégration
+    de la physique à chaque accès, sur le temps écoulé depuis l'accès précédent.
+    Chaque driver simule un seul équipement : une consigne de flotte est répartie
+    en amont par l'Adapter (dispatch_fleet_command), chaque driver reçoit sa part.
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        clock: Clock,
+        faults: Optional[FaultProfile],
+        seed: Optional[int],
+    ):
+        self.device_id = device_id
+        self.clock = clock
+        self.faults = faults or FaultProfile()
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._last_update = clock.monotonic()
+        self.p = 0.0
+        self.q = 0.0
+        self.p_setpoint = 0.0
+        self.q_setpoint = 0.0
+
+    def read(self) -> SystemObs:
+        self._inject_faults("de lecture")
+        with self._lock:
+            self._integrate()
+            return self._measure(self.clock.time())
+
+    def write(self, command: Command):
+        self._inject_faults("d'écriture")
+        # Flotte d'un seul équipement : une commande sans device_id lui revient entière
+        (setpoint,) = dispatch_fleet_command(command, [self.device_id])
+        with self._lock:
+            self._integrate()
+            self._apply(setpoint)
+
+    def get_device_id(self) -> Optional[str]:
+        return self.device_id
+
+    def _inject_faults(self, operation: str) -> None:
+        faults = self.faults
+        delay = faults.latency + (
+            self._random.uniform(0.0, faults.jitter) if faults.jitter > 0 else 0.0
+        )
+        if faults.timeout_rate > 0 and self._random.random() < faults.timeout_rate:
+            delay += faults.timeout_duration
+        if delay > 0:
+            self.clock.sleep(delay)
+        if faults.error_rate > 0 and self._random.random() < faults.error_rate:
+            raise SimulatedDeviceError(
+                f"Erreur {operation} simulée sur l'équipement {self.device_id}"
+            )
+
+    def _integrate(self) -> None:
+        """Intègre la physique jusqu'à l'instant présent, par pas d'au plus MAX_INTEGRATION_STEP."""
+        now = self.clock.monotonic()
+        elapsed = now - self._last_update
+        self._last_update = now
+        if elapsed <= 0:
+            return
+        steps = math.ceil(elapsed / MAX_INTEGRATION_STEP)
+        dt = elapsed / steps
+        for _ in range(steps):
+            self._step(dt)
+
+    def _apply(self, setpoint: Command) -> None:
+        """Enregistre les consignes reçues (appelé sous le verrou)."""
+        if setpoint.pSp is not None:
+            self.p_setpoint = setpoint.pSp
+        self.q_setpoint = setpoint.qSp
+
+    @abstractmethod
+    def _step(self, dt: float) -> None:
+        """Fait évoluer l'équipement sur un pas de dt secondes (appelé sous le verrou)."""
+
+    @abstractmethod
+    def _measure(self, timestamp: float) -> SystemObs:
+        """Mesures courantes de l'équipement (appelé sous le verrou)."""
+
+
+class SimulatedBessDriver(_SimulatedUnitDriver):
+    """
+    BESS simulé : P et Q rampent vers les consignes (limitées à p_max/q_max),
+    le SOC est intégré à partir de P. La décharge s'arrête à 0 %, la charge à 100 %.
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        config: BessUnitConfig = BessUnitConfig(),
+        clock: Optional[Clock] = None,
+        faults: Optional[FaultProfile] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(device_id, clock or DEFAULT_CLOCK, faults, seed)
+        self.config = config
+        self.soc = config.initial_soc
+
+    def get_equipment_type(self) -> EquipmentType:
+        return EquipmentType.BESS
+
+    def _step(self, dt: float) -> None:
+        config = self.config
+        p_target = max(-config.p_max, min(config.p_max, self.p_setpoint))
+        if self.soc <= 0.0:
+            p_target = min(p_target, 0.0)
+        elif self.soc >= 100.0:
+            p_target = max(p_target, 0.0)
+        q_target = max(-config.q_max, min(config.q_max, self.q_setpoint))
+
+        p_previous = self.p
+        self.p = _ramp(self.p, p_target, config.ramp_rate * dt)
+        self.q = _ramp(self.q, q_target, config.ramp_rate * dt)
+
+        # Énergie échangée sur le pas (puissance moyenne), en % de la capacité
+        energy = (p_previous + self.p) / 2 * dt / 3600.0
+        self.soc = max(0.0, min(100.0, self.soc - energy / config.capacity * 100.0))
+
+    def _measure(self, timestamp: float) -> SystemObs:
+        return SystemObs(
+            bess=[
+                std_data.Bess(
+                    p=self.p,
+                    q=self.q,
+                    soc=self.soc,
+                    timestamp=timestamp,
+                    capacity=self.config.capacity,
+                )
+            ]
+        )
+
+
+class SimulatedPvDriver(_SimulatedUnitDriver):
+    """
+    Onduleur PV simulé : P rampe vers la puissance disponible, limitée par la consigne
+    de P si une limite de P a été reçue (écrêtement) ; Q rampe vers sa consigne.
+    Une commande de Q seule (pSp None) ne modifie pas la limite de P.
+    """
+
+    def __init__(
+        self,
+        device_id: str,
+        config: PvUnitConfig = PvUnitConfig(),
+        clock: Optional[Clock] = None,
+        faults: Optional[FaultProfile] = None,
+        seed: Optional[int] = None,
+    ):
+        super().__init__(device_id, clock or DEFAULT_CLOCK, faults, seed)
+        self.config = config
+        self.curtailed = False
+
+    def _apply(self, setpoint: Command) -> None:
+        super()._apply(setpoint)
+        if setpoint.pSp is not None:
+            self.curtailed = True
+
+    def get_equipment_type(self) -> EquipmentType:
+        return EquipmentType.PV
+
+    def _step(self, dt: float) -> None:
+        config = self.config
+        availability = (
+            1.0 if config.availability is None else config.availability(self.clock.time())
+        )
+        p_target = config.p_peak * max(0.0, min(1.0, availability))
+        if self.curtailed:
+            p_target = min(p_target, max(0.0, self.p_setpoint))
+        q_target = max(-config.q_max, min(config.q_max, self.q_setpoint))
+
+        self.p = _ramp(self.p, p_target, config.ramp_rate * dt)
+        self.q = _ramp(self.q, q_target, config.ramp_rate * dt)
+
+    def _measure(self, timestamp: float) -> SystemObs:
+        return SystemObs(pv=[std_data.Pv(p=self.p, q=self.q, timestamp=timestamp)])
+
+
+class SimulatedPlant:
+    """
+    Centrale simulée de N BESS et M PV, un driver par équipement.
+    Remplace les équipements réels pour tester Application à l'échelle d'une flotte :
+    chaque équipement peut recevoir ses propres défauts (latence, gigue, blocages, erreurs),
+    et les délais de lecture par driver de l'Adapter s'appliquent équipement par équipement.
+    """
+
+    def __init__(
+        self,
+        n_bess: int,
+        n_pv: int,
+        bess_config: BessUnitConfig = BessUnitConfig(),
+        pv_config: PvUnitConfig = PvUnitConfig(),
+        faults: Optional[Dict[str, FaultProfile]] = None,
+        clock: Optional[Clock] = None,
+        seed: int = 0,
+    ):
+        """
+        Initialise la centrale.
+
+        Args:
+            n_bess: Nombre de BESS (identifiants bess_0, bess_1...)
+            n_pv: Nombre d'onduleurs PV (identifiants pv_0, pv_1...)
+            bess_config: Caractéristiques de chaque BESS
+            pv_config: Caractéristiques de chaque onduleur PV
+            faults: Défauts injectés par identifiant d'équipement
+            clock: Source de temps de la physique et des délais injectés
+            seed: Graine des tirages aléatoires (défauts reproductibles)
+        """
+        clock = clock or DEFAULT_CLOCK
+        faults = faults or {}
+        self.bess_drivers = [
+            SimulatedBessDriver(
+                f"bess_{i}",
+                bess_config,
+                clock=clock,
+                faults=faults.get(f"bess_{i}"),
+                seed=seed + i,
+            )
+            for i in range(n_bess)
+        ]
+        self.pv_drivers = [
+            SimulatedPvDriver(
+                f"pv_{i}",
+                pv_config,
+                clock=clock,
+                faults=faults.get(f"pv_{i}"),
+                seed=seed + n_bess + i,
+            )
+            for i in range(n_pv)
+        ]
+        self._by_id: Dict[str, _SimulatedUnitDriver] = {
+            driver.device_id: driver for driver in self.bess_drivers + self.pv_drivers
+        }
+        for device_id in faults:
+            if device_id not in self._by_id:
+                raise ValueError(f"Équipement simulé inconnu: {device_id}")
+
+    @property
+    def drivers(self) -> List[Driver]:
+        """Drivers de tous les équipements, à passer à Application."""
+        return [*self.bess_drivers, *self.pv_drivers]
+
+    def set_faults(self, device_id: str, faults: FaultProfile) -> None:
+        """
+        Modifie les défauts injectés sur un équipement en cours de simulation.
+
+        Args:
+            device_id: Identifiant de l'équipement
+            faults: Nouveaux défauts
+        """
+        self._by_id[device_id].faults = faults
+        logger.info(f"Défauts simulés sur {device_id}: {faults}")
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
+from typing import Callable, Dict, List, Optional
 from datamodel.datamodel import SystemObs, Command, EquipmentType
+from datamodel.project_data import ProjectData
+from monitoring.metrics import StageStats
 
 
 class Driver(ABC):
@@ -15,6 +18,20 @@ class Driver(ABC):
     def get_equipment_type(self) -> EquipmentType:
         pass
 
+    def get_device_id(self) -> Optional[str]:  # identifiant de l'équipement, si adressable
+        return None
+
+    def get_device_ids(self) -> List[str]:  # équipements servis (plusieurs pour une flotte)
+        device_id = self.get_device_id()
+        return [] if device_id is None else [device_id]
+
+    def write_batch(self, commands: List[Command]):  # plusieurs commandes en un appel
+        for command in commands:
+            self.write(command)
+
+    def close(self) -> None:  # libère les connexions, appelé à l'arrêt de l'application
+        pass
+
 
 class Server(ABC):
     @abstractmethod
@@ -28,3 +45,18 @@ class Server(ABC):
         self,
     ) -> SystemObs:  # remplit le SystemObs avec les données du serveur
         pass
+
+    def publish_metrics(
+        self, stats: Dict[str, StageStats]
+    ):  # expose les durées d'étapes du cycle (optionnel)
+        pass
+
+    def set_write_listener(
+        self, listener: Optional[Callable[[], None]]
+    ):  # appelé à chaque écriture client à transmettre au pipeline (optionnel)
+        pass
+
+    def take_new_data(
+        self,
+    ) -> List[ProjectData]:  # données reçues depuis l'appel précédent, à enregistrer
+        return list(self.fill_system_obs().project_data)
@@ -0,0 +1,148 @@
+import struct
+from dataclasses import dataclass
+from enum import Enum
+from typing import Sequence
+
+
+class DataType(Enum):
+    """Encodage d'une valeur dans un ou plusieurs registres Modbus (mot de poids fort en premier)."""
+
+    INT16 = "int16"
+    UINT16 = "uint16"
+    INT32 = "int32"
+    UINT32 = "uint32"
+    FLOAT32 = "float32"
+
+
+# Format struct (big-endian) et nombre de registres de chaque type
+_STRUCT_FORMATS: dict[DataType, str] = {
+    DataType.INT16: "h",
+    DataType.UINT16: "H",
+    DataType.INT32: "i",
+    DataType.UINT32: "I",
+    DataType.FLOAT32: "f",
+}
+_STRUCTS: dict[DataType, struct.Struct] = {
+    data_type: struct.Struct(">" + fmt) for data_type, fmt in _STRUCT_FORMATS.items()
+}
+_INTEGER_RANGES: dict[DataType, tuple[int, int]] = {
+    DataType.INT16: (-0x8000, 0x7FFF),
+    DataType.UINT16: (0, 0xFFFF),
+    DataType.INT32: (-0x80000000, 0x7FFFFFFF),
+    DataType.UINT32: (0, 0xFFFFFFFF),
+}
+
+
+def register_count(data_type: DataType) -> int:
+    """Nombre de registres de 16 bits occupés par une valeur du type donné."""
+    return _STRUCTS[data_type].size // 2
+
+
+@dataclass(frozen=True)
+class FieldLayout:
+    """Position d'une valeur dans un bloc de registres."""
+
+    offset: int  # en registres, depuis le début du bloc
+    data_type: DataType
+    scale: float = 1.0  # valeur physique = valeur brute * scale
+
+
+def decode_block(
+    registers: Sequence[int], layouts: Sequence[FieldLayout]
+) -> list[float]:
+    """
+    Décode en une passe plusieurs valeurs d'un bloc de registres contigus.
+
+    Args:
+        registers: Registres du bloc (entiers 16 bits)
+        layouts: Position, type et facteur d'échelle de chaque valeur
+
+    Returns:
+        Valeurs physiques, dans l'ordre de layouts
+    """
+    buffer = struct.pack(f">{len(registers)}H", *registers)
+    return [
+        _STRUCTS[layout.data_type].unpack_from(buffer, layout.offset * 2)[0]
+        * layout.scale
+        for layout in layouts
+    ]
+
+
+def encode_value(value: float, data_type: DataType, scale: float = 1.0) -> list[int]:
+    """
+    Encode une valeur physique en registres.
+    Les types entiers sont arrondis puis saturés aux bornes du type.
+
+    Args:
+        value: Valeur physique
+        data_type: Encodage cible
+        scale: Facteur d'échelle (valeur brute = valeur / scale)
+
+    Returns:
+        Registres (entiers 16 bits non signés), mot de poids fort en premier
+    """
+    raw: float = value / scale
+    packer = _STRUCTS[data_type]
+    if data_type in _INTEGER_RANGES:
+        low, high = _INTEGER_RANGES[data_type]
+        packed = packer.pack(min(high, max(low, round(raw))))
+    else:
+        packed = packer.pack(raw)
+    return list(struct.unpack(f">{len(packed) // 2}H", packed))
+
+
+class BlockEncoder:
+    """
+    Encodeur précompilé d'un bloc de registres contigus.
+    Toutes les valeurs du bloc sont encodées en un seul appel struct ;
+    les registres non décrits valent 0.
+    """
+
+    def __init__(self, length: int, layouts: Sequence[FieldLayout]):
+        """
+        Initialise l'encodeur.
+
+        Args:
+            length: Taille du bloc (registres)
+            layouts: Position, type et facteur d'échelle de chaque valeur, sans chevauchement
+        """
+        self.length = length
+        self.layouts = tuple(sorted(layouts, key=lambda layout: layout.offset))
+        # Ordre de remise des valeurs (celui de layouts) vers l'ordre des offsets
+        self._order = sorted(range(len(layouts)), key=lambda i: layouts[i].offset)
+
+        fmt = ">"
+        position = 0
+        for layout in self.layouts:
+            if layout.offset < position:
+                raise ValueError(f"Chevauchement de registres à l'offset {layout.offset}")
+            fmt += "xx" * (layout.offset - position) + _STRUCT_FORMATS[layout.data_type]
+            position = layout.offset + register_count(layout.data_type)
+        if position > length:
+            raise ValueError(f"Bloc de {length} registres trop court ({position})")
+        fmt += "xx" * (length - position)
+
+        self._struct = struct.Struct(fmt)
+        self._words = struct.Struct(f">{length}H")
+        self._bounds = [
+            _INTEGER_RANGES.get(layout.data_type) for layout in self.layouts
+        ]
+
+    def encode(self, values: Sequence[float]) -> list[int]:
+        """
+        Encode les valeurs physiques du bloc.
+
+        Args:
+            values: Valeurs dans l'ordre des layouts fournis au constructeur
+
+        Returns:
+            Registres du bloc (entiers 16 bits non signés)
+        """
+        raw: list[float | int] = []
+        for i, layout, bounds in zip(self._order, self.layouts, self._bounds):
+            value = values[i] / layout.scale
+            if bounds is not None:
+                raw.append(min(bounds[1], max(bounds[0], round(value))))
+            else:
+                raw.append(value)
+        return list(self._words.unpack(self._struct.pack(*raw)))
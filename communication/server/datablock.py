@@ -0,0 +1,235 @@
+import threading
+from array import array
+from bisect import bisect_right
+from typing import Callable, Optional, Sequence
+
+from pymodbus.datastore.store import BaseModbusDataBlock  # type: ignore
+
+from core.clock import DEFAULT_CLOCK, Clock
+
+
+# Type des tampons de registres : entiers 16 bits non signés, stockés de façon contiguë
+REGISTER_TYPECODE = "H"
+
+
+def merge_segments(
+    ranges: Sequence[tuple[int, int]], max_gap: int = 0
+) -> list[tuple[int, int]]:
+    """
+    Fusionne des plages de registres qui se chevauchent ou sont voisines.
+
+    Args:
+        ranges: Plages (adresse de début, nombre de registres)
+        max_gap: Nombre maximal de registres non décrits inclus pour fusionner deux plages
+
+    Returns:
+        Plages disjointes triées par adresse
+    """
+    merged: list[tuple[int, int]] = []
+    for start, count in sorted(ranges):
+        if merged and start <= merged[-1][0] + merged[-1][1] + max_gap:
+            previous_start, previous_count = merged[-1]
+            end = max(previous_start + previous_count, start + count)
+            merged[-1] = (previous_start, end - previous_start)
+        else:
+            merged.append((start, count))
+    return merged
+
+
+class DoubleBufferedDataBlock(BaseModbusDataBlock):  # type: ignore
+    """
+    Bloc de registres Modbus à double tampon.
+
+    Les registres sont stockés dans des array('H') contigus, un par segment : les
+    lectures et écritures en masse sont des copies de tranches. Par défaut le bloc
+    est un segment unique ; avec des segments épars, seules les plages déclarées
+    sont allouées et les autres adresses sont refusées aux clients.
+
+    Les clients Modbus lisent le tampon publié sans prendre de verrou. Le contrôleur
+    publie ses mises à jour (publish) : seules les plages qui diffèrent du tampon
+    courant sont recopiées dans un nouveau tampon, qui remplace l'ancien par une
+    affectation atomique. Un client voit donc toujours un état
+    complet et cohérent, quelle que soit la fréquence de publication.
+    Les écritures des clients (setValues) sont sérialisées avec les publications.
+    """
+
+    def __init__(
+        self,
+        address: int = 0,
+        count: int = 0,
+        segments: Optional[Sequence[tuple[int, int]]] = None,
+    ):
+        """
+        Initialise le bloc à 0.
+
+        Args:
+            address: Adresse du premier registre du bloc (bloc dense)
+            count: Nombre de registres (bloc dense)
+            segments: Plages (adresse de début, nombre de registres) allouées ;
+                      remplacent address/count si fournies (bloc épars)
+        """
+        layout = merge_segments(segments) if segments is not None else [(address, count)]
+        self.address = layout[0][0] if layout else address
+        self.default_value = 0
+        self._starts = [start for start, _ in layout]
+        self._ends = [start + count for start, count in layout]
+        self._buffers: tuple[array, ...] = tuple(
+            array(REGISTER_TYPECODE, bytes(2 * count)) for _, count in layout
+        )
+        self._write_lock = threading.Lock()
+
+    @property
+    def values(self) -> dict[int, int]:  # type: ignore
+        """Valeurs de tous les registres alloués, par adresse (diagnostic)."""
+        buffers = self._buffers
+        return {
+            start + offset: value
+            for start, buffer in zip(self._starts, buffers)
+            for offset, value in enumerate(buffer)
+        }
+
+    @property
+    def size(self) -> int:
+        """Nombre de registres alloués."""
+        return sum(len(buffer) for buffer in self._buffers)
+
+    def validate(self, address: int, count: int = 1) -> bool:
+        return self._locate(address, count) is not None
+
+    def getValues(self, address: int, count: int = 1) -> list[int]:
+        buffers = self._buffers  # référence locale : les tampons peuvent être remplacés
+        index = self._locate(address, count)
+        if index is not None:
+            offset = address - self._starts[index]
+            return buffers[index][offset : offset + count].tolist()
+
+        # Plage à cheval sur plusieurs segments : registres non alloués à 0
+        result = [self.default_value] * count
+        for start, end, buffer in zip(self._starts, self._ends, buffers):
+            low, high = max(start, address), min(end, address + count)
+            if low < high:
+                result[low - address : high - address] = buffer[
+                    low - start : high - start
+                ].tolist()
+        return result
+
+    def setValues(self, address: int, values: Sequence[int] | int) -> None:
+        if not isinstance(values, (list, tuple)):
+            values = [values]  # type: ignore
+        index = self._require_segment(address, len(values))  # type: ignore
+        offset = address - self._starts[index]
+        with self._write_lock:
+            self._buffers[index][offset : offset + len(values)] = array(  # type: ignore
+                REGISTER_TYPECODE, values  # type: ignore
+            )
+
+    def reset(self) -> None:
+        with self._write_lock:
+            self._buffers = tuple(
+                array(REGISTER_TYPECODE, bytes(2 * len(buffer)))
+                for buffer in self._buffers
+            )
+
+    def publish(self, blocks: Sequence[tuple[int, list[int]]]) -> int:
+        """
+        Publie un ensemble de plages de registres en une seule permutation de tampon.
+        Chaque plage est comparée au contenu courant du tampon (et non à la dernière
+        publication) : une valeur écrasée par un client est rétablie à la publication
+        suivante.
+
+        Args:
+            blocks: Liste de (adresse de début, valeurs) produites par le contrôleur
+
+        Returns:
+            Nombre de registres des plages réécrites (différentes du tampon courant)
+        """
+        # Conversion hors verrou
+        runs: list[tuple[int, int, array]] = []
+        for address, values in blocks:
+            index = self._require_segment(address, len(values))
+            runs.append(
+                (index, address - self._starts[index], array(REGISTER_TYPECODE, values))
+            )
+
+        written = 0
+        with self._write_lock:
+            # Seuls les segments modifiés sont copiés
+            buffers = list(self._buffers)
+            copied: set[int] = set()
+            for index, offset, run in runs:
+                end = offset + len(run)
+                if buffers[index][offset:end] == run:
+                    continue
+                if index not in copied:
+                    buffers[index] = buffers[index][:]
+                    copied.add(index)
+                buffers[index][offset:end] = run
+                written += len(run)
+            if copied:
+                self._buffers = tuple(buffers)
+
+        return written
+
+    def _locate(self, address: int, count: int) -> Optional[int]:
+        """Indice du segment contenant toute la plage, None sinon."""
+        index = bisect_right(self._starts, address) - 1
+        if index < 0 or address + count > self._ends[index]:
+            return None
+        return index
+
+    def _require_segment(self, address: int, count: int) -> int:
+        index = self._locate(address, count)
+        if index is None:
+            raise ValueError(
+                f"Registres {address} à {address + count - 1} hors des segments alloués"
+            )
+        return index
+
+    def __str__(self) -> str:
+        return f"DoubleBufferedDataBlock({self.size} registres, {len(self._starts)} segments)"
+
+
+# Rappel d'écriture client : (adresse, valeur, timestamp de réception)
+WriteCallback = Callable[[int, int, float], None]
+
+
+class WriteNotifyingDataBlock(DoubleBufferedDataBlock):
+    """
+    Bloc à double tampon qui notifie les écritures des clients sur des registres surveillés.
+    Chaque écriture est horodatée à sa réception, puis transmise au rappel du registre
+    depuis le thread du serveur Modbus : les rappels doivent être brefs.
+    Les publications du contrôleur (publish) ne déclenchent pas de notification.
+    """
+
+    def __init__(
+        self,
+        address: int = 0,
+        count: int = 0,
+        segments: Optional[Sequence[tuple[int, int]]] = None,
+        clock: Optional[Clock] = None,
+    ):
+        super().__init__(address, count, segments)
+        self.clock = clock or DEFAULT_CLOCK
+        self._watched: dict[int, WriteCallback] = {}
+
+    def watch(self, address: int, callback: WriteCallback) -> None:
+        """
+        Surveille les écritures des clients sur un registre.
+
+        Args:
+            address: Adresse du registre dans le bloc
+            callback: Appelé avec (adresse, valeur, timestamp) à chaque écriture
+        """
+        self._require_segment(address, 1)
+        self._watched[address] = callback
+
+    def setValues(self, address: int, values: Sequence[int] | int) -> None:
+        received_at = self.clock.time()
+        if not isinstance(values, (list, tuple)):
+            values = [values]  # type: ignore
+        super().setValues(address, values)
+        for offset, value in enumerate(values):  # type: ignore
+            callback = self._watched.get(address + offset)
+            if callback is not None:
+                callback(address + offset, value, received_at)
+
@@ -1,52 +1,136 @@
 import threading
-import time
 import asyncio
-from typing import Optional
+from typing import Callable, Dict, Optional, Sequence
 from pymodbus.server import StartAsyncTcpServer  # type: ignore
 from pymodbus.datastore import (
-    ModbusSequentialDataBlock,
     ModbusSlaveContext,
     ModbusServerContext,
 )
 from datamodel.datamodel import SystemObs
 from communication.interface import Server
+from communication.server.datablock import (
+    DoubleBufferedDataBlock,
+    WriteNotifyingDataBlock,
+)
+from communication.server.register_map import RegisterMap, default_register_map
+from core.clock import DEFAULT_CLOCK, Clock
 from datamodel.project_data import ProjectData
 from keys.keys import Keys
+from keys.registry import DEFAULT_KEY_REGISTRY
+from monitoring.metrics import DEFAULT_METRICS, MetricsRegistry, StageStats, Stages
 
 
 class ModbusServer(Server):
     """
     Serveur Modbus qui expose :
-    - Adresse 100 : SOC BESS (lecture)
-    - Adresse 102 : P BESS (lecture)
-    - Adresse 104 : Q BESS (lecture)
+    - Les valeurs du SystemObs décrites par la RegisterMap (par défaut, SOC/P/Q du
+      premier BESS aux adresses 100/102/104)
     - Adresse 500 : Setpoint BESS (écriture)
+    - Adresse 502 : Watchdog BESS (écriture)
+    - Registres d'entrée 9000+ : durées des étapes du cycle (santé du contrôleur)
     """
 
-    # Adresses des registres
-    REG_SOC_BESS = 100
-    REG_P_BESS = 102
-    REG_Q_BESS = 104
+    # Adresses des registres écrits par les clients
     REG_SETPOINT_BESS = 500
     REG_WATCHDOG_BESS = 502
 
-    def __init__(self, host: str = "localhost", port: int = 5020):
+    # Plage réservée des registres d'entrée pour les durées d'étapes du cycle.
+    # Par étape publiée : count, p50, p99, max en uint32 (mot de poids fort en premier),
+    # durées en microsecondes.
+    REG_METRICS_BASE = 9000
+    METRICS_REGISTERS_PER_STAGE = 8
+
+    # Le ModbusSlaveContext décale de 1 les adresses protocole vers les datablocks
+    DATABLOCK_ADDRESS_OFFSET = 1
+    DEFAULT_PUBLISHED_STAGES = (
+        Stages.AGGREGATE,
+        Stages.ORCHESTRATOR_STEP,
+        Stages.SEND_COMMANDS,
+        Stages.DATABASE_SAVE,
+        Stages.MODBUS_UPDATE,
+        Stages.COMMAND_LATENCY,
+    )
+
+    def __init__(
+        self,
+        host: str = "localhost",
+        port: int = 5020,
+        metrics: Optional[MetricsRegistry] = None,
+        published_stages: Optional[Sequence[str]] = None,
+        register_map: Optional[RegisterMap] = None,
+        sparse_registers: bool = False,
+        clock: Optional[Clock] = None,
+    ):
         """
         Initialise le serveur Modbus.
 
         Args:
             host: Adresse IP du serveur
             port: Port du serveur Modbus
+            metrics: Registre des durées d'étapes (registre partagé par défaut)
+            published_stages: Étapes publiées dans les registres d'entrée, dans l'ordre
+                              des emplacements (DEFAULT_PUBLISHED_STAGES par défaut)
+            register_map: Table des registres exposés (table historique par défaut)
+            sparse_registers: N'alloue que les plages utilisées (table, consignes,
+                              durées d'étapes) ; les autres adresses sont refusées
+                              aux clients. Sinon, toute la plage 0 à 9999 est lisible.
+            clock: Source de temps des horodatages (horloge système par défaut)
         """
         self.host = host
         self.port = port
+        self.metrics = metrics or DEFAULT_METRICS
+        self.register_map = register_map or default_register_map()
+        self.published_stages = tuple(
+            published_stages or self.DEFAULT_PUBLISHED_STAGES
+        )
         self.current_system_obs: Optional[SystemObs] = None
         self.setpoint_value: Optional[float] = None
         self.setpoint_lock = threading.Lock()
-        # Verrou pour protéger l'accès thread-safe au slave_context
-        self.slave_context_lock = threading.Lock()
         self.server_thread: Optional[threading.Thread] = None
         self.server_running = False
+        self.sparse_registers = sparse_registers
+        self.clock = clock or DEFAULT_CLOCK
+        # Registres écrits par les clients et clé de projet associée
+        self.client_registers: Dict[int, str] = {
+            self.REG_SETPOINT_BESS: Keys.BESS_SETPOINT_KEY,
+            self.REG_WATCHDOG_BESS: Keys.WATCHDOG_BESS_KEY,
+        }
+        # Identifiant (KeyRegistry) de la clé de chaque registre client, résolu une seule fois
+        self._client_key_ids: Dict[int, int] = {
+            address: DEFAULT_KEY_REGISTRY.register(key)
+            for address, key in self.client_registers.items()
+        }
+        # Dernières valeurs écrites par les clients, horodatées à leur réception.
+        # La liste est remplacée (jamais modifiée) à chaque écriture, protégée par setpoint_lock.
+        now = self.clock.time()
+        self._client_project_data: list[ProjectData] = [
+            ProjectData(name=key, value=0.0, timestamp=now)
+            for key in self.client_registers.values()
+        ]
+        # Clés écrites depuis le dernier take_new_data : une valeur reprise telle quelle
+        # d'un snapshot à l'autre n'est transmise qu'une fois à la base de données.
+        # Les valeurs initiales sont enregistrées au premier appel.
+        self._unsaved_key_ids: set[int] = set(self._client_key_ids.values())
+        self._write_listener: Optional[Callable[[], None]] = None
+
+        # Registres à double tampon : les clients lisent sans attendre les publications
+        self.holding_registers = self._create_datablock(
+            list(self.register_map.blocks)
+            + [(address, 1) for address in self.client_registers],
+            notify=True,
+        )
+        for address in self.client_registers:
+            self.holding_registers.watch(  # type: ignore
+                address + self.DATABLOCK_ADDRESS_OFFSET, self._on_client_write
+            )
+        self.input_registers = self._create_datablock(
+            [
+                (
+                    self.REG_METRICS_BASE,
+                    len(self.published_stages) * self.METRICS_REGISTERS_PER_STAGE,
+                )
+            ]
+        )
         self.slave_context: ModbusSlaveContext = self._create_slave_context()
         # Avec single=True, on passe directement le ModbusSlaveContext (pas un dict)
         # Cela évite les problèmes de conversion dict lors de l'accès au contexte
@@ -54,11 +138,36 @@ class ModbusServer(Server):
             slaves=self.slave_context, single=True
         )
 
+    def _create_datablock(
+        self, ranges: list[tuple[int, int]], notify: bool = False
+    ) -> DoubleBufferedDataBlock:
+        """
+        Crée un bloc de registres couvrant les plages utilisées.
+
+        Args:
+            ranges: Plages (adresse protocole, nombre de registres) utilisées
+            notify: Si True, le bloc peut notifier les écritures des clients
+
+        Returns:
+            Bloc épars limité à ces plages, ou bloc dense d'au moins 10000 registres
+        """
+        offset = self.DATABLOCK_ADDRESS_OFFSET
+        if self.sparse_registers:
+            layout = {
+                "segments": [(address + offset, count) for address, count in ranges]
+            }
+        else:
+            end = max([address + count for address, count in ranges] + [10000])
+            layout = {"address": 0, "count": end + offset}
+        if notify:
+            return WriteNotifyingDataBlock(clock=self.clock, **layout)
+        return DoubleBufferedDataBlock(**layout)
+
     def _create_slave_context(self) -> ModbusSlaveContext:
         """Crée le contexte de données Modbus."""
         return ModbusSlaveContext(
-            hr=ModbusSequentialDataBlock(0, [0] * 10000),  # Holding Registers
-            ir=ModbusSequentialDataBlock(0, [0] * 10000),  # Input Registers
+            hr=self.holding_registers,  # Holding Registers
+            ir=self.input_registers,  # Input Registers
         )
 
     def _update_holding_registers(self):
@@ -66,26 +175,52 @@ class ModbusServer(Server):
         if self.current_system_obs is None:
             return
 
-        bess_data = None
-        if self.current_system_obs.bess and len(self.current_system_obs.bess) > 0:
-            bess_data = self.current_system_obs.bess[0]
+        with self.metrics.timer(Stages.MODBUS_UPDATE):
+            self._write_holding_registers(self.current_system_obs)
 
-        # Protéger l'accès au slave_context avec un verrou
-        with self.slave_context_lock:
-            if bess_data:
-                self.slave_context.setValues(
-                    3, self.REG_SOC_BESS, [int(bess_data.soc * 100)]
-                )
-                self.slave_context.setValues(
-                    3, self.REG_P_BESS, [int(bess_data.p * 100)]
-                )
-                self.slave_context.setValues(
-                    3, self.REG_Q_BESS, [int(bess_data.q * 100)]
-                )
-            else:
-                self.slave_context.setValues(3, self.REG_SOC_BESS, [0])
-                self.slave_context.setValues(3, self.REG_P_BESS, [0])
-                self.slave_context.setValues(3, self.REG_Q_BESS, [0])
+    def _write_holding_registers(self, system_obs: SystemObs):
+        """
+        Encode le SystemObs en une passe selon la RegisterMap, puis publie
+        tous les blocs en une permutation atomique du tampon des registres de holding.
+        Seuls les registres modifiés depuis la publication précédente sont réécrits.
+        """
+        blocks = self.register_map.encode(system_obs)
+        self.holding_registers.publish(self._to_datablock_addresses(blocks))
+
+    def _to_datablock_addresses(
+        self, blocks: list[tuple[int, list[int]]]
+    ) -> list[tuple[int, list[int]]]:
+        return [
+            (address + self.DATABLOCK_ADDRESS_OFFSET, values)
+            for address, values in blocks
+        ]
+
+    def publish_metrics(self, stats: Dict[str, StageStats]):
+        """
+        Publie les durées d'étapes dans la plage réservée des registres d'entrée,
+        en un seul bloc contigu.
+
+        Args:
+            stats: Statistiques par nom d'étape (MetricsRegistry.get_stats)
+        """
+        values: list[int] = []
+        for stage in self.published_stages:
+            stage_stats = stats.get(stage)
+            if stage_stats is None:
+                values.extend([0] * self.METRICS_REGISTERS_PER_STAGE)
+                continue
+            for value in (
+                stage_stats.count,
+                round(stage_stats.p50 * 1e6),
+                round(stage_stats.p99 * 1e6),
+                round(stage_stats.max * 1e6),
+            ):
+                value = min(value, 0xFFFFFFFF)
+                values.extend((value >> 16, value & 0xFFFF))
+
+        self.input_registers.publish(
+            self._to_datablock_addresses([(self.REG_METRICS_BASE, values)])
+        )
 
     def expose_server(self, system_obs: SystemObs):
         """
@@ -130,49 +265,73 @@ class ModbusServer(Server):
             if loop is not None:
                 loop.close()
 
+    def set_write_listener(self, listener: Optional[Callable[[], None]]) -> None:
+        """
+        Enregistre la fonction appelée à chaque écriture d'un client sur un registre
+        de consigne ou de watchdog (depuis le thread du serveur Modbus).
+
+        Args:
+            listener: Fonction sans argument, brève et non bloquante (None pour retirer)
+        """
+        self._write_listener = listener
+
+    def _on_client_write(self, address: int, value: int, received_at: float) -> None:
+        """Horodate une écriture client et la transmet au pipeline."""
+        register = address - self.DATABLOCK_ADDRESS_OFFSET
+        key = self.client_registers[register]
+        key_id = self._client_key_ids[register]
+        with self.setpoint_lock:
+            self._client_project_data = [
+                (
+                    ProjectData(
+                        name=key,
+                        value=float(value),
+                        timestamp=received_at,
+                        key_id=key_id,
+                    )
+                    if project_data.key_id == key_id
+                    else project_data
+                )
+                for project_data in self._client_project_data
+            ]
+            self._unsaved_key_ids.add(key_id)
+
+        listener = self._write_listener
+        if listener is not None:
+            listener()
+
     def fill_system_obs(self) -> SystemObs:
         """
-        Retourne un SystemObs avec le ProjectData créé à partir de la valeur
-        écrite dans le registre 500 (BESS_SETPOINT_KEY).
+        Retourne un SystemObs avec les ProjectData des registres écrits par les clients :
+        consigne BESS (registre 500, BESS_SETPOINT_KEY) et watchdog BESS (registre 502,
+        WATCHDOG_BESS_KEY). Chaque valeur porte l'horodatage de sa dernière écriture
+        (celui du démarrage si elle n'a jamais été écrite), utilisé par le watchdog.
+        Une valeur non réécrite est reprise à l'identique dans les snapshots suivants
+        (pour les fonctions métier) ; seul take_new_data la transmet à la base de données.
 
         Returns:
-            SystemObs contenant le ProjectData avec BESS_SETPOINT_KEY si une valeur a été écrite
-        """
-        # Protéger l'accès au slave_context avec un verrou pour éviter les race conditions
-        # Le serveur Modbus peut écrire dans ce registre depuis un autre thread
-        with self.slave_context_lock:
-            try:
-                bess_sp_values = self.slave_context.getValues(  # type: ignore
-                    3, self.REG_SETPOINT_BESS, 1
-                )
-            except Exception:
-                # En cas d'erreur, retourner une valeur par défaut
-                bess_sp_values = [0]
+            SystemObs contenant les ProjectData BESS_SETPOINT_KEY et WATCHDOG_BESS_KEY
+        """
+        with self.setpoint_lock:
+            project_data = self._client_project_data
+        return SystemObs(project_data=project_data)
 
-            if bess_sp_values and len(bess_sp_values) > 0:  # type: ignore
-                bess_sp: float = float(int(bess_sp_values[0]))  # type: ignore
-            else:
-                bess_sp: float = 0.0
+    def take_new_data(self) -> list[ProjectData]:
+        """
+        Retourne les ProjectData des registres clients écrits depuis l'appel précédent
+        (chaque écriture est un nouvel échantillon, même si la valeur est inchangée),
+        et les marque comme enregistrés.
 
-        watchdog_bess_values = self.slave_context.getValues(  # type: ignore
-            3, self.REG_WATCHDOG_BESS, 1
-        )
-        if watchdog_bess_values and len(watchdog_bess_values) > 0:  # type: ignore
-            watchdog_bess: float = float(int(watchdog_bess_values[0]))  # type: ignore
-        else:
-            watchdog_bess: float = 0.0
-
-        return SystemObs(
-            project_data=[
-                ProjectData(
-                    name=Keys.BESS_SETPOINT_KEY,
-                    value=bess_sp,
-                    timestamp=time.time(),
-                ),
-                ProjectData(
-                    name=Keys.WATCHDOG_BESS_KEY,
-                    value=watchdog_bess,
-                    timestamp=time.time(),
-                ),
+        Returns:
+            ProjectData à enregistrer (liste vide si aucun client n'a écrit)
+        """
+        with self.setpoint_lock:
+            if not self._unsaved_key_ids:
+                return []
+            unsaved = self._unsaved_key_ids
+            self._unsaved_key_ids = set()
+            return [
+                project_data
+                for project_data in self._client_project_data
+                if project_data.key_id in unsaved
             ]
-        )
@@ -0,0 +1,224 @@
+from dataclasses import dataclass, fields
+from typing import Callable, Sequence
+
+from communication.modbus_codec import BlockEncoder, DataType, FieldLayout, register_count
+from datamodel.datamodel import SystemObs
+from datamodel.site_aggregates import SiteAggregates
+from keys.registry import DEFAULT_KEY_REGISTRY
+
+
+# Sources des valeurs exposées
+SOURCE_BESS = "bess"
+SOURCE_PV = "pv"
+SOURCE_PROJECT = "project"
+SOURCE_SITE = "site"
+
+# Grandeurs du site exposables (attributs de SiteAggregates)
+SITE_FIELDS = frozenset(
+    {field_info.name for field_info in fields(SiteAggregates)} | {"site_p", "site_q"}
+)
+
+
+@dataclass(frozen=True)
+class ServerRegister:
+    """Valeur du SystemObs exposée dans les registres de holding du serveur."""
+
+    address: int
+    source: str  # SOURCE_BESS, SOURCE_PV, SOURCE_PROJECT ou SOURCE_SITE
+    field: str  # attribut de Bess/Pv (p, q, soc), clé de projet (Keys) ou grandeur du site
+    index: int = 0  # rang de l'équipement dans SystemObs.bess / SystemObs.pv
+    data_type: DataType = DataType.INT16
+    scale: float = 1.0  # valeur physique = valeur brute * scale
+
+
+@dataclass(frozen=True)
+class _CompiledBlock:
+    address: int
+    encoder: BlockEncoder
+    getters: tuple[Callable[[SystemObs], float], ...]
+
+
+def _make_getter(register: ServerRegister) -> Callable[[SystemObs], float]:
+    """Crée l'accesseur d'une valeur ; une valeur absente est exposée à 0."""
+    field_name = register.field
+    index = register.index
+
+    if register.source == SOURCE_PROJECT:
+        key_id = DEFAULT_KEY_REGISTRY.register(field_name)
+
+        def get_project_value(system_obs: SystemObs) -> float:
+            project_data = system_obs.get_project_data_by_id(key_id)
+            return 0.0 if project_data is None else project_data.value
+
+        return get_project_value
+
+    if register.source == SOURCE_SITE:
+        if field_name not in SITE_FIELDS:
+            raise ValueError(f"Grandeur du site inconnue: {field_name}")
+
+        def get_site_value(system_obs: SystemObs) -> float:
+            # Calculé une seule fois par snapshot et partagé avec les fonctions métier
+            value = getattr(system_obs.site_aggregates, field_name)
+            return 0.0 if value is None else value
+
+        return get_site_value
+
+    if register.source not in (SOURCE_BESS, SOURCE_PV):
+        raise ValueError(f"Source de registre inconnue: {register.source}")
+    source = register.source
+
+    def get_equipment_value(system_obs: SystemObs) -> float:
+        equipments = getattr(system_obs, source)
+        if index >= len(equipments):
+            return 0.0
+        return getattr(equipments[index], field_name)
+
+    return get_equipment_value
+
+
+class RegisterMap:
+    """
+    Table déclarative des registres exposés par le serveur Modbus.
+
+    À la construction, les registres sont regroupés en blocs contigus et chaque
+    bloc reçoit un encodeur précompilé : encode() produit, en une passe sur le
+    SystemObs, un tampon par bloc à écrire en un seul appel au datastore.
+    """
+
+    def __init__(self, registers: Sequence[ServerRegister], max_gap: int = 0):
+        """
+        Initialise et compile la table.
+
+        Args:
+            registers: Registres exposés (sans chevauchement)
+            max_gap: Nombre maximal de registres non décrits inclus dans un bloc
+                     (écrits à 0) pour fusionner deux plages voisines
+        """
+        self.registers = tuple(sorted(registers, key=lambda r: r.address))
+        self._blocks = self._compile(self.registers, max_gap)
+
+    @property
+    def blocks(self) -> list[tuple[int, int]]:
+        """Blocs contigus (adresse de début, nombre de registres)."""
+        return [(block.address, block.encoder.length) for block in self._blocks]
+
+    def encode(self, system_obs: SystemObs) -> list[tuple[int, list[int]]]:
+        """
+        Encode le SystemObs selon la table.
+
+        Args:
+            system_obs: SystemObs à exposer
+
+        Returns:
+            Liste de (adresse de début, registres) par bloc contigu
+        """
+        return [
+            (
+                block.address,
+                block.encoder.encode([getter(system_obs) for getter in block.getters]),
+            )
+            for block in self._blocks
+        ]
+
+    @staticmethod
+    def _compile(
+        registers: Sequence[ServerRegister], max_gap: int
+    ) -> list[_CompiledBlock]:
+        blocks: list[_CompiledBlock] = []
+        current: list[ServerRegister] = []
+        end = 0
+
+        def close_block() -> None:
+            start = current[0].address
+            blocks.append(
+                _CompiledBlock(
+                    address=start,
+                    encoder=BlockEncoder(
+                        end - start,
+                        [
+                            FieldLayout(r.address - start, r.data_type, r.scale)
+                            for r in current
+                        ],
+                    ),
+                    getters=tuple(_make_getter(r) for r in current),
+                )
+            )
+
+        for register in registers:
+            if current and register.address < end:
+                raise ValueError(f"Chevauchement de registres à l'adresse {register.address}")
+            if current and register.address - end > max_gap:
+                close_block()
+                current = []
+            current.append(register)
+            end = register.address + register_count(register.data_type)
+
+        if current:
+            close_block()
+        return blocks
+
+
+def build_fleet_register_map(
+    n_bess: int,
+    n_pv: int,
+    project_keys: Sequence[str] = (),
+    site_fields: Sequence[str] = (),
+    base_address: int = 1000,
+    data_type: DataType = DataType.INT32,
+    scale: float = 0.01,
+) -> RegisterMap:
+    """
+    Construit une table exposant toute la flotte en un bloc contigu :
+    soc/p/q de chaque BESS, puis p/q de chaque PV, puis les clés de projet,
+    puis les grandeurs du site.
+
+    Args:
+        n_bess: Nombre de BESS exposés
+        n_pv: Nombre de PV exposés
+        project_keys: Clés de projet exposées
+        site_fields: Grandeurs du site exposées (attributs de SiteAggregates : site_p, bess_p...)
+        base_address: Adresse du premier registre
+        data_type: Encodage de toutes les valeurs
+        scale: Facteur d'échelle de toutes les valeurs
+
+    Returns:
+        RegisterMap compilée
+    """
+    width = register_count(data_type)
+    registers: list[ServerRegister] = []
+    address = base_address
+
+    def add(source: str, field_name: str, index: int = 0) -> None:
+        nonlocal address
+        registers.append(
+            ServerRegister(address, source, field_name, index, data_type, scale)
+        )
+        address += width
+
+    for index in range(n_bess):
+        for field_name in ("soc", "p", "q"):
+            add(SOURCE_BESS, field_name, index)
+    for index in range(n_pv):
+        for field_name in ("p", "q"):
+            add(SOURCE_PV, field_name, index)
+    for key in project_keys:
+        add(SOURCE_PROJECT, key)
+    for field_name in site_fields:
+        add(SOURCE_SITE, field_name)
+
+    return RegisterMap(registers)
+
+
+def default_register_map() -> RegisterMap:
+    """
+    Table historique du serveur : SOC, P et Q du premier BESS aux adresses 100, 102
+    et 104 (int16 signé, en centièmes), écrits en un seul bloc.
+    """
+    return RegisterMap(
+        [
+            ServerRegister(100, SOURCE_BESS, "soc", scale=0.01),
+            ServerRegister(102, SOURCE_BESS, "p", scale=0.01),
+            ServerRegister(104, SOURCE_BESS, "q", scale=0.01),
+        ],
+        max_gap=1,
+    )
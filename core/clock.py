@@ -0,0 +1,94 @@
+import threading
+import time
+from abc import ABC, abstractmethod
+
+
+class Clock(ABC):
+    """
+    Source de temps injectable.
+    time() donne l'heure murale, pour horodater les données ; monotonic() ne recule
+    jamais et ne saute pas avec les corrections d'heure (NTP), pour mesurer des intervalles.
+    """
+
+    @abstractmethod
+    def time(self) -> float:
+        """Heure murale (timestamp Unix, secondes)."""
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        """Horloge monotone (secondes, origine arbitraire)."""
+
+    @abstractmethod
+    def sleep(self, seconds: float) -> None:
+        """Attend la durée donnée (secondes)."""
+
+
+class SystemClock(Clock):
+    """Horloge du système (time.time, time.monotonic, time.sleep)."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        time.sleep(seconds)
+
+
+class VirtualClock(Clock):
+    """
+    Horloge virtuelle avancée manuellement (tests, simulation, rejeu).
+    sleep() avance l'horloge au lieu d'attendre : un délai de 5 s s'écoule instantanément.
+    Thread-safe.
+    """
+
+    def __init__(self, start_time: float = 0.0):
+        """
+        Initialise l'horloge.
+
+        Args:
+            start_time: Heure murale initiale (timestamp Unix)
+        """
+        self._lock = threading.Lock()
+        self._wall = start_time
+        self._monotonic = 0.0
+
+    def time(self) -> float:
+        with self._lock:
+            return self._wall
+
+    def monotonic(self) -> float:
+        with self._lock:
+            return self._monotonic
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        """
+        Fait avancer l'heure murale et l'horloge monotone.
+
+        Args:
+            seconds: Durée écoulée (positive)
+        """
+        if seconds < 0:
+            raise ValueError(f"Une horloge ne peut pas reculer ({seconds}s)")
+        with self._lock:
+            self._wall += seconds
+            self._monotonic += seconds
+
+    def set_time(self, timestamp: float) -> None:
+        """
+        Modifie l'heure murale sans toucher l'horloge monotone, comme une correction
+        d'heure (saut NTP), éventuellement vers le passé.
+
+        Args:
+            timestamp: Nouvelle heure murale (timestamp Unix)
+        """
+        with self._lock:
+            self._wall = timestamp
+
+
+# Horloge par défaut des composants (drivers, serveur, watchdog...)
+DEFAULT_CLOCK = SystemClock()
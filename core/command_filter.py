@@ -0,0 +1,161 @@
+import threading
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple, Union
+
+from core.clock import DEFAULT_CLOCK, Clock
+from datamodel.datamodel import Command, EquipmentType
+
+
+# Équipement destinataire d'une commande : type et device_id (None pour toute la flotte du type)
+CommandTarget = Tuple[EquipmentType, Optional[str]]
+
+
+@dataclass(frozen=True)
+class CommandFilterStats:
+    """Compteurs du filtre de commandes depuis le démarrage."""
+
+    received: int
+    sent: int  # écritures réussies (confirmées par mark_sent)
+    suppressed: int
+    failed: int  # commandes transmises dont l'écriture a échoué ou n'a pas abouti
+    forced_refreshes: int
+
+
+class CommandFilter:
+    """
+    Filtre les commandes entre l'Orchestrator et l'envoi aux drivers.
+
+    Une commande n'est transmise que si sa consigne (pSp ou qSp) s'écarte de la dernière
+    consigne envoyée au même équipement de plus que la bande morte, et si le débit
+    d'écriture maximal de cet équipement le permet. Une consigne inchangée est renvoyée
+    au plus tard après refresh_interval, pour corriger une écriture perdue ou un
+    équipement redémarré.
+
+    Seules les écritures réussies sont mémorisées (mark_sent) : une commande dont
+    l'écriture a échoué est retransmise au cycle suivant, même inchangée.
+    """
+
+    def __init__(
+        self,
+        deadband: float = 0.0,
+        deadbands: Optional[Dict[Union[str, EquipmentType], float]] = None,
+        max_write_rate: Optional[float] = None,
+        refresh_interval: Optional[float] = 60.0,
+        clock: Optional[Clock] = None,
+    ):
+        """
+        Initialise le filtre.
+
+        Args:
+            deadband: Écart minimal de pSp ou qSp pour renvoyer une consigne
+            deadbands: Bandes mortes spécifiques, par device_id ou par type d'équipement
+                       (le device_id est prioritaire sur le type)
+            max_write_rate: Nombre maximal d'écritures par seconde et par équipement (None : illimité)
+            refresh_interval: Délai maximal (secondes) avant de renvoyer une consigne
+                              inchangée (None : jamais)
+            clock: Source de temps (horloge système par défaut)
+        """
+        self.deadband = deadband
+        self.deadbands: Dict[Union[str, EquipmentType], float] = deadbands or {}
+        self.min_write_interval = 0.0 if max_write_rate is None else 1.0 / max_write_rate
+        self.refresh_interval = refresh_interval
+        self.clock = clock or DEFAULT_CLOCK
+
+        self._lock = threading.Lock()
+        # Dernière commande écrite avec succès par équipement et instant (monotonic)
+        # de sa transmission
+        self._last_sent: Dict[CommandTarget, Tuple[Command, float]] = {}
+        self._received = 0
+        self._sent = 0
+        self._suppressed = 0
+        self._forced_refreshes = 0
+
+    def filter(self, commands: List[Command]) -> List[Command]:
+        """
+        Retourne les commandes à envoyer. Leur envoi n'est mémorisé qu'une fois
+        l'écriture confirmée par mark_sent.
+
+        Args:
+            commands: Commandes produites par l'Orchestrator
+
+        Returns:
+            Commandes à transmettre à Adapter.send_commands (ordre conservé)
+        """
+        now = self.clock.monotonic()
+        to_send: List[Command] = []
+
+        with self._lock:
+            for command in commands:
+                self._received += 1
+                target = (command.equipment_type, command.device_id)
+                last = self._last_sent.get(target)
+
+                if last is not None:
+                    last_command, sent_at = last
+                    elapsed = now - sent_at
+                    if (
+                        self.refresh_interval is not None
+                        and elapsed >= self.refresh_interval
+                    ):
+                        self._forced_refreshes += 1
+                    elif elapsed < self.min_write_interval or not self._has_changed(
+                        last_command, command
+                    ):
+                        self._suppressed += 1
+                        continue
+
+                to_send.append(command)
+
+        return to_send
+
+    def mark_sent(self, commands: List[Command], sent_at: Optional[float] = None) -> None:
+        """
+        Mémorise les commandes écrites avec succès : elles deviennent la référence
+        de la bande morte, du débit maximal et du renvoi périodique.
+
+        Args:
+            commands: Commandes retournées par filter() et écrites sans erreur
+            sent_at: Instant (monotonic) de leur transmission (maintenant si None)
+        """
+        if sent_at is None:
+            sent_at = self.clock.monotonic()
+        with self._lock:
+            for command in commands:
+                self._last_sent[(command.equipment_type, command.device_id)] = (
+                    command,
+                    sent_at,
+                )
+                self._sent += 1
+
+    def _has_changed(self, previous: Command, command: Command) -> bool:
+        deadband = self.deadbands.get(command.equipment_type, self.deadband)
+        if command.device_id is not None:
+            deadband = self.deadbands.get(command.device_id, deadband)
+        if command.pSp is None or previous.pSp is None:
+            # Commande de Q seule : changement si l'autre en porte une consigne de P
+            p_changed = (command.pSp is None) != (previous.pSp is None)
+        else:
+            p_changed = abs(command.pSp - previous.pSp) > deadband
+        return p_changed or abs(command.qSp - previous.qSp) > deadband
+
+    def reset(self) -> None:
+        """Oublie les consignes envoyées : les prochaines commandes sont toutes transmises."""
+        with self._lock:
+            self._last_sent.clear()
+
+    def get_stats(self) -> CommandFilterStats:
+        """
+        Retourne les compteurs du filtre.
+
+        Returns:
+            CommandFilterStats (commandes reçues, envoyées, supprimées, en échec,
+            renvois forcés)
+        """
+        with self._lock:
+            return CommandFilterStats(
+                received=self._received,
+                sent=self._sent,
+                suppressed=self._suppressed,
+                failed=self._received - self._sent - self._suppressed,
+                forced_refreshes=self._forced_refreshes,
+            )
@@ -0,0 +1,54 @@
+from typing import Mapping, Optional, Sequence
+
+from datamodel.datamodel import Command
+
+
+def dispatch_fleet_command(
+    command: Command,
+    device_ids: Sequence[Optional[str]],
+    weights: Optional[Mapping[str, float]] = None,
+) -> list[Command]:
+    """
+    Répartit une commande entre les équipements d'une flotte.
+
+    Une commande sans device_id est une consigne de site pour tout son type d'équipement :
+    elle est divisée entre les équipements au prorata de leur poids (par exemple leur
+    capacité), de sorte que la flotte délivre la consigne une seule fois. Une commande
+    avec device_id vise un seul équipement et est retournée telle quelle.
+    Une commande de Q seule (pSp None) le reste pour chaque équipement.
+    Cette règle est la seule utilisée pour l'Adapter et pour les drivers de flotte.
+
+    Args:
+        command: Commande à répartir
+        device_ids: Équipements de la flotte, dans l'ordre. None désigne un équipement
+                    non adressable (driver d'un seul équipement sans identifiant).
+        weights: Poids par device_id (1.0 par défaut, y compris pour un équipement
+                 non adressable). Si la somme des poids est nulle, répartition égale.
+
+    Returns:
+        Une commande par équipement, dans l'ordre de device_ids, avec son device_id
+    """
+    if command.device_id is not None:
+        return [command]
+    if not device_ids:
+        return []
+
+    weights = weights or {}
+    unit_weights = [
+        1.0 if device_id is None else weights.get(device_id, 1.0)
+        for device_id in device_ids
+    ]
+    total = sum(unit_weights)
+    if total <= 0:
+        unit_weights = [1.0] * len(device_ids)
+        total = float(len(device_ids))
+
+    return [
+        Command(
+            pSp=None if command.pSp is None else command.pSp * weight / total,
+            qSp=command.qSp * weight / total,
+            equipment_type=command.equipment_type,
+            device_id=device_id,
+        )
+        for device_id, weight in zip(device_ids, unit_weights)
+    ]
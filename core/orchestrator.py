@@ -1,17 +1,100 @@
 # core/orchestrator.py
-from typing import List
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Collection, Dict, List, Optional, Tuple
 from metier.interface import ControlFunction
 from datamodel.datamodel import Command, SystemObs
+from monitoring.metrics import (
+    DEFAULT_METRICS,
+    MetricsRegistry,
+    Stages,
+    unique_stage_names,
+)
+
+
+logger = logging.getLogger(__name__)
 
 
 class Orchestrator:
     """
     Coordonne l'exécution des fonctions métier sur les mesures
     et retourne une liste de commandes, une par fonction métier.
+
+    En mode concurrent, les fonctions s'exécutent en parallèle dans un pool de threads,
+    chacune avec un budget de temps. Une fonction qui dépasse son budget est remplacée
+    pour ce cycle par ses commandes de repli (ou, sur option, par son dernier résultat) :
+    step() rend la main dans le budget, sans attendre la fonction lente.
     """
 
-    def __init__(self, functions: List[ControlFunction]):
+    def __init__(
+        self,
+        functions: List[ControlFunction],
+        metrics: Optional[MetricsRegistry] = None,
+        concurrent: bool = False,
+        time_budget: Optional[float] = None,
+        function_time_budgets: Optional[Dict[ControlFunction, float]] = None,
+        safe_commands: Optional[Dict[ControlFunction, List[Command]]] = None,
+        reuse_last_result: Optional[Collection[ControlFunction]] = None,
+        function_names: Optional[Dict[ControlFunction, str]] = None,
+    ):
+        """
+        Initialise l'Orchestrator.
+
+        Args:
+            functions: Fonctions métier, exécutées dans cet ordre (commandes dans cet ordre)
+            metrics: Registre des durées d'étapes (registre partagé par défaut)
+            concurrent: Si True, les fonctions sont exécutées en parallèle dans un pool de threads
+            time_budget: Budget (secondes) accordé à chaque fonction en mode concurrent.
+                         Si None, on attend la fin de toutes les fonctions.
+            function_time_budgets: Budgets spécifiques par fonction, prioritaires sur time_budget
+            safe_commands: Commandes de repli par fonction, utilisées si une fonction dépasse
+                           son budget ou échoue (aucune commande par défaut)
+            reuse_last_result: Fonctions pour lesquelles le dernier résultat obtenu remplace
+                               les commandes de repli (tant qu'il existe). À réserver aux
+                               fonctions dont une consigne ancienne reste sûre.
+            function_names: Noms explicites des fonctions dans les métriques
+                            (orchestrator.<nom>). Par défaut, nom de la classe, numéroté
+                            si plusieurs fonctions sont de la même classe.
+        """
         self.functions = functions
+        self.metrics = metrics or DEFAULT_METRICS
+        # Nom d'étape de chaque fonction, calculé une seule fois et distinct par instance
+        function_names = function_names or {}
+        self._stage_names = unique_stage_names(
+            "orchestrator",
+            [type(func).__name__ for func in self.functions],
+            [function_names.get(func) for func in self.functions],
+        )
+
+        self.concurrent = concurrent
+        self.time_budget = time_budget
+        self.function_time_budgets: Dict[ControlFunction, float] = (
+            function_time_budgets or {}
+        )
+        self.safe_commands: Dict[ControlFunction, List[Command]] = safe_commands or {}
+        self.reuse_last_result: frozenset[ControlFunction] = frozenset(
+            reuse_last_result or ()
+        )
+
+        # Fonctions ayant dépassé leur budget (ou échoué) lors du dernier cycle
+        self.late_functions: List[ControlFunction] = []
+
+        # Dernier résultat de chaque fonction, y compris ceux arrivés après le budget
+        self._results_lock = threading.Lock()
+        self._last_results: Dict[ControlFunction, List[Command]] = {}
+
+        # Calculs encore en cours, avec le snapshot traité : une fonction n'est jamais
+        # exécutée deux fois en parallèle (son état interne n'est pas protégé), elle est
+        # relancée à sa fin. Un calcul lancé sur un snapshot précédent est en retard.
+        self._pending: Dict[ControlFunction, Tuple[Future[List[Command]], SystemObs]] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if self.concurrent and self.functions:
+            self._executor = ThreadPoolExecutor(
+                max_workers=len(self.functions), thread_name_prefix="control-function"
+            )
 
     def step(self, system_obs: SystemObs) -> List[Command]:
         """
@@ -21,10 +104,104 @@ class Orchestrator:
         Returns:
             Liste des commandes, une par fonction métier exécutée.
         """
+        with self.metrics.timer(Stages.ORCHESTRATOR_STEP):
+            if self._executor is not None:
+                return self._step_concurrently(self._executor, system_obs)
+            return self._step_sequentially(system_obs)
+
+    def _step_sequentially(self, system_obs: SystemObs) -> List[Command]:
+        """Exécute les fonctions les unes après les autres."""
         commands: List[Command] = []
+        for func, stage_name in zip(self.functions, self._stage_names):
+            with self.metrics.timer(stage_name):
+                cmd = func.compute(system_obs)
+            commands.extend(cmd)
+        return commands
 
+    def _step_concurrently(
+        self, executor: ThreadPoolExecutor, system_obs: SystemObs
+    ) -> List[Command]:
+        """
+        Exécute les fonctions en parallèle, chacune dans son budget.
+
+        Args:
+            executor: Pool de threads des fonctions
+            system_obs: Snapshot à traiter
+
+        Returns:
+            Commandes de chaque fonction (ou de repli), dans l'ordre des fonctions
+        """
+        step_start = time.monotonic()
+        for func, stage_name in zip(self.functions, self._stage_names):
+            pending = self._pending.get(func)
+            if pending is not None and not pending[0].done():
+                continue
+            future = executor.submit(self._timed_compute, func, stage_name, system_obs)
+            self._pending[func] = (future, system_obs)
+
+        commands: List[Command] = []
+        late_functions: List[ControlFunction] = []
         for func in self.functions:
-            cmd = func.compute(system_obs)
-            commands.extend(cmd)
+            future, snapshot = self._pending[func]
+            budget = self.function_time_budgets.get(func, self.time_budget)
+            if snapshot is not system_obs:
+                # Calcul du cycle précédent toujours en cours : son résultat, même
+                # obtenu pendant ce cycle, ne correspond pas au snapshot courant
+                late_functions.append(func)
+                logger.warning(
+                    f"La fonction {type(func).__name__} traite encore un snapshot "
+                    f"précédent, résultat de repli utilisé pour ce cycle"
+                )
+                commands.extend(self._fallback(func))
+                continue
+            remaining = (
+                None
+                if budget is None
+                else max(0.0, step_start + budget - time.monotonic())
+            )
+            try:
+                commands.extend(future.result(timeout=remaining))
+            except FutureTimeoutError:
+                late_functions.append(func)
+                logger.warning(
+                    f"La fonction {type(func).__name__} a dépassé son budget de "
+                    f"{budget}s, résultat de repli utilisé pour ce cycle"
+                )
+                commands.extend(self._fallback(func))
+            except Exception as e:
+                late_functions.append(func)
+                logger.error(
+                    f"Erreur dans la fonction {type(func).__name__}: {e}", exc_info=True
+                )
+                commands.extend(self._fallback(func))
 
+        self.late_functions = late_functions
         return commands
+
+    def _timed_compute(
+        self, func: ControlFunction, stage_name: str, system_obs: SystemObs
+    ) -> List[Command]:
+        """Exécute une fonction en mesurant sa durée et conserve son résultat."""
+        with self.metrics.timer(stage_name):
+            result = func.compute(system_obs)
+        with self._results_lock:
+            self._last_results[func] = result
+        return result
+
+    def _fallback(self, func: ControlFunction) -> List[Command]:
+        """
+        Commandes de repli de la fonction (aucune par défaut), ou son dernier résultat
+        si elle figure dans reuse_last_result et en a déjà produit un.
+        """
+        if func in self.reuse_last_result:
+            with self._results_lock:
+                last_result = self._last_results.get(func)
+            if last_result is not None:
+                return list(last_result)
+        return list(self.safe_commands.get(func, []))
+
+    def close(self) -> None:
+        """Libère le pool de threads sans attendre les fonctions en cours."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
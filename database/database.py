@@ -1,12 +1,14 @@
 import sqlite3
 import threading
 from pathlib import Path
-from typing import Optional, Any
+from typing import Dict, Iterable, Optional, Any
 
 from datamodel.datamodel import SystemObs
+from database.interface import Storage
+from keys.registry import DEFAULT_KEY_REGISTRY
 
 
-class Database:
+class Database(Storage):
     """
     Classe pour sauvegarder un SystemObs agrégé dans une base de données SQLite.
     """
@@ -20,6 +22,10 @@ class Database:
         """
         self.db_path = db_path
         self.connection: Optional[sqlite3.Connection] = None
+        # Identifiant de chaque clé (KeyRegistry) dans la table project_keys de ce fichier
+        self._file_key_ids: Dict[int, int] = {}
+        # Fichier créé avant la table project_keys : project_data contient le nom des clés
+        self.legacy_project_data = False
         # Verrou pour garantir la sécurité thread-safe
         self._lock = threading.Lock()
         self._initialize_database()
@@ -37,6 +43,13 @@ class Database:
         )
         cursor = self.connection.cursor()
 
+        # WAL : les lectures ne bloquent plus les écritures (et inversement).
+        # synchronous=NORMAL suffit en WAL : pas de corruption possible, seules les
+        # dernières transactions peuvent être perdues en cas de coupure d'alimentation.
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+
         # Table pour les données BESS
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS bess (
@@ -58,15 +71,61 @@ class Database:
             )
         """)
 
-        # Table pour les données de projet
+        # Clés de projet : le nom n'est stocké qu'une fois par fichier
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS project_keys (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            )
+        """)
+
+        # Table pour les données de projet (key_id : identifiant dans project_keys)
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS project_data (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT NOT NULL,
+                key_id INTEGER NOT NULL,
                 value REAL NOT NULL,
                 timestamp REAL NOT NULL
             )
         """)
+        project_columns = {
+            row[1] for row in cursor.execute("PRAGMA table_info(project_data)")
+        }
+        self.legacy_project_data = "key_id" not in project_columns
+        key_column = "name" if self.legacy_project_data else "key_id"
+
+        # Table des grandeurs du site, une ligne par snapshot (SystemObs.site_aggregates)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS site (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                bess_p REAL NOT NULL,
+                bess_q REAL NOT NULL,
+                pv_p REAL NOT NULL,
+                pv_q REAL NOT NULL,
+                mean_soc REAL,
+                weighted_soc REAL,
+                available_discharge_energy REAL,
+                available_charge_energy REAL,
+                timestamp REAL NOT NULL
+            )
+        """)
+
+        # Index temporels pour les lectures par plage (voir database/query.py)
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_bess_timestamp ON bess (timestamp)"
+        )
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_pv_timestamp ON pv (timestamp)")
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_site_timestamp ON site (timestamp)"
+        )
+        cursor.execute(
+            "CREATE INDEX IF NOT EXISTS idx_project_data_timestamp "
+            "ON project_data (timestamp)"
+        )
+        cursor.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_project_data_{key_column}_timestamp "
+            f"ON project_data ({key_column}, timestamp)"
+        )
 
         self.connection.commit()
 
@@ -78,48 +137,145 @@ class Database:
         Args:
             system_obs: SystemObs agrégé contenant les données à sauvegarder
         """
+        self.save_batch([system_obs])
+
+    def save_batch(self, snapshots: Iterable[SystemObs]) -> int:
+        """
+        Sauvegarde plusieurs SystemObs dans une seule transaction.
+        Les lignes sont insérées par table avec executemany puis validées par un seul commit.
+        Les grandeurs du site sont celles déjà calculées pour le snapshot, s'il y en a.
+
+        Args:
+            snapshots: SystemObs agrégés à sauvegarder
+
+        Returns:
+            Nombre de lignes insérées
+        """
         if self.connection is None:
             raise RuntimeError(
                 "La connexion à la base de données n'est pas initialisée"
             )
 
+        bess_rows: list[tuple[float, float, float, float]] = []
+        pv_rows: list[tuple[float, float, float]] = []
+        project_rows: list[tuple[int, float, float]] = []
+        site_rows: list[tuple[Optional[float], ...]] = []
+
+        for system_obs in snapshots:
+            bess_rows.extend(
+                (bess.p, bess.q, bess.soc, bess.timestamp) for bess in system_obs.bess
+            )
+            pv_rows.extend((pv.p, pv.q, pv.timestamp) for pv in system_obs.pv)
+            project_rows.extend(
+                (project_data.key_id, project_data.value, project_data.timestamp)
+                for project_data in system_obs.project_data
+            )
+            site = system_obs.site_aggregates
+            if site.timestamp is not None:
+                site_rows.append(
+                    (
+                        site.bess_p,
+                        site.bess_q,
+                        site.pv_p,
+                        site.pv_q,
+                        site.mean_soc,
+                        site.weighted_soc,
+                        site.available_discharge_energy,
+                        site.available_charge_energy,
+                        site.timestamp,
+                    )
+                )
+
         # Utiliser un verrou pour garantir la sécurité thread-safe
         with self._lock:
+            # Clés ajoutées à project_keys par cette transaction, mémorisées après le commit
+            registered_key_ids: Dict[int, int] = {}
             cursor = self.connection.cursor()
-            rows_inserted = 0
-
-            # Sauvegarder les données BESS
-            if system_obs.bess:
-                for bess in system_obs.bess:
-                    cursor.execute(
+            try:
+                if bess_rows:
+                    cursor.executemany(
                         "INSERT INTO bess (p, q, soc, timestamp) VALUES (?, ?, ?, ?)",
-                        (bess.p, bess.q, bess.soc, bess.timestamp),
+                        bess_rows,
                     )
-                    rows_inserted += 1
-
-            # Sauvegarder les données PV
-            if system_obs.pv:
-                for pv in system_obs.pv:
-                    cursor.execute(
+                if pv_rows:
+                    cursor.executemany(
                         "INSERT INTO pv (p, q, timestamp) VALUES (?, ?, ?)",
-                        (pv.p, pv.q, pv.timestamp),
+                        pv_rows,
                     )
-                    rows_inserted += 1
-
-            # Sauvegarder les données de projet
-            if system_obs.project_data:
-                for project_data in system_obs.project_data:
-                    cursor.execute(
-                        "INSERT INTO project_data (name, value, timestamp) VALUES (?, ?, ?)",
-                        (
-                            project_data.name,
-                            project_data.value,
-                            project_data.timestamp,
-                        ),
+                if project_rows:
+                    if self.legacy_project_data:
+                        cursor.executemany(
+                            "INSERT INTO project_data (name, value, timestamp) "
+                            "VALUES (?, ?, ?)",
+                            [
+                                (DEFAULT_KEY_REGISTRY.name_of(key_id), value, timestamp)
+                                for key_id, value, timestamp in project_rows
+                            ],
+                        )
+                    else:
+                        file_key_ids = self._file_key_ids
+                        new_key_ids = {row[0] for row in project_rows} - file_key_ids.keys()
+                        for key_id in new_key_ids:
+                            registered_key_ids[key_id] = self._register_key(cursor, key_id)
+                        if registered_key_ids:
+                            file_key_ids = {**file_key_ids, **registered_key_ids}
+                        cursor.executemany(
+                            "INSERT INTO project_data (key_id, value, timestamp) "
+                            "VALUES (?, ?, ?)",
+                            [
+                                (file_key_ids[key_id], value, timestamp)
+                                for key_id, value, timestamp in project_rows
+                            ],
+                        )
+                if site_rows:
+                    cursor.executemany(
+                        "INSERT INTO site (bess_p, bess_q, pv_p, pv_q, mean_soc, weighted_soc, "
+                        "available_discharge_energy, available_charge_energy, timestamp) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                        site_rows,
                     )
-                    rows_inserted += 1
 
-            self.connection.commit()
+                self.connection.commit()
+            except Exception:
+                # Annuler les insertions partielles : le lot peut être réécrit sans doublon
+                self.connection.rollback()
+                raise
+            self._file_key_ids.update(registered_key_ids)
+
+        return len(bess_rows) + len(pv_rows) + len(project_rows) + len(site_rows)
+
+    @staticmethod
+    def _register_key(cursor: sqlite3.Cursor, key_id: int) -> int:
+        """
+        Retourne l'identifiant d'une clé dans la table project_keys du fichier,
+        en l'ajoutant si nécessaire (une seule fois par clé et par fichier).
+
+        Args:
+            cursor: Curseur de la transaction en cours
+            key_id: Identifiant de la clé dans le KeyRegistry
+
+        Returns:
+            Identifiant de la clé dans le fichier
+        """
+        name = DEFAULT_KEY_REGISTRY.name_of(key_id)
+        cursor.execute("INSERT OR IGNORE INTO project_keys (name) VALUES (?)", (name,))
+        row = cursor.execute(
+            "SELECT id FROM project_keys WHERE name = ?", (name,)
+        ).fetchone()
+        return row[0]
+
+    def partitions_for_range(self, start: float, end: float) -> list[Path]:
+        """
+        Retourne le fichier de la base, seul fichier à lire quelle que soit la plage.
+
+        Args:
+            start: Début de la plage (timestamp Unix)
+            end: Fin de la plage (timestamp Unix)
+
+        Returns:
+            Liste contenant le chemin de la base de données
+        """
+        return [Path(self.db_path)]
 
     def close(self) -> None:
         """Ferme la connexion à la base de données."""
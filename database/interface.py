@@ -0,0 +1,27 @@
+from abc import ABC, abstractmethod
+from pathlib import Path
+from typing import Iterable
+
+from datamodel.datamodel import SystemObs
+
+
+class Storage(ABC):
+    """Stockage des SystemObs agrégés (fichier unique ou partitionné)."""
+
+    @abstractmethod
+    def save_system_obs(self, system_obs: SystemObs) -> None:
+        pass
+
+    @abstractmethod
+    def save_batch(self, snapshots: Iterable[SystemObs]) -> int:
+        pass
+
+    @abstractmethod
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def partitions_for_range(
+        self, start: float, end: float
+    ) -> list[Path]:  # fichiers SQLite couvrant la plage [start, end]
+        pass
@@ -0,0 +1,368 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from datamodel.datamodel import SystemObs
+from database.database import Database
+from database.interface import Storage
+
+
+logger = logging.getLogger(__name__)
+
+# Noms de partition : YYYY_MM_DD.db (journalière) ou YYYY_MM_DD_HHMM.db (infra-journalière)
+_PARTITION_NAME_RE = re.compile(
+    r"^(\d{4})_(\d{2})_(\d{2})(?:_(\d{2})(\d{2}))?\.db$"
+)
+
+
+class PartitionedDatabase(Storage):
+    """
+    Stockage SQLite partitionné dans le temps : un fichier par période.
+
+    Les écritures basculent automatiquement vers une nouvelle partition à chaque
+    frontière de période (minuit par défaut), sans redémarrage. Chaque snapshot est
+    rangé dans la partition de son horodatage (et non de l'instant d'écriture) : un lot
+    écrit après minuit ou une file d'écriture en retard ne débordent pas sur la
+    partition suivante. Un thread de
+    maintenance supprime les partitions au-delà de la rétention et compacte (VACUUM)
+    les partitions fermées. Les lectures par plage de temps (DatabaseQuery) n'ouvrent
+    que les partitions qui couvrent la plage demandée.
+    """
+
+    def __init__(
+        self,
+        directory: str = "db",
+        partition_period: timedelta = timedelta(days=1),
+        retention: Optional[timedelta] = None,
+        vacuum_closed_partitions: bool = True,
+        maintenance_interval: float = 3600.0,
+    ):
+        """
+        Initialise le stockage partitionné.
+
+        Args:
+            directory: Répertoire contenant les fichiers de partition
+            partition_period: Durée d'une partition. Doit diviser une journée
+                              (1 h, 6 h, 1 jour...) : les partitions sont alignées sur minuit.
+            retention: Durée de conservation des partitions. Si None, aucune suppression.
+            vacuum_closed_partitions: Si True, compacte les partitions une fois fermées
+            maintenance_interval: Intervalle entre deux passes de maintenance (secondes)
+        """
+        period_seconds = partition_period.total_seconds()
+        if period_seconds <= 0 or 86400 % period_seconds != 0:
+            raise ValueError(
+                f"La période de partition doit diviser une journée, reçu {partition_period}"
+            )
+
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.partition_period = partition_period
+        self.retention = retention
+        self.vacuum_closed_partitions = vacuum_closed_partitions
+        self.maintenance_interval = maintenance_interval
+
+        # Partition courante, protégée par un verrou (rotation depuis le thread d'écriture)
+        self._lock = threading.Lock()
+        self._current: Optional[Database] = None
+        self._current_start: Optional[datetime] = None
+        self._current_end: Optional[datetime] = None
+        # Partitions fermées depuis le démarrage, en attente de compactage
+        self._to_vacuum: list[Path] = []
+
+        # Thread de maintenance (rétention et VACUUM)
+        self._maintenance_wakeup = threading.Event()
+        self._stop_event = threading.Event()
+
+        self._rotate_if_needed(datetime.now())
+
+        self._maintenance_thread = threading.Thread(
+            target=self._maintenance_loop, name="database-maintenance", daemon=True
+        )
+        self._maintenance_thread.start()
+
+    @property
+    def db_path(self) -> Optional[str]:
+        """Chemin de la partition en cours d'écriture."""
+        with self._lock:
+            return self._current.db_path if self._current else None
+
+    def partition_start(self, moment: datetime) -> datetime:
+        """
+        Retourne le début de la partition contenant l'instant donné.
+
+        Args:
+            moment: Instant (heure locale)
+
+        Returns:
+            Début de la partition, aligné sur minuit
+        """
+        midnight = datetime.combine(moment.date(), datetime.min.time())
+        periods = (moment - midnight) // self.partition_period
+        return midnight + periods * self.partition_period
+
+    def partition_path(self, start: datetime) -> Path:
+        """
+        Retourne le chemin du fichier de la partition commençant à start.
+
+        Args:
+            start: Début de la partition
+
+        Returns:
+            Chemin db/YYYY_MM_DD.db (journalier) ou db/YYYY_MM_DD_HHMM.db
+        """
+        if self.partition_period == timedelta(days=1):
+            filename = f"{start.year}_{start.month:02d}_{start.day:02d}.db"
+        else:
+            filename = (
+                f"{start.year}_{start.month:02d}_{start.day:02d}"
+                f"_{start.hour:02d}{start.minute:02d}.db"
+            )
+        return self.directory / filename
+
+    def save_system_obs(self, system_obs: SystemObs) -> None:
+        """
+        Sauvegarde un SystemObs dans la partition de son horodatage.
+
+        Args:
+            system_obs: SystemObs agrégé contenant les données à sauvegarder
+        """
+        self.save_batch([system_obs])
+
+    def save_batch(self, snapshots: Iterable[SystemObs]) -> int:
+        """
+        Sauvegarde plusieurs SystemObs, chacun dans la partition de son horodatage
+        (une transaction par partition). La partition courante bascule dès qu'un
+        snapshot appartient à une période suivante ; un snapshot d'une période
+        antérieure est écrit dans sa partition, déjà fermée.
+
+        Args:
+            snapshots: SystemObs agrégés à sauvegarder
+
+        Returns:
+            Nombre de lignes insérées
+        """
+        groups: dict[datetime, list[SystemObs]] = {}
+        for system_obs in snapshots:
+            start = self.partition_start(self._snapshot_time(system_obs))
+            groups.setdefault(start, []).append(system_obs)
+
+        rows = 0
+        for start in sorted(groups):
+            rows += self._save_to_partition(start, groups[start])
+        return rows
+
+    @staticmethod
+    def _snapshot_time(system_obs: SystemObs) -> datetime:
+        """
+        Horodatage d'un snapshot : sa mesure la plus récente (heure locale).
+        Un snapshot sans aucune donnée est daté de l'instant présent.
+        """
+        timestamps = [
+            project_data.timestamp for project_data in system_obs.project_data
+        ]
+        measured_at = system_obs.site_aggregates.timestamp
+        if measured_at is not None:
+            timestamps.append(measured_at)
+        if not timestamps:
+            return datetime.now()
+        return datetime.fromtimestamp(max(timestamps))
+
+    def _save_to_partition(self, start: datetime, snapshots: list[SystemObs]) -> int:
+        """
+        Écrit des snapshots d'une même période dans sa partition.
+
+        Args:
+            start: Début de la partition
+            snapshots: Snapshots de la période
+
+        Returns:
+            Nombre de lignes insérées
+        """
+        with self._lock:
+            current_start = self._current_start
+        if current_start is None or start >= current_start:
+            return self._rotate_if_needed(start).save_batch(snapshots)
+
+        # Période déjà fermée (snapshots en retard) : écriture dans sa partition, qui
+        # sera compactée à nouveau
+        path = self.partition_path(start)
+        database = Database(str(path))
+        try:
+            return database.save_batch(snapshots)
+        finally:
+            database.close()
+            with self._lock:
+                if path not in self._to_vacuum:
+                    self._to_vacuum.append(path)
+            self._maintenance_wakeup.set()
+
+    def partitions_for_range(self, start: float, end: float) -> list[Path]:
+        """
+        Liste les partitions existantes qui recouvrent la plage [start, end].
+
+        Args:
+            start: Début de la plage (timestamp Unix)
+            end: Fin de la plage (timestamp Unix)
+
+        Returns:
+            Chemins des partitions, triés chronologiquement
+        """
+        selected = [
+            (partition_start, path)
+            for partition_start, partition_end, path in self._list_partitions()
+            if partition_start.timestamp() <= end and partition_end.timestamp() > start
+        ]
+        selected.sort()
+        return [path for _, path in selected]
+
+    def close(self) -> None:
+        """Arrête la maintenance et ferme la partition courante."""
+        self._stop_event.set()
+        self._maintenance_wakeup.set()
+        self._maintenance_thread.join(timeout=5.0)
+
+        with self._lock:
+            if self._current is not None:
+                self._current.close()
+                self._current = None
+
+    def __enter__(self):
+        """Support du context manager."""
+        return self
+
+    def __exit__(
+        self,
+        exc_type: Optional[type[BaseException]],
+        exc_val: Optional[BaseException],
+        exc_tb: Optional[Any],
+    ) -> None:
+        """Ferme la connexion lors de la sortie du context manager."""
+        self.close()
+
+    def _rotate_if_needed(self, now: datetime) -> Database:
+        """
+        Ouvre la partition correspondant à now si la partition courante est écoulée.
+
+        Args:
+            now: Instant courant (heure locale)
+
+        Returns:
+            Database de la partition courante
+        """
+        with self._lock:
+            if (
+                self._current is not None
+                and self._current_start is not None
+                and self._current_end is not None
+                and self._current_start <= now < self._current_end
+            ):
+                return self._current
+
+            rotated = self._current is not None
+            if self._current is not None:
+                self._current.close()
+                self._to_vacuum.append(Path(self._current.db_path))
+
+            self._current_start = self.partition_start(now)
+            self._current_end = self._current_start + self.partition_period
+            self._current = Database(str(self.partition_path(self._current_start)))
+            logger.info(f"Nouvelle partition de base de données: {self._current.db_path}")
+            current = self._current
+
+        if rotated:
+            # Réveiller la maintenance pour compacter la partition fermée
+            self._maintenance_wakeup.set()
+        return current
+
+    def _list_partitions(self) -> list[tuple[datetime, datetime, Path]]:
+        """
+        Liste les fichiers de partition du répertoire avec leurs bornes.
+        Les fichiers journaliers couvrent toute la journée, même si la période
+        configurée a changé depuis leur création.
+
+        Returns:
+            Liste de (début, fin, chemin)
+        """
+        partitions: list[tuple[datetime, datetime, Path]] = []
+        for path in self.directory.glob("*.db"):
+            match = _PARTITION_NAME_RE.match(path.name)
+            if match is None:
+                continue
+            year, month, day, hour, minute = match.groups()
+            partition_start = datetime(
+                int(year), int(month), int(day), int(hour or 0), int(minute or 0)
+            )
+            if hour is None:
+                partition_end = partition_start + timedelta(days=1)
+            else:
+                partition_end = partition_start + self.partition_period
+            partitions.append((partition_start, partition_end, path))
+        return partitions
+
+    def _maintenance_loop(self) -> None:
+        """Boucle de maintenance : rétention puis compactage des partitions fermées."""
+        while not self._stop_event.is_set():
+            try:
+                self._apply_retention()
+                if self.vacuum_closed_partitions:
+                    self._vacuum_closed_partitions()
+            except Exception as e:
+                logger.error(
+                    f"Erreur lors de la maintenance de la base de données: {e}",
+                    exc_info=True,
+                )
+
+            self._maintenance_wakeup.wait(self.maintenance_interval)
+            self._maintenance_wakeup.clear()
+
+    def _apply_retention(self) -> None:
+        """Supprime les partitions entièrement antérieures à la fenêtre de rétention."""
+        if self.retention is None:
+            return
+
+        limit = datetime.now() - self.retention
+        current_path = self.db_path
+        for _, partition_end, path in self._list_partitions():
+            if partition_end > limit or str(path) == current_path:
+                continue
+            for suffix in ("", "-wal", "-shm"):
+                Path(f"{path}{suffix}").unlink(missing_ok=True)
+            logger.info(f"Partition supprimée (rétention): {path}")
+
+    def _vacuum_closed_partitions(self) -> None:
+        """Compacte les partitions fermées depuis le démarrage."""
+        with self._lock:
+            to_vacuum, self._to_vacuum = self._to_vacuum, []
+
+        failed: list[Path] = []
+        for path in to_vacuum:
+            if not path.exists():
+                continue
+
+            start = time.monotonic()
+            try:
+                connection = sqlite3.connect(str(path), timeout=10.0)
+                try:
+                    connection.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+                    connection.execute("VACUUM")
+                finally:
+                    connection.close()
+            except sqlite3.Error as e:
+                # Nouvel essai à la prochaine passe de maintenance
+                logger.warning(f"Échec du compactage de {path}: {e}")
+                failed.append(path)
+                continue
+            logger.info(
+                f"Partition compactée: {path} ({time.monotonic() - start:.2f}s)"
+            )
+
+        if failed:
+            with self._lock:
+                self._to_vacuum.extend(
+                    path for path in failed if path not in self._to_vacuum
+                )
@@ -0,0 +1,293 @@
+import sqlite3
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from datamodel.datamodel import EquipmentType
+from datamodel.project_data import ProjectData
+from datamodel.standard_data import Bess, Pv
+from database.interface import Storage
+
+
+# Colonnes numériques disponibles par type d'équipement
+EQUIPMENT_COLUMNS: dict[EquipmentType, tuple[str, ...]] = {
+    EquipmentType.BESS: ("p", "q", "soc"),
+    EquipmentType.PV: ("p", "q"),
+}
+
+
+@dataclass(frozen=True)
+class Bucket:
+    """Agrégat d'une série temporelle sur un intervalle [start, start + durée[."""
+
+    start: float
+    count: int
+    min: float
+    max: float
+    mean: float
+    last: float
+
+
+class DatabaseQuery:
+    """
+    API de lecture par plage de temps au-dessus d'un Storage.
+
+    Seuls les fichiers couvrant la plage demandée sont ouverts, en lecture seule
+    et indépendamment de la connexion d'écriture. Les résultats sont produits
+    au fil de l'eau (générateurs) : un mois de données à 1 Hz peut être parcouru
+    ou sous-échantillonné sans être chargé en mémoire.
+    """
+
+    def __init__(self, storage: Storage, fetch_size: int = 1000):
+        """
+        Initialise l'API de lecture.
+
+        Args:
+            storage: Stockage à interroger (Database ou PartitionedDatabase)
+            fetch_size: Nombre de lignes lues par aller-retour SQLite
+        """
+        self.storage = storage
+        self.fetch_size = fetch_size
+
+    def read_bess(self, start: float, end: float) -> Iterator[Bess]:
+        """
+        Lit les mesures BESS sur une plage de temps, triées par timestamp.
+
+        Args:
+            start: Début de la plage (timestamp Unix, inclus)
+            end: Fin de la plage (timestamp Unix, inclus)
+
+        Yields:
+            Mesures Bess
+        """
+        for p, q, soc, timestamp in self._stream(
+            "SELECT p, q, soc, timestamp FROM bess "
+            "WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+            start,
+            end,
+        ):
+            yield Bess(p=p, q=q, soc=soc, timestamp=timestamp)
+
+    def read_pv(self, start: float, end: float) -> Iterator[Pv]:
+        """
+        Lit les mesures PV sur une plage de temps, triées par timestamp.
+
+        Args:
+            start: Début de la plage (timestamp Unix, inclus)
+            end: Fin de la plage (timestamp Unix, inclus)
+
+        Yields:
+            Mesures Pv
+        """
+        for p, q, timestamp in self._stream(
+            "SELECT p, q, timestamp FROM pv "
+            "WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+            start,
+            end,
+        ):
+            yield Pv(p=p, q=q, timestamp=timestamp)
+
+    def read_project_data(
+        self, start: float, end: float, name: Optional[str] = None
+    ) -> Iterator[ProjectData]:
+        """
+        Lit les données de projet sur une plage de temps, triées par timestamp.
+
+        Args:
+            start: Début de la plage (timestamp Unix, inclus)
+            end: Fin de la plage (timestamp Unix, inclus)
+            name: Clé de projet (Keys). Si None, toutes les clés sont lues.
+
+        Yields:
+            ProjectData
+        """
+        if name is None:
+            rows = self._stream(
+                "SELECT k.name, d.value, d.timestamp FROM project_data d "
+                "JOIN project_keys k ON k.id = d.key_id "
+                "WHERE d.timestamp >= ? AND d.timestamp <= ? ORDER BY d.timestamp",
+                start,
+                end,
+                legacy_sql="SELECT name, value, timestamp FROM project_data "
+                "WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+            )
+        else:
+            rows = self._stream(
+                "SELECT k.name, d.value, d.timestamp FROM project_data d "
+                "JOIN project_keys k ON k.id = d.key_id "
+                "WHERE k.name = ? AND d.timestamp >= ? AND d.timestamp <= ? "
+                "ORDER BY d.timestamp",
+                start,
+                end,
+                prefix_params=(name,),
+                legacy_sql="SELECT name, value, timestamp FROM project_data "
+                "WHERE name = ? AND timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+            )
+        for row_name, value, timestamp in rows:
+            yield ProjectData(name=row_name, value=value, timestamp=timestamp)
+
+    def downsample_equipment(
+        self,
+        equipment_type: EquipmentType,
+        column: str,
+        start: float,
+        end: float,
+        bucket_seconds: float,
+    ) -> Iterator[Bucket]:
+        """
+        Sous-échantillonne une grandeur d'un type d'équipement (min/max/moyenne/dernière valeur).
+
+        Args:
+            equipment_type: Type d'équipement (table bess ou pv)
+            column: Grandeur à agréger (p, q, soc pour BESS)
+            start: Début de la plage (timestamp Unix, inclus)
+            end: Fin de la plage (timestamp Unix, inclus)
+            bucket_seconds: Durée d'un intervalle d'agrégation (secondes)
+
+        Yields:
+            Un Bucket par intervalle contenant au moins une mesure
+        """
+        if column not in EQUIPMENT_COLUMNS[equipment_type]:
+            raise ValueError(
+                f"Colonne {column} inconnue pour {equipment_type.value}"
+            )
+
+        table = equipment_type.value
+        yield from self._bucketize(
+            self._stream(
+                f"SELECT timestamp, {column} FROM {table} "
+                "WHERE timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+                start,
+                end,
+            ),
+            bucket_seconds,
+        )
+
+    def downsample_project_data(
+        self, name: str, start: float, end: float, bucket_seconds: float
+    ) -> Iterator[Bucket]:
+        """
+        Sous-échantillonne une donnée de projet (min/max/moyenne/dernière valeur).
+
+        Args:
+            name: Clé de projet (Keys)
+            start: Début de la plage (timestamp Unix, inclus)
+            end: Fin de la plage (timestamp Unix, inclus)
+            bucket_seconds: Durée d'un intervalle d'agrégation (secondes)
+
+        Yields:
+            Un Bucket par intervalle contenant au moins une mesure
+        """
+        yield from self._bucketize(
+            self._stream(
+                "SELECT d.timestamp, d.value FROM project_data d "
+                "JOIN project_keys k ON k.id = d.key_id "
+                "WHERE k.name = ? AND d.timestamp >= ? AND d.timestamp <= ? "
+                "ORDER BY d.timestamp",
+                start,
+                end,
+                prefix_params=(name,),
+                legacy_sql="SELECT timestamp, value FROM project_data "
+                "WHERE name = ? AND timestamp >= ? AND timestamp <= ? ORDER BY timestamp",
+            ),
+            bucket_seconds,
+        )
+
+    def _stream(
+        self,
+        sql: str,
+        start: float,
+        end: float,
+        prefix_params: tuple[Any, ...] = (),
+        legacy_sql: Optional[str] = None,
+    ) -> Iterator[tuple[Any, ...]]:
+        """
+        Exécute une requête sur chaque fichier couvrant la plage, dans l'ordre chronologique.
+
+        Args:
+            sql: Requête paramétrée ; ses derniers paramètres sont (start, end)
+            start: Début de la plage (timestamp Unix)
+            end: Fin de la plage (timestamp Unix)
+            prefix_params: Paramètres précédant (start, end) dans la requête
+            legacy_sql: Requête équivalente pour les fichiers dont la table project_data
+                        contient le nom des clés (fichiers antérieurs à project_keys)
+
+        Yields:
+            Lignes résultat, lues par blocs de fetch_size
+        """
+        for path in self.storage.partitions_for_range(start, end):
+            if not Path(path).exists():
+                continue
+            # Connexion en lecture seule : n'interfère pas avec le thread d'écriture (WAL)
+            connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+            try:
+                file_sql = sql
+                if legacy_sql is not None and self._is_legacy(connection):
+                    file_sql = legacy_sql
+                cursor = connection.execute(file_sql, (*prefix_params, start, end))
+                while True:
+                    rows = cursor.fetchmany(self.fetch_size)
+                    if not rows:
+                        break
+                    yield from rows
+            finally:
+                connection.close()
+
+    @staticmethod
+    def _is_legacy(connection: sqlite3.Connection) -> bool:
+        """Vrai si la table project_data du fichier contient le nom des clés."""
+        columns = {row[1] for row in connection.execute("PRAGMA table_info(project_data)")}
+        return "key_id" not in columns
+
+    def _bucketize(
+        self, samples: Iterator[tuple[Any, ...]], bucket_seconds: float
+    ) -> Iterator[Bucket]:
+        """
+        Agrège en flux des couples (timestamp, valeur) triés par intervalles fixes.
+
+        Args:
+            samples: Couples (timestamp, valeur) triés par timestamp
+            bucket_seconds: Durée d'un intervalle (secondes)
+
+        Yields:
+            Un Bucket par intervalle non vide
+        """
+        if bucket_seconds <= 0:
+            raise ValueError("La durée d'un intervalle doit être strictement positive")
+
+        bucket_index: Optional[int] = None
+        count = 0
+        total = minimum = maximum = last = 0.0
+
+        for timestamp, value in samples:
+            index = int(timestamp // bucket_seconds)
+            if index != bucket_index:
+                if bucket_index is not None:
+                    yield Bucket(
+                        start=bucket_index * float(bucket_seconds),
+                        count=count,
+                        min=minimum,
+                        max=maximum,
+                        mean=total / count,
+                        last=last,
+                    )
+                bucket_index = index
+                count = 0
+                total = 0.0
+                minimum = maximum = value
+
+            count += 1
+            total += value
+            minimum = min(minimum, value)
+            maximum = max(maximum, value)
+            last = value
+
+        if bucket_index is not None:
+            yield Bucket(
+                start=bucket_index * float(bucket_seconds),
+                count=count,
+                min=minimum,
+                max=maximum,
+                mean=total / count,
+                last=last,
+            )
@@ -0,0 +1,255 @@
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from datamodel.datamodel import SystemObs
+from database.interface import Storage
+from monitoring.metrics import DEFAULT_METRICS, MetricsRegistry, Stages
+
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WriterStats:
+    """Statistiques du writer à un instant donné (surveillance de la contre-pression)."""
+
+    queue_depth: int
+    queue_capacity: int
+    written_rows: int
+    dropped_snapshots: int
+    dropped_rows: int
+    flushes: int
+    last_flush_latency: float
+    max_flush_latency: float
+
+
+def _count_rows(system_obs: SystemObs) -> int:
+    # Une ligne de grandeurs du site par snapshot contenant au moins un équipement
+    site_rows = 1 if system_obs.bess or system_obs.pv else 0
+    return (
+        len(system_obs.bess) + len(system_obs.pv) + len(system_obs.project_data) + site_rows
+    )
+
+
+class DatabaseWriter:
+    """
+    Étage de persistance asynchrone devant un Storage (Database ou PartitionedDatabase).
+
+    Les SystemObs sont déposés dans une file bornée sans bloquer le thread appelant.
+    Un thread dédié vide la file et écrit les snapshots par lots : un seul commit
+    par fenêtre de commit_interval secondes (ou dès que max_batch_size est atteint).
+    Si la file est pleine, le snapshot est abandonné et comptabilisé. Un lot dont
+    l'écriture échoue est retenté une fois, puis abandonné et comptabilisé.
+    """
+
+    def __init__(
+        self,
+        database: Storage,
+        max_queue_size: int = 1000,
+        commit_interval: float = 1.0,
+        max_batch_size: int = 500,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        """
+        Initialise le writer.
+
+        Args:
+            database: Base de données cible
+            max_queue_size: Nombre maximal de snapshots en attente d'écriture
+            commit_interval: Fenêtre de regroupement des commits (secondes)
+            max_batch_size: Nombre maximal de snapshots par transaction
+            metrics: Registre des durées d'étapes (registre partagé par défaut)
+        """
+        self.database = database
+        self.metrics = metrics or DEFAULT_METRICS
+        self.commit_interval = commit_interval
+        self.max_batch_size = max_batch_size
+
+        self._queue: queue.Queue[SystemObs] = queue.Queue(maxsize=max_queue_size)
+        self._stop_event = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        # Fermeture de la base : par close() si aucun thread ne tourne, sinon par le
+        # thread d'écriture après son dernier lot (jamais pendant une écriture)
+        self._exit_lock = threading.Lock()
+        self._thread_done = True
+        self._close_on_exit = False
+
+        # Compteurs protégés par un verrou (lus depuis d'autres threads)
+        self._stats_lock = threading.Lock()
+        self._written_rows = 0
+        self._dropped_snapshots = 0
+        self._dropped_rows = 0
+        self._flushes = 0
+        self._last_flush_latency = 0.0
+        self._max_flush_latency = 0.0
+
+    def start(self) -> None:
+        """Démarre le thread d'écriture."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        self._stop_event.clear()
+        with self._exit_lock:
+            self._thread_done = False
+            self._close_on_exit = False
+        self._thread = threading.Thread(
+            target=self._run, name="database-writer", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self, timeout: float = 5.0) -> None:
+        """
+        Arrête le thread d'écriture après avoir vidé la file.
+
+        Args:
+            timeout: Durée maximale d'attente du thread (secondes)
+        """
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join(timeout=timeout)
+            self._thread = None
+
+    def close(self) -> None:
+        """
+        Arrête le writer puis ferme la base de données.
+        Si le thread d'écriture ne s'arrête pas dans le délai (écriture bloquée), la
+        connexion n'est pas fermée sous ses pieds : le thread la ferme lui-même après
+        son dernier lot.
+        """
+        thread = self._thread
+        with self._exit_lock:
+            close_now = self._thread_done
+            self._close_on_exit = not close_now
+        self.stop()
+        if close_now:
+            self.database.close()
+        elif thread is not None and thread.is_alive():
+            logger.warning(
+                "Le thread d'écriture ne s'est pas arrêté dans le délai : "
+                "la base de données sera fermée à la fin de son écriture"
+            )
+
+    def save_system_obs(self, system_obs: SystemObs) -> None:
+        """
+        Dépose un SystemObs dans la file d'écriture sans bloquer.
+
+        Args:
+            system_obs: SystemObs agrégé à sauvegarder
+        """
+        try:
+            self._queue.put_nowait(system_obs)
+        except queue.Full:
+            with self._stats_lock:
+                self._dropped_snapshots += 1
+                self._dropped_rows += _count_rows(system_obs)
+                dropped = self._dropped_snapshots
+
+            # Limiter le bruit dans les logs si la saturation dure
+            if dropped == 1 or dropped % 100 == 0:
+                logger.warning(
+                    f"File d'écriture saturée, {dropped} snapshot(s) abandonné(s)"
+                )
+
+    def get_stats(self) -> WriterStats:
+        """
+        Retourne les statistiques du writer.
+
+        Returns:
+            WriterStats avec la profondeur de file, les compteurs et les latences de flush
+        """
+        with self._stats_lock:
+            return WriterStats(
+                queue_depth=self._queue.qsize(),
+                queue_capacity=self._queue.maxsize,
+                written_rows=self._written_rows,
+                dropped_snapshots=self._dropped_snapshots,
+                dropped_rows=self._dropped_rows,
+                flushes=self._flushes,
+                last_flush_latency=self._last_flush_latency,
+                max_flush_latency=self._max_flush_latency,
+            )
+
+    def _run(self) -> None:
+        """Thread d'écriture : écrit les lots puis, si close() l'a demandé, ferme la base."""
+        try:
+            self._write_batches()
+        finally:
+            with self._exit_lock:
+                self._thread_done = True
+                close_database = self._close_on_exit
+            if close_database:
+                self.database.close()
+
+    def _write_batches(self) -> None:
+        """Regroupe les snapshots de la file et les écrit par lots jusqu'à l'arrêt."""
+        batch: list[SystemObs] = []
+        window_start = 0.0
+
+        while not self._stop_event.is_set():
+            try:
+                batch.append(self._queue.get(timeout=0.1))
+                if len(batch) == 1:
+                    window_start = time.monotonic()
+            except queue.Empty:
+                pass
+
+            if batch and (
+                len(batch) >= self.max_batch_size
+                or time.monotonic() - window_start >= self.commit_interval
+            ):
+                self._flush(batch)
+                batch = []
+
+        # Arrêt demandé : vider la file avant de rendre la main
+        while True:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+            if len(batch) >= self.max_batch_size:
+                self._flush(batch)
+                batch = []
+
+        if batch:
+            self._flush(batch)
+
+    def _flush(self, batch: list[SystemObs]) -> None:
+        """
+        Écrit un lot de snapshots dans une seule transaction, avec une seconde
+        tentative en cas d'erreur (base verrouillée, disque momentanément saturé...).
+
+        Args:
+            batch: Snapshots à écrire
+        """
+        start = time.monotonic()
+        try:
+            rows = self.database.save_batch(batch)
+        except Exception as e:
+            logger.warning(
+                f"Erreur lors de l'écriture en base de données, nouvel essai: {e}"
+            )
+            try:
+                rows = self.database.save_batch(batch)
+            except Exception as e:
+                dropped_rows = sum(_count_rows(system_obs) for system_obs in batch)
+                with self._stats_lock:
+                    self._dropped_snapshots += len(batch)
+                    self._dropped_rows += dropped_rows
+                logger.error(
+                    f"Erreur lors de l'écriture en base de données, {len(batch)} "
+                    f"snapshot(s) ({dropped_rows} lignes) abandonné(s): {e}",
+                    exc_info=True,
+                )
+                return
+
+        latency = time.monotonic() - start
+        self.metrics.record(Stages.DATABASE_SAVE, latency)
+        with self._stats_lock:
+            self._written_rows += rows
+            self._flushes += 1
+            self._last_flush_latency = latency
+            self._max_flush_latency = max(self._max_flush_latency, latency)
@@ -0,0 +1,331 @@
+from dataclasses import dataclass, fields, replace
+from typing import Any, ClassVar, Optional, Sequence, TypeVar
+
+from .standard_data import Bess, Pv
+
+# numpy est optionnel : seule la représentation en colonnes en dépend
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    np = None  # type: ignore[assignment]
+
+__all__ = ["HAS_NUMPY", "BessColumns", "PvColumns", "BessView", "PvView"]
+
+HAS_NUMPY = np is not None
+
+ColumnsT = TypeVar("ColumnsT", bound="_FleetColumns")
+ViewT = TypeVar("ViewT", "BessView", "PvView")
+
+# Attributs des objets unitaires, comparés par les vues
+_BESS_FIELDS = tuple(field.name for field in fields(Bess))
+_PV_FIELDS = tuple(field.name for field in fields(Pv))
+
+
+def _unit_values(unit: Any, names: tuple[str, ...]) -> tuple[float, ...]:
+    return tuple(getattr(unit, name) for name in names)
+
+
+def _new_view(view_type: type[ViewT], columns: Any, index: int) -> ViewT:
+    # Construction directe d'une vue, sans appel de __init__ (views())
+    view = object.__new__(view_type)
+    object.__setattr__(view, "_columns", columns)
+    object.__setattr__(view, "_index", index)
+    return view
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError(
+            "numpy est requis pour la représentation en colonnes (pip install numpy)"
+        )
+
+
+@dataclass(frozen=True)
+class _FleetColumns:
+    """
+    Mesures d'une flotte d'équipements d'un même type, une colonne numpy (float64)
+    par champ : la ligne i correspond au i-ème équipement.
+    """
+
+    p: Any  # np.ndarray
+    q: Any  # np.ndarray
+    timestamp: Any  # np.ndarray
+
+    # Champs obligatoires de l'objet unitaire, et champs optionnels (colonne à None
+    # si la valeur n'est pas connue pour tous les équipements)
+    unit_fields: ClassVar[tuple[str, ...]] = ()
+    optional_fields: ClassVar[tuple[str, ...]] = ()
+
+    def __post_init__(self):
+        _require_numpy()
+        lengths = {len(getattr(self, name)) for name in self._present_fields()}
+        if len(lengths) > 1:
+            raise ValueError("Les colonnes doivent avoir la même longueur")
+
+    @classmethod
+    def from_arrays(cls: type[ColumnsT], **columns: Any) -> ColumnsT:
+        """
+        Construit les colonnes à partir de tableaux (ou séquences) déjà disponibles,
+        par exemple un bloc de registres lu d'un seul coup par un driver.
+        Les tableaux float64 sont utilisés sans copie.
+
+        Args:
+            columns: Une séquence par champ (p, q, timestamp...)
+
+        Returns:
+            Colonnes de la flotte
+        """
+        _require_numpy()
+        return cls(
+            **{
+                name: np.asarray(columns[name], dtype=np.float64)
+                for name in cls.unit_fields + cls.optional_fields
+                if columns.get(name) is not None
+            }
+        )
+
+    @classmethod
+    def from_units(cls: type[ColumnsT], units: Sequence[Any]) -> ColumnsT:
+        """
+        Construit les colonnes à partir d'objets unitaires (Bess ou Pv).
+
+        Args:
+            units: Mesures unitaires
+
+        Returns:
+            Colonnes de la flotte (copie des valeurs)
+        """
+        _require_numpy()
+        names = cls.unit_fields
+        block = np.array(
+            [[getattr(unit, name) for name in names] for unit in units],
+            dtype=np.float64,
+        ).reshape(-1, len(names))
+        # Une ligne contiguë par champ
+        rows = np.ascontiguousarray(block.T)
+        columns = {name: rows[i] for i, name in enumerate(names)}
+        for name in cls.optional_fields:
+            values = [getattr(unit, name) for unit in units]
+            if all(value is not None for value in values):
+                columns[name] = np.array(values, dtype=np.float64)
+        return cls(**columns)
+
+    @classmethod
+    def concatenate(cls: type[ColumnsT], parts: Sequence[ColumnsT]) -> ColumnsT:
+        """
+        Met bout à bout les colonnes de plusieurs sources (drivers), dans l'ordre.
+
+        Args:
+            parts: Colonnes à concaténer
+
+        Returns:
+            Colonnes de l'ensemble (la partie est réutilisée sans copie si elle est seule)
+        """
+        _require_numpy()
+        if len(parts) == 1:
+            return parts[0]
+        columns = {
+            name: np.concatenate(
+                [getattr(part, name) for part in parts]
+                or [np.empty(0, dtype=np.float64)]
+            )
+            for name in cls.unit_fields
+        }
+        for name in cls.optional_fields:
+            if parts and all(getattr(part, name) is not None for part in parts):
+                columns[name] = np.concatenate([getattr(part, name) for part in parts])
+        return cls(**columns)
+
+    def __len__(self) -> int:
+        return len(self.p)
+
+    def _present_fields(self) -> tuple[str, ...]:
+        return self.unit_fields + tuple(
+            name for name in self.optional_fields if getattr(self, name) is not None
+        )
+
+    def total_p(self) -> float:
+        """Somme des puissances actives de la flotte."""
+        return float(self.p.sum())
+
+    def total_q(self) -> float:
+        """Somme des puissances réactives de la flotte."""
+        return float(self.q.sum())
+
+    def latest_timestamp(self) -> Optional[float]:
+        """Timestamp le plus récent de la flotte (None si la flotte est vide)."""
+        if len(self) == 0:
+            return None
+        return float(self.timestamp.max())
+
+
+class BessView(Bess):
+    """
+    Vue sur la ligne d'un BessColumns, utilisable partout où un Bess est attendu :
+    les valeurs sont lues dans les colonnes, sans copie.
+    Pour obtenir un Bess modifié, utiliser to_unit() puis dataclasses.replace, ou
+    copy.replace (Python 3.13+) : dataclasses.replace ne s'applique pas à une vue,
+    dont le constructeur prend des colonnes et non des valeurs.
+    """
+
+    def __init__(self, columns: "BessColumns", index: int):
+        object.__setattr__(self, "_columns", columns)
+        object.__setattr__(self, "_index", index)
+
+    def to_unit(self) -> Bess:
+        """Copie la ligne dans un Bess indépendant des colonnes."""
+        return Bess(*_unit_values(self, _BESS_FIELDS))
+
+    def __replace__(self, **changes: Any) -> Bess:
+        # copy.replace : Bess indépendant portant les champs modifiés
+        return replace(self.to_unit(), **changes)
+
+    @property
+    def p(self) -> float:  # type: ignore[override]
+        return float(self._columns.p[self._index])
+
+    @property
+    def q(self) -> float:  # type: ignore[override]
+        return float(self._columns.q[self._index])
+
+    @property
+    def soc(self) -> float:  # type: ignore[override]
+        return float(self._columns.soc[self._index])
+
+    @property
+    def timestamp(self) -> float:  # type: ignore[override]
+        return float(self._columns.timestamp[self._index])
+
+    @property
+    def capacity(self) -> Optional[float]:  # type: ignore[override]
+        capacity = self._columns.capacity
+        return None if capacity is None else float(capacity[self._index])
+
+    def __eq__(self, other: object) -> bool:
+        # Égale à un Bess (ou une vue) de mêmes valeurs
+        if not isinstance(other, Bess):
+            return NotImplemented
+        return _unit_values(self, _BESS_FIELDS) == _unit_values(other, _BESS_FIELDS)
+
+    __hash__ = Bess.__hash__
+
+
+class PvView(Pv):
+    """
+    Vue sur la ligne d'un PvColumns, utilisable partout où un Pv est attendu :
+    les valeurs sont lues dans les colonnes, sans copie.
+    Pour obtenir un Pv modifié, utiliser to_unit() puis dataclasses.replace, ou
+    copy.replace (Python 3.13+) : dataclasses.replace ne s'applique pas à une vue,
+    dont le constructeur prend des colonnes et non des valeurs.
+    """
+
+    def __init__(self, columns: "PvColumns", index: int):
+        object.__setattr__(self, "_columns", columns)
+        object.__setattr__(self, "_index", index)
+
+    def to_unit(self) -> Pv:
+        """Copie la ligne dans un Pv indépendant des colonnes."""
+        return Pv(*_unit_values(self, _PV_FIELDS))
+
+    def __replace__(self, **changes: Any) -> Pv:
+        # copy.replace : Pv indépendant portant les champs modifiés
+        return replace(self.to_unit(), **changes)
+
+    @property
+    def p(self) -> float:  # type: ignore[override]
+        return float(self._columns.p[self._index])
+
+    @property
+    def q(self) -> float:  # type: ignore[override]
+        return float(self._columns.q[self._index])
+
+    @property
+    def timestamp(self) -> float:  # type: ignore[override]
+        return float(self._columns.timestamp[self._index])
+
+    def __eq__(self, other: object) -> bool:
+        # Égale à un Pv (ou une vue) de mêmes valeurs
+        if not isinstance(other, Pv):
+            return NotImplemented
+        return _unit_values(self, _PV_FIELDS) == _unit_values(other, _PV_FIELDS)
+
+    __hash__ = Pv.__hash__
+
+
+@dataclass(frozen=True)
+class BessColumns(_FleetColumns):
+    """Mesures d'une flotte de BESS en colonnes (p, q, soc, timestamp et capacité optionnelle)."""
+
+    soc: Any  # np.ndarray
+    capacity: Any = None  # np.ndarray, None si la capacité d'un BESS est inconnue
+
+    unit_fields: ClassVar[tuple[str, ...]] = ("p", "q", "soc", "timestamp")
+    optional_fields: ClassVar[tuple[str, ...]] = ("capacity",)
+
+    def view(self, index: int) -> Bess:
+        """Vue sans copie sur le BESS de rang index."""
+        return BessView(self, index)
+
+    def views(self) -> list[Bess]:
+        """Vues sans copie sur tous les BESS, dans l'ordre."""
+        return [_new_view(BessView, self, index) for index in range(len(self))]
+
+    def to_units(self) -> list[Bess]:
+        """Copie les colonnes dans des objets Bess indépendants."""
+        capacities = (
+            [None] * len(self) if self.capacity is None else self.capacity.tolist()
+        )
+        return [
+            Bess(p=p, q=q, soc=soc, timestamp=timestamp, capacity=capacity)
+            for p, q, soc, timestamp, capacity in zip(
+                self.p.tolist(),
+                self.q.tolist(),
+                self.soc.tolist(),
+                self.timestamp.tolist(),
+                capacities,
+            )
+        ]
+
+    def mean_soc(self, weights: Optional[Sequence[float]] = None) -> Optional[float]:
+        """
+        SOC moyen de la flotte, éventuellement pondéré (par exemple par la capacité).
+
+        Args:
+            weights: Poids de chaque BESS, dans l'ordre des colonnes (moyenne simple si None)
+
+        Returns:
+            SOC moyen (%), ou None si la flotte est vide ou si la somme des poids est nulle
+        """
+        if len(self) == 0:
+            return None
+        if weights is None:
+            return float(self.soc.mean())
+        weights_array = np.asarray(weights, dtype=np.float64)
+        total_weight = weights_array.sum()
+        if total_weight == 0:
+            return None
+        return float(np.dot(self.soc, weights_array) / total_weight)
+
+
+@dataclass(frozen=True)
+class PvColumns(_FleetColumns):
+    """Mesures d'une flotte d'onduleurs PV en colonnes (p, q, timestamp)."""
+
+    unit_fields: ClassVar[tuple[str, ...]] = _PV_FIELDS
+
+    def view(self, index: int) -> Pv:
+        """Vue sans copie sur l'onduleur de rang index."""
+        return PvView(self, index)
+
+    def views(self) -> list[Pv]:
+        """Vues sans copie sur tous les onduleurs, dans l'ordre."""
+        return [_new_view(PvView, self, index) for index in range(len(self))]
+
+    def to_units(self) -> list[Pv]:
+        """Copie les colonnes dans des objets Pv indépendants."""
+        return [
+            Pv(p=p, q=q, timestamp=timestamp)
+            for p, q, timestamp in zip(
+                self.p.tolist(), self.q.tolist(), self.timestamp.tolist()
+            )
+        ]
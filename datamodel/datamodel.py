@@ -1,7 +1,17 @@
+import threading
 from dataclasses import dataclass, field
 from enum import Enum
+from typing import Iterable, Optional
+from keys.registry import DEFAULT_KEY_REGISTRY
+from .columnar import BessColumns, PvColumns
+from .site_aggregates import SiteAggregates
 from .standard_data import Bess, Pv
-from .project_data import ProjectData
+from .project_data import ProjectData, ProjectDataVector
+
+
+# Sérialise le premier calcul des grandeurs du site d'un snapshot, qui peut être
+# demandé en même temps par plusieurs fonctions métier (Orchestrator concurrent)
+_SITE_AGGREGATES_LOCK = threading.Lock()
 
 
 class EquipmentType(Enum):
@@ -16,16 +26,164 @@ class SystemObs:
     bess: list[Bess] = field(default_factory=list)  # type: ignore
     pv: list[Pv] = field(default_factory=list)  # type: ignore
     project_data: list[ProjectData] = field(default_factory=list)  # type: ignore
+    # Index identifiant de clé -> ProjectData, construit une seule fois lors de
+    # l'agrégation (Adapter). Si None, get_project_data retombe sur un parcours
+    # linéaire de project_data (comparaison des identifiants entiers).
+    project_data_index: Optional[ProjectDataVector] = field(
+        default=None, repr=False, compare=False
+    )
+    # Représentation en colonnes (numpy) de bess et pv, fournie par un driver
+    # (from_columns) ou par l'agrégation. Si None, elle est construite à la demande.
+    bess_columns: Optional[BessColumns] = field(default=None, repr=False, compare=False)
+    pv_columns: Optional[PvColumns] = field(default=None, repr=False, compare=False)
+
+    @classmethod
+    def from_columns(
+        cls,
+        bess: Optional[BessColumns] = None,
+        pv: Optional[PvColumns] = None,
+        project_data: Optional[list[ProjectData]] = None,
+    ) -> "SystemObs":
+        """
+        Construit un SystemObs à partir de mesures en colonnes. Les listes bess et pv
+        contiennent des vues sans copie sur les colonnes.
+
+        Args:
+            bess: Colonnes des BESS
+            pv: Colonnes des onduleurs PV
+            project_data: Données de projet
+
+        Returns:
+            SystemObs portant les deux représentations
+        """
+        return cls(
+            bess=bess.views() if bess is not None else [],
+            pv=pv.views() if pv is not None else [],
+            project_data=project_data or [],
+            bess_columns=bess,
+            pv_columns=pv,
+        )
+
+    @property
+    def site_aggregates(self) -> SiteAggregates:
+        """
+        Grandeurs du site (totaux P/Q, SOC moyen et pondéré, énergies disponibles),
+        calculées au premier accès puis conservées avec le snapshot : fonctions métier,
+        base de données et serveur partagent un seul calcul par snapshot.
+        Le calcul est vectorisé si le snapshot porte ses colonnes.
+        """
+        cached = self.__dict__.get("_site_aggregates")
+        if cached is not None:
+            return cached
+        with _SITE_AGGREGATES_LOCK:
+            cached = self.__dict__.get("_site_aggregates")
+            if cached is None:
+                if self.bess_columns is not None and self.pv_columns is not None:
+                    cached = SiteAggregates.from_columns(
+                        self.bess_columns, self.pv_columns
+                    )
+                else:
+                    cached = SiteAggregates.from_units(self.bess, self.pv)
+                # Hors champs du dataclass : ni comparé, ni affiché, ni sérialisé
+                object.__setattr__(self, "_site_aggregates", cached)
+        return cached
+
+    def with_project_data(self, project_data: list[ProjectData]) -> "SystemObs":
+        """
+        Retourne un SystemObs avec les mêmes mesures (listes, colonnes et grandeurs du
+        site déjà calculées, partagées sans copie) et d'autres données de projet.
+
+        Args:
+            project_data: Données de projet du nouveau snapshot
+
+        Returns:
+            SystemObs sans index des données de projet (parcours linéaire)
+        """
+        system_obs = SystemObs(
+            bess=self.bess,
+            pv=self.pv,
+            project_data=project_data,
+            bess_columns=self.bess_columns,
+            pv_columns=self.pv_columns,
+        )
+        cached = self.__dict__.get("_site_aggregates")
+        if cached is not None:
+            object.__setattr__(system_obs, "_site_aggregates", cached)
+        return system_obs
+
+    def get_bess_columns(self) -> BessColumns:
+        """Colonnes des BESS (construites à partir de bess si elles ne sont pas fournies)."""
+        if self.bess_columns is not None:
+            return self.bess_columns
+        return BessColumns.from_units(self.bess)
+
+    def get_pv_columns(self) -> PvColumns:
+        """Colonnes des onduleurs PV (construites à partir de pv si elles ne sont pas fournies)."""
+        if self.pv_columns is not None:
+            return self.pv_columns
+        return PvColumns.from_units(self.pv)
+
+    @staticmethod
+    def index_project_data(project_data: Iterable[ProjectData]) -> ProjectDataVector:
+        """
+        Construit l'index identifiant de clé -> ProjectData.
+        En cas de doublon, la première occurrence est retenue (comme le parcours linéaire).
+
+        Args:
+            project_data: Données de projet à indexer
+
+        Returns:
+            ProjectDataVector (tableau indexé par identifiant de clé)
+        """
+        return ProjectDataVector(project_data)
 
     def get_project_data(self, name: str) -> ProjectData | None:
+        key_id = DEFAULT_KEY_REGISTRY.id_of(name)
+        if key_id is None:
+            return None
+        return self.get_project_data_by_id(key_id)
+
+    def get_project_data_by_id(self, key_id: int) -> ProjectData | None:
+        """
+        Recherche une donnée de projet par identifiant de clé (KeyRegistry),
+        à résoudre une seule fois par l'appelant.
+
+        Args:
+            key_id: Identifiant de la clé
+
+        Returns:
+            ProjectData, ou None si la clé est absente
+        """
+        if self.project_data_index is not None:
+            return self.project_data_index.get(key_id)
         for project_data in self.project_data:
-            if project_data.name == name:
+            if project_data.key_id == key_id:
                 return project_data
         return None
 
+    def get_project_data_many(self, names: Iterable[str]) -> list[ProjectData | None]:
+        """
+        Recherche plusieurs clés en une fois.
+
+        Args:
+            names: Clés de projet (Keys)
+
+        Returns:
+            ProjectData (ou None si absente) pour chaque clé, dans l'ordre demandé
+        """
+        index = self.project_data_index
+        if index is None:
+            index = self.index_project_data(self.project_data)
+        return [index.get_by_name(name) for name in names]
+
 
 @dataclass(frozen=True)
 class Command:
-    pSp: float
+    # Consigne de P. Si None, la commande ne porte que Q : la consigne de P de
+    # l'équipement est inchangée (pSp=0.0 est une consigne de P nulle).
+    pSp: Optional[float]
     qSp: float
     equipment_type: EquipmentType
+    # Équipement ciblé. Si None, la consigne vaut pour toute la flotte du type et est
+    # répartie entre ses équipements (core/dispatch.py).
+    device_id: Optional[str] = None
@@ -1,8 +1,72 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, Optional
 
+from keys.registry import DEFAULT_KEY_REGISTRY
 
-@dataclass
+
+@dataclass(slots=True)
 class ProjectData:
     name: str
     value: float
     timestamp: float
+    # Identifiant entier de la clé (KeyRegistry), résolu une seule fois à la construction.
+    # Un identifiant fourni qui ne correspond pas à name (dataclasses.replace avec un
+    # autre nom) est résolu à nouveau : pour changer de clé, utiliser replace plutôt
+    # que modifier name.
+    key_id: int = field(default=-1, repr=False, compare=False)
+
+    def __post_init__(self):
+        if not DEFAULT_KEY_REGISTRY.matches(self.key_id, self.name):
+            self.key_id = DEFAULT_KEY_REGISTRY.register(self.name)
+
+
+class ProjectDataVector:
+    """
+    Données de projet rangées dans un tableau de taille fixe indexé par identifiant
+    de clé (KeyRegistry) : une recherche est un accès par indice, sans comparaison
+    de chaînes ni table de hachage.
+    En cas de doublon, la première occurrence est retenue (comme le parcours linéaire).
+    """
+
+    __slots__ = ("_slots",)
+
+    def __init__(self, project_data: Iterable[ProjectData] = ()):
+        """
+        Range les données de projet par identifiant de clé.
+
+        Args:
+            project_data: Données de projet à indexer
+        """
+        slots: list[Optional[ProjectData]] = [None] * len(DEFAULT_KEY_REGISTRY)
+        for data in project_data:
+            key_id = data.key_id
+            if key_id >= len(slots):
+                # Clé enregistrée pendant la construction (autre thread)
+                slots.extend([None] * (key_id + 1 - len(slots)))
+            if slots[key_id] is None:
+                slots[key_id] = data
+        self._slots = slots
+
+    def get(self, key_id: int) -> Optional[ProjectData]:
+        """
+        Donnée de projet d'une clé.
+
+        Args:
+            key_id: Identifiant de la clé (KeyRegistry)
+
+        Returns:
+            ProjectData, ou None si la clé est absente
+        """
+        slots = self._slots
+        return slots[key_id] if key_id < len(slots) else None
+
+    def get_by_name(self, name: str) -> Optional[ProjectData]:
+        """Donnée de projet d'une clé désignée par son nom (None si absente)."""
+        key_id = DEFAULT_KEY_REGISTRY.id_of(name)
+        return None if key_id is None else self.get(key_id)
+
+    def __iter__(self) -> Iterator[ProjectData]:
+        return (data for data in self._slots if data is not None)
+
+    def __len__(self) -> int:
+        return sum(1 for data in self._slots if data is not None)
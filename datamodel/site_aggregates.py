@@ -0,0 +1,155 @@
+from dataclasses import dataclass
+from typing import Optional, Sequence
+
+from .columnar import BessColumns, PvColumns
+from .standard_data import Bess, Pv
+
+__all__ = ["SiteAggregates"]
+
+
+@dataclass(frozen=True)
+class SiteAggregates:
+    """
+    Grandeurs du site calculées à partir des mesures de tous les BESS et PV d'un snapshot.
+    Les valeurs dépendant de la capacité valent None si la capacité d'un BESS est inconnue
+    (ou s'il n'y a aucun BESS).
+    """
+
+    bess_count: int
+    pv_count: int
+    bess_p: float  # kW (P > 0 : décharge)
+    bess_q: float  # kvar
+    pv_p: float  # kW
+    pv_q: float  # kvar
+    mean_soc: Optional[float]  # %, moyenne simple (None sans BESS)
+    weighted_soc: Optional[float]  # %, moyenne pondérée par la capacité
+    capacity: Optional[float]  # kWh, capacité totale
+    available_discharge_energy: Optional[float]  # kWh stockés
+    available_charge_energy: Optional[float]  # kWh encore stockables
+    timestamp: Optional[float]  # mesure la plus récente (None sans équipement)
+
+    @property
+    def site_p(self) -> float:
+        """Puissance active totale du site (BESS + PV)."""
+        return self.bess_p + self.pv_p
+
+    @property
+    def site_q(self) -> float:
+        """Puissance réactive totale du site (BESS + PV)."""
+        return self.bess_q + self.pv_q
+
+    @classmethod
+    def from_units(cls, bess: Sequence[Bess], pv: Sequence[Pv]) -> "SiteAggregates":
+        """
+        Calcule les grandeurs en une passe sur les objets unitaires.
+
+        Args:
+            bess: Mesures des BESS
+            pv: Mesures des PV
+
+        Returns:
+            SiteAggregates
+        """
+        bess_p = bess_q = soc_total = 0.0
+        capacity = stored = 0.0
+        all_capacities = bool(bess)
+        timestamp: Optional[float] = None
+        for unit in bess:
+            bess_p += unit.p
+            bess_q += unit.q
+            soc_total += unit.soc
+            if unit.capacity is None:
+                all_capacities = False
+            elif all_capacities:
+                capacity += unit.capacity
+                stored += unit.soc / 100.0 * unit.capacity
+            if timestamp is None or unit.timestamp > timestamp:
+                timestamp = unit.timestamp
+
+        pv_p = pv_q = 0.0
+        for unit in pv:
+            pv_p += unit.p
+            pv_q += unit.q
+            if timestamp is None or unit.timestamp > timestamp:
+                timestamp = unit.timestamp
+
+        return cls._build(
+            bess_count=len(bess),
+            pv_count=len(pv),
+            bess_p=bess_p,
+            bess_q=bess_q,
+            pv_p=pv_p,
+            pv_q=pv_q,
+            soc_total=soc_total,
+            capacity=capacity if all_capacities else None,
+            stored=stored,
+            timestamp=timestamp,
+        )
+
+    @classmethod
+    def from_columns(cls, bess: BessColumns, pv: PvColumns) -> "SiteAggregates":
+        """
+        Calcule les grandeurs par opérations vectorisées sur les colonnes.
+
+        Args:
+            bess: Colonnes des BESS
+            pv: Colonnes des PV
+
+        Returns:
+            SiteAggregates
+        """
+        capacity: Optional[float] = None
+        stored = 0.0
+        if bess.capacity is not None and len(bess):
+            capacity = float(bess.capacity.sum())
+            stored = float((bess.soc * bess.capacity).sum()) / 100.0
+
+        timestamps = [
+            ts for ts in (bess.latest_timestamp(), pv.latest_timestamp()) if ts is not None
+        ]
+        return cls._build(
+            bess_count=len(bess),
+            pv_count=len(pv),
+            bess_p=bess.total_p(),
+            bess_q=bess.total_q(),
+            pv_p=pv.total_p(),
+            pv_q=pv.total_q(),
+            soc_total=float(bess.soc.sum()),
+            capacity=capacity,
+            stored=stored,
+            timestamp=max(timestamps) if timestamps else None,
+        )
+
+    @classmethod
+    def _build(
+        cls,
+        bess_count: int,
+        pv_count: int,
+        bess_p: float,
+        bess_q: float,
+        pv_p: float,
+        pv_q: float,
+        soc_total: float,
+        capacity: Optional[float],
+        stored: float,
+        timestamp: Optional[float],
+    ) -> "SiteAggregates":
+        weighted_soc = (
+            stored / capacity * 100.0 if capacity is not None and capacity > 0 else None
+        )
+        return cls(
+            bess_count=bess_count,
+            pv_count=pv_count,
+            bess_p=bess_p,
+            bess_q=bess_q,
+            pv_p=pv_p,
+            pv_q=pv_q,
+            mean_soc=soc_total / bess_count if bess_count else None,
+            weighted_soc=weighted_soc,
+            capacity=capacity,
+            available_discharge_energy=stored if capacity is not None else None,
+            available_charge_energy=(
+                capacity - stored if capacity is not None else None
+            ),
+            timestamp=timestamp,
+        )
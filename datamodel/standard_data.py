@@ -1,4 +1,5 @@
 from dataclasses import dataclass
+from typing import Optional
 
 # Export explicite de toutes les classes du module
 __all__ = ["Bess", "Pv"]
@@ -10,6 +11,8 @@ class Bess:
     q: float
     soc: float
     timestamp: float
+    # Capacité (kWh), si le driver la connaît : pondération du SOC et énergies disponibles
+    capacity: Optional[float] = None
 
 
 @dataclass(frozen=True)
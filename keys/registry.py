@@ -0,0 +1,82 @@
+import threading
+from typing import Iterable, Optional
+
+from keys.keys import Keys
+
+
+class KeyRegistry:
+    """
+    Attribue à chaque clé de projet un identifiant entier (0, 1, 2...).
+
+    Les clés déclarées dans Keys sont enregistrées au démarrage, dans l'ordre de
+    déclaration : leurs identifiants sont stables d'une exécution à l'autre. Les clés
+    rencontrées ensuite (drivers, fichiers rejoués) reçoivent les identifiants suivants.
+    Un identifiant n'est jamais réattribué : il peut indexer des tableaux de taille fixe
+    à la place des comparaisons de chaînes.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        """
+        Initialise le registre.
+
+        Args:
+            names: Clés à enregistrer d'emblée, dans l'ordre
+        """
+        self._lock = threading.Lock()
+        self._ids: dict[str, int] = {}
+        self._names: list[str] = []
+        for name in names:
+            self.register(name)
+
+    def register(self, name: str) -> int:
+        """
+        Retourne l'identifiant d'une clé, en l'enregistrant si elle est nouvelle.
+
+        Args:
+            name: Clé de projet
+
+        Returns:
+            Identifiant entier de la clé
+        """
+        key_id = self._ids.get(name)
+        if key_id is not None:
+            return key_id
+        with self._lock:
+            key_id = self._ids.get(name)
+            if key_id is None:
+                key_id = len(self._names)
+                self._names.append(name)
+                self._ids[name] = key_id
+        return key_id
+
+    def id_of(self, name: str) -> Optional[int]:
+        """Identifiant d'une clé, None si elle n'a jamais été enregistrée."""
+        return self._ids.get(name)
+
+    def name_of(self, key_id: int) -> str:
+        """Clé correspondant à un identifiant."""
+        return self._names[key_id]
+
+    def matches(self, key_id: int, name: str) -> bool:
+        """True si key_id est l'identifiant enregistré de la clé name."""
+        names = self._names
+        return 0 <= key_id < len(names) and names[key_id] == name
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._ids
+
+
+def declared_keys() -> list[str]:
+    """Clés déclarées dans Keys, dans l'ordre de déclaration."""
+    return [
+        value
+        for attribute, value in vars(Keys).items()
+        if attribute.isupper() and isinstance(value, str)
+    ]
+
+
+# Registre partagé par tout le processus
+DEFAULT_KEY_REGISTRY = KeyRegistry(declared_keys())
@@ -0,0 +1,91 @@
+from dataclasses import dataclass
+from typing import Callable, Generic, Sequence, TypeVar
+
+# Données d'entrée d'un pas (ex: état du watchdog), calculées une fois par pas par le modèle
+F = TypeVar("F")
+
+
+@dataclass(frozen=True)
+class Transition(Generic[F]):
+    """Transition de source vers dest, franchie si guard(facts) est vrai."""
+
+    source: str
+    dest: str
+    guard: Callable[[F], bool]
+
+
+class TransitionTable(Generic[F]):
+    """
+    Table de transitions compilée d'une machine à états.
+
+    Les états sont numérotés et les transitions regroupées par état source à la
+    construction. La table est immuable : une seule table est partagée par toutes
+    les instances d'une machine, chaque instance ne conservant que l'indice de son
+    état courant (une machine par BESS pour des centaines d'équipements).
+    """
+
+    def __init__(
+        self, states: Sequence[str], transitions: Sequence[Transition[F]], initial: str
+    ):
+        """
+        Compile la table.
+
+        Args:
+            states: Noms des états
+            transitions: Transitions, évaluées dans cet ordre pour un même état source
+            initial: État initial
+
+        Raises:
+            ValueError: Si un état est dupliqué ou si une transition ou l'état
+                        initial désigne un état inconnu
+        """
+        self.states: tuple[str, ...] = tuple(states)
+        self._indexes = {state: index for index, state in enumerate(self.states)}
+        if len(self._indexes) != len(self.states):
+            raise ValueError("États en double dans la machine à états")
+
+        by_source: list[list[tuple[Callable[[F], bool], int]]] = [
+            [] for _ in self.states
+        ]
+        for transition in transitions:
+            by_source[self.index(transition.source)].append(
+                (transition.guard, self.index(transition.dest))
+            )
+        self._by_source = tuple(tuple(candidates) for candidates in by_source)
+        self.initial = self.index(initial)
+
+    def index(self, state: str) -> int:
+        """
+        Indice d'un état.
+
+        Args:
+            state: Nom de l'état
+
+        Returns:
+            Indice de l'état dans la table
+
+        Raises:
+            ValueError: Si l'état est inconnu
+        """
+        index = self._indexes.get(state)
+        if index is None:
+            raise ValueError(f"État inconnu: {state}")
+        return index
+
+    def step(self, state: int, facts: F) -> int:
+        """
+        Calcule l'état suivant : la première transition de l'état courant dont la
+        garde est vraie est franchie, sinon l'état est conservé. Seules les gardes
+        de l'état courant sont évaluées, chacune au plus une fois.
+
+        Args:
+            state: Indice de l'état courant
+            facts: Données d'entrée du pas, partagées par toutes les gardes
+
+        Returns:
+            Indice de l'état suivant
+        """
+        for guard, dest in self._by_source[state]:
+            if guard(facts):
+                return dest
+        return state
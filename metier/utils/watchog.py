@@ -1,9 +1,10 @@
-import time
 import threading
 from enum import Enum
 from typing import Optional
 from dataclasses import dataclass
 
+from core.clock import DEFAULT_CLOCK, Clock
+
 
 class WatchdogState(Enum):
     """États possibles du watchdog."""
@@ -31,12 +32,22 @@ class Watchdog:
     Le watchdog détecte si un équipement est en ligne en vérifiant que
     la valeur du registre watchdog change régulièrement (heartbeat).
     Si aucune mise à jour n'est reçue pendant le timeout, l'état passe à DISCONNECTED.
+
+    Seul un nouvel échantillon compte : une valeur dont l'horodatage n'est pas plus
+    récent que celui du dernier échantillon reçu (valeur reprise telle quelle d'un
+    snapshot à l'autre, ou snapshot plus ancien traité en retard) est ignorée, même
+    si sa valeur diffère de la dernière. Le heartbeat est donc un changement de la
+    donnée (horodatage et valeur), et non un appel à update.
+
+    Le timeout est mesuré sur l'horloge monotone, à la réception de chaque nouvel
+    échantillon : un saut de l'heure murale (NTP) ne provoque pas de fausse déconnexion.
     """
 
     def __init__(
         self,
         timeout_seconds: float = 5.0,
         min_heartbeat_interval: float = 0.5,
+        clock: Optional[Clock] = None,
     ):
         """
         Initialise le watchdog.
@@ -45,14 +56,18 @@ class Watchdog:
             timeout_seconds: Délai en secondes avant de considérer l'équipement comme déconnecté
             min_heartbeat_interval: Intervalle minimum entre deux heartbeats valides (secondes)
             expected_value_range: Plage de valeurs attendues (min, max). Si None, toutes les valeurs sont acceptées.
+            clock: Source de temps (horloge système par défaut)
         """
         self.timeout_seconds = timeout_seconds
         self.min_heartbeat_interval = min_heartbeat_interval
+        self.clock = clock or DEFAULT_CLOCK
 
         # État interne protégé par un verrou
         self._lock = threading.Lock()
         self._last_value: Optional[float] = None
         self._last_update_time: Optional[float] = None
+        # Instants (horloge monotone) de la dernière mise à jour et du dernier heartbeat
+        self._last_update_monotonic: Optional[float] = None
         self._last_heartbeat_time: Optional[float] = None
         self._current_state: WatchdogState = WatchdogState.UNKNOWN
 
@@ -62,12 +77,18 @@ class Watchdog:
 
         Args:
             value: Nouvelle valeur du registre watchdog
-            timestamp: Timestamp de la mise à jour (si None, utilise time.time())
+            timestamp: Horodatage de l'échantillon (si None, utilise l'heure murale de
+                       l'horloge : chaque appel est alors un nouvel échantillon)
         """
         if timestamp is None:
-            timestamp = time.time()
+            timestamp = self.clock.time()
+        now = self.clock.monotonic()
 
         with self._lock:
+            if self._last_update_time is not None and timestamp <= self._last_update_time:
+                # Échantillon déjà reçu ou plus ancien : ni heartbeat, ni nouvelle valeur
+                return
+
             # Vérifier si c'est un heartbeat valide (uniquement si la valeur change)
             # Cela permet de détecter si quelqu'un écrit réellement sur le registre
             is_valid_heartbeat = False
@@ -78,6 +99,7 @@ class Watchdog:
                 # Le watchdog reste DISCONNECTED jusqu'à ce qu'un changement soit détecté
                 self._last_value = value
                 self._last_update_time = timestamp
+                self._last_update_monotonic = now
                 # L'état reste DISCONNECTED ou UNKNOWN
                 if self._current_state == WatchdogState.UNKNOWN:
                     self._current_state = WatchdogState.DISCONNECTED
@@ -89,7 +111,7 @@ class Watchdog:
                 is_valid_heartbeat = True
 
             if is_valid_heartbeat:
-                self._last_heartbeat_time = timestamp
+                self._last_heartbeat_time = now
                 self._current_state = WatchdogState.ONLINE
 
             # Toujours mettre à jour la dernière valeur et le timestamp
@@ -97,6 +119,7 @@ class Watchdog:
             # Cela permet de détecter le timeout si la valeur ne change pas
             self._last_value = value
             self._last_update_time = timestamp
+            self._last_update_monotonic = now
 
     def get_status(self) -> WatchdogStatus:
         """
@@ -106,7 +129,7 @@ class Watchdog:
             WatchdogStatus contenant l'état, la dernière valeur et le timestamp
         """
         with self._lock:
-            current_time = time.time()
+            current_time = self.clock.monotonic()
             state = self._current_state
 
             # Vérifier si on est en timeout
@@ -123,8 +146,9 @@ class Watchdog:
                 # Si on a une valeur mais jamais de heartbeat valide, on est en DISCONNECTED
                 # Vérifier le timeout depuis la première valeur
                 if (
-                    self._last_update_time is not None
-                    and (current_time - self._last_update_time) > self.timeout_seconds
+                    self._last_update_monotonic is not None
+                    and (current_time - self._last_update_monotonic)
+                    > self.timeout_seconds
                 ):
                     state = WatchdogState.DISCONNECTED
                     self._current_state = WatchdogState.DISCONNECTED
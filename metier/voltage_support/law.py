@@ -1,10 +1,14 @@
 from datamodel.datamodel import SystemObs, Command, EquipmentType
 from keys.keys import Keys
+from keys.registry import DEFAULT_KEY_REGISTRY
+
+# Identifiant de la clé de consigne, résolu une seule fois
+BESS_SETPOINT_ID = DEFAULT_KEY_REGISTRY.register(Keys.BESS_SETPOINT_KEY)
 
 
 class Law:
     def normal_law(self, system_obs: SystemObs) -> list[Command]:
-        bess_sp = system_obs.get_project_data(Keys.BESS_SETPOINT_KEY)
+        bess_sp = system_obs.get_project_data_by_id(BESS_SETPOINT_ID)
         print("bess_sp", bess_sp)
         if bess_sp is None:
             return [Command(pSp=0, qSp=0, equipment_type=EquipmentType.BESS)]
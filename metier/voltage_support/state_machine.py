@@ -1,27 +1,38 @@
-from transitions import Machine
+from typing import Optional
+
+from core.clock import Clock
 from datamodel.datamodel import SystemObs
 from keys.keys import Keys
+from keys.registry import DEFAULT_KEY_REGISTRY
+from metier.utils.fsm import Transition, TransitionTable
 from metier.utils.watchog import Watchdog, WatchdogState
 from dataclasses import dataclass
 
+# Identifiant de la clé du watchdog BESS, résolu une seule fois
+WATCHDOG_BESS_ID = DEFAULT_KEY_REGISTRY.register(Keys.WATCHDOG_BESS_KEY)
+
 # États
 states = ["auto", "error"]
 
-# Transitions
-transitions = [
-    {
-        "trigger": "update_state",
-        "source": "auto",
-        "dest": "error",
-        "conditions": "is_watchdog_disconnected",
-    },
-    {
-        "trigger": "update_state",
-        "source": "error",
-        "dest": "auto",
-        "conditions": "is_watchdog_connected",
-    },
-]
+
+def _is_watchdog_disconnected(watchdog_state: WatchdogState) -> bool:
+    return watchdog_state == WatchdogState.DISCONNECTED
+
+
+def _is_watchdog_connected(watchdog_state: WatchdogState) -> bool:
+    return watchdog_state != WatchdogState.DISCONNECTED
+
+
+# Transitions, compilées une seule fois et partagées par toutes les instances.
+# Les gardes reçoivent l'état du watchdog, lu une seule fois par pas.
+TRANSITIONS: TransitionTable[WatchdogState] = TransitionTable(
+    states=states,
+    transitions=[
+        Transition("auto", "error", guard=_is_watchdog_disconnected),
+        Transition("error", "auto", guard=_is_watchdog_connected),
+    ],
+    initial="error",
+)
 
 
 @dataclass
@@ -37,23 +48,25 @@ class StateMachine:
     La machine passe en état ERROR si le watchdog BESS est disconnected,
     sinon elle reste en état AUTO.
 
-    Utilise la bibliothèque transitions pour gérer les états et transitions.
+    Les transitions sont décrites par la table TRANSITIONS, partagée par toutes les
+    instances : une instance ne contient que son watchdog et l'indice de son état.
     """
 
+    __slots__ = ("watchdog", "_state")
+
     def __init__(
-        self, timeout_seconds: float = 5.0, min_heartbeat_interval: float = 0.5
+        self,
+        timeout_seconds: float = 5.0,
+        min_heartbeat_interval: float = 0.5,
+        clock: Optional[Clock] = None,
     ):
         self.watchdog = Watchdog(
             timeout_seconds=timeout_seconds,
             min_heartbeat_interval=min_heartbeat_interval,
+            clock=clock,
         )
 
-        self.machine = Machine(
-            model=self,
-            states=states,
-            transitions=transitions,
-            initial="error",
-        )
+        self._state = TRANSITIONS.initial
 
     def update(self, system_obs: SystemObs):
         """
@@ -65,14 +78,18 @@ class StateMachine:
 
 
         """
-        watchdog_project_data = system_obs.get_project_data(Keys.WATCHDOG_BESS_KEY)
+        watchdog_project_data = system_obs.get_project_data_by_id(WATCHDOG_BESS_ID)
 
         if watchdog_project_data is not None:
             self.watchdog.update(
                 watchdog_project_data.value, watchdog_project_data.timestamp
             )
 
-        self.update_state()  # type: ignore
+        self.update_state()
+
+    def update_state(self) -> None:
+        """Évalue les transitions de l'état courant à partir de l'état du watchdog."""
+        self._state = TRANSITIONS.step(self._state, self.watchdog.get_state())
 
     def is_watchdog_disconnected(self) -> bool:
         return self.watchdog.get_state() == WatchdogState.DISCONNECTED
@@ -80,8 +97,12 @@ class StateMachine:
     def is_watchdog_connected(self) -> bool:
         return self.watchdog.get_state() != WatchdogState.DISCONNECTED
 
+    @property
+    def state(self) -> str:
+        return TRANSITIONS.states[self._state]
+
     def get_state(self) -> str:
-        return self.state  # type: ignore
+        return self.state
 
     def is_error(self) -> bool:
         return self.get_state() == State.ERROR
@@ -0,0 +1,225 @@
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Iterable, Iterator, Optional, Sequence
+
+
+@dataclass
+class Stages:
+    """Noms des étapes mesurées dans le cycle."""
+
+    DRIVER_READ = "driver.read"  # suffixé par l'équipement : driver.read.<id>
+    AGGREGATE = "adapter.aggregate"
+    SEND_COMMANDS = "adapter.send_commands"
+    DATABASE_SAVE = "database.save_batch"
+    ORCHESTRATOR_STEP = "orchestrator.step"  # détail : orchestrator.<nom de la fonction>
+    MODBUS_UPDATE = "modbus_server.update_holding_registers"
+    COMMAND_LATENCY = "application.command_latency"
+
+
+@dataclass(frozen=True)
+class StageStats:
+    """Statistiques de durée d'une étape sur la fenêtre glissante (secondes)."""
+
+    count: int
+    last: float
+    mean: float
+    p50: float
+    p99: float
+    max: float
+
+
+class LatencyHistogram:
+    """
+    Fenêtre glissante des dernières durées mesurées pour une étape.
+    Les percentiles sont calculés à la demande, l'enregistrement est en O(1).
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialise l'histogramme.
+
+        Args:
+            window: Nombre de mesures conservées
+        """
+        self._samples: deque[float] = deque(maxlen=window)
+        self._count = 0
+        self._last = 0.0
+
+    def record(self, seconds: float) -> None:
+        """Ajoute une durée (secondes)."""
+        self._samples.append(seconds)
+        self._count += 1
+        self._last = seconds
+
+    def snapshot(self) -> tuple[list[float], int, float]:
+        """
+        Copie la fenêtre courante, sans calcul : à appeler sous le verrou du registre.
+
+        Returns:
+            Durées de la fenêtre, nombre total de mesures et dernière durée
+        """
+        return list(self._samples), self._count, self._last
+
+    def stats(self) -> StageStats:
+        """
+        Calcule les statistiques sur la fenêtre courante.
+
+        Returns:
+            StageStats (count est le nombre total de mesures depuis le démarrage)
+        """
+        return self.compute_stats(*self.snapshot())
+
+    @staticmethod
+    def compute_stats(samples: Iterable[float], count: int, last: float) -> StageStats:
+        """
+        Calcule les statistiques d'une fenêtre copiée par snapshot().
+
+        Args:
+            samples: Durées de la fenêtre
+            count: Nombre total de mesures depuis le démarrage
+            last: Dernière durée mesurée
+
+        Returns:
+            StageStats
+        """
+        samples = sorted(samples)
+        if not samples:
+            return StageStats(count=0, last=0.0, mean=0.0, p50=0.0, p99=0.0, max=0.0)
+
+        def percentile(q: float) -> float:
+            return samples[min(len(samples) - 1, int(q * len(samples)))]
+
+        return StageStats(
+            count=count,
+            last=last,
+            mean=sum(samples) / len(samples),
+            p50=percentile(0.50),
+            p99=percentile(0.99),
+            max=samples[-1],
+        )
+
+
+class MetricsRegistry:
+    """
+    Registre des durées par étape du cycle (lecture driver, agrégation, traitement...).
+    Thread-safe : les étapes sont mesurées depuis plusieurs threads.
+    """
+
+    def __init__(self, window: int = 1000):
+        """
+        Initialise le registre.
+
+        Args:
+            window: Nombre de mesures conservées par étape
+        """
+        self.window = window
+        self._lock = threading.Lock()
+        self._histograms: dict[str, LatencyHistogram] = {}
+
+    def record(self, stage: str, seconds: float) -> None:
+        """
+        Enregistre la durée d'une étape.
+
+        Args:
+            stage: Nom de l'étape (ex: adapter.aggregate)
+            seconds: Durée mesurée
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            if histogram is None:
+                histogram = LatencyHistogram(self.window)
+                self._histograms[stage] = histogram
+            histogram.record(seconds)
+
+    @contextmanager
+    def timer(self, stage: str) -> Iterator[None]:
+        """
+        Mesure la durée du bloc avec l'horloge monotone.
+
+        Args:
+            stage: Nom de l'étape
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - start)
+
+    def get_stats(self) -> dict[str, StageStats]:
+        """
+        Retourne les statistiques de toutes les étapes mesurées.
+
+        Returns:
+            StageStats par nom d'étape, triés par nom
+        """
+        # Seule la copie des fenêtres est faite sous le verrou : les tris ne bloquent
+        # pas les étapes qui enregistrent leur durée
+        with self._lock:
+            snapshots = {
+                stage: histogram.snapshot()
+                for stage, histogram in self._histograms.items()
+            }
+        return {
+            stage: LatencyHistogram.compute_stats(*snapshots[stage])
+            for stage in sorted(snapshots)
+        }
+
+    def get_stage_stats(self, stage: str) -> StageStats:
+        """
+        Retourne les statistiques d'une étape.
+
+        Args:
+            stage: Nom de l'étape
+
+        Returns:
+            StageStats (vides si l'étape n'a jamais été mesurée)
+        """
+        with self._lock:
+            histogram = self._histograms.get(stage)
+            snapshot = histogram.snapshot() if histogram is not None else ([], 0, 0.0)
+        return LatencyHistogram.compute_stats(*snapshot)
+
+
+def unique_stage_names(
+    prefix: str, names: Sequence[str], explicit: Sequence[Optional[str]] = ()
+) -> list[str]:
+    """
+    Noms d'étapes <prefix>.<nom>, distincts pour chaque composant mesuré.
+
+    Un nom explicite est utilisé tel quel. Les noms par défaut (nom de classe) partagés
+    par plusieurs composants sont numérotés dans l'ordre : <nom>#0, <nom>#1...
+
+    Args:
+        prefix: Préfixe des étapes (ex: orchestrator)
+        names: Nom par défaut de chaque composant
+        explicit: Nom explicite de chaque composant, None pour le nom par défaut
+
+    Returns:
+        Nom d'étape de chaque composant, dans l'ordre
+
+    Raises:
+        ValueError: Si deux composants reçoivent le même nom explicite
+    """
+    explicit = list(explicit) + [None] * (len(names) - len(explicit))
+    defaults = [name for name, chosen in zip(names, explicit) if chosen is None]
+    occurrences: dict[str, int] = {}
+    stage_names: list[str] = []
+    for name, chosen in zip(names, explicit):
+        if chosen is None:
+            if defaults.count(name) > 1:
+                index = occurrences.get(name, 0)
+                occurrences[name] = index + 1
+                chosen = f"{name}#{index}"
+            else:
+                chosen = name
+        stage_names.append(f"{prefix}.{chosen}")
+    if len(set(stage_names)) != len(stage_names):
+        raise ValueError(f"Noms d'étapes en double: {stage_names}")
+    return stage_names
+
+
+# Registre partagé par défaut entre les composants (Adapter, Orchestrator, ModbusServer...)
+DEFAULT_METRICS = MetricsRegistry()
@@ -0,0 +1,270 @@
+import heapq
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Iterator, List, Optional, Union
+
+from core.clock import VirtualClock
+from core.orchestrator import Orchestrator
+from database.query import DatabaseQuery
+from datamodel.datamodel import Command, SystemObs
+from datamodel.project_data import ProjectData
+from datamodel.standard_data import Bess, Pv
+
+
+logger = logging.getLogger(__name__)
+
+Row = Union[Bess, Pv, ProjectData]
+
+
+@dataclass(frozen=True)
+class ReplayStep:
+    """Snapshot rejoué et commandes produites par l'Orchestrator."""
+
+    timestamp: float  # fin de l'intervalle du snapshot (timestamp Unix enregistré)
+    system_obs: SystemObs
+    commands: List[Command]
+
+
+@dataclass(frozen=True)
+class ReplayStats:
+    """Bilan d'un rejeu."""
+
+    snapshots: int
+    commands: int
+    simulated_seconds: float  # durée couverte par les données rejouées
+    wall_seconds: float  # durée réelle du rejeu
+    speedup: float  # simulated_seconds / wall_seconds
+
+
+@dataclass
+class ReplayResult:
+    """Commandes enregistrées (horodatées) et bilan d'un rejeu."""
+
+    commands: List[tuple[float, Command]] = field(default_factory=list)
+    stats: Optional[ReplayStats] = None
+
+
+class ReplayEngine:
+    """
+    Rejoue des données enregistrées (tables bess, pv et project_data) à travers
+    l'Orchestrator, plus vite que le temps réel.
+
+    Les trois tables sont lues en flux, fusionnées par timestamp, puis regroupées
+    en un SystemObs par cycle d'agrégation enregistré. Un cycle commence à sa première
+    mesure (bess ou pv) et regroupe les lignes des cycle_period / 2 secondes suivantes :
+    les lignes d'un même cycle, horodatées à quelques millisecondes d'écart, restent
+    ensemble quelle que soit leur position par rapport aux multiples de la période.
+    Les données de projet sont reportées d'un snapshot au suivant tant qu'elles ne
+    sont pas remplacées, comme le serveur les fournit en direct. Une donnée écrite par
+    un client entre deux cycles est prise en compte au cycle suivant.
+    Aucune donnée n'est chargée entièrement en mémoire : des semaines de mesures
+    peuvent être rejouées.
+
+    Si une VirtualClock est fournie, elle est positionnée sur l'heure enregistrée de
+    chaque snapshot avant son traitement : les fonctions construites avec cette horloge
+    (watchdog...) voient le temps de l'enregistrement et non l'heure réelle.
+    """
+
+    def __init__(
+        self,
+        orchestrator: Orchestrator,
+        query: DatabaseQuery,
+        cycle_period: float = 1.0,
+        speed: Optional[float] = None,
+        clock: Optional[VirtualClock] = None,
+    ):
+        """
+        Initialise le moteur de rejeu.
+
+        Args:
+            orchestrator: Orchestrateur exécuté sur chaque snapshot rejoué
+            query: API de lecture du stockage enregistré
+            cycle_period: Période d'agrégation des données enregistrées (secondes).
+                          Un cycle regroupe les lignes des cycle_period / 2 secondes
+                          suivant sa première mesure.
+            speed: Facteur d'accélération par rapport au temps réel (ex: 100).
+                   Si None, les snapshots sont rejoués aussi vite que possible.
+            clock: Horloge virtuelle partagée avec les fonctions de contrôle rejouées
+        """
+        if cycle_period <= 0:
+            raise ValueError("La période de cycle doit être strictement positive")
+        if speed is not None and speed <= 0:
+            raise ValueError("Le facteur d'accélération doit être strictement positif")
+
+        self.orchestrator = orchestrator
+        self.query = query
+        self.cycle_period = cycle_period
+        self.speed = speed
+        self.clock = clock
+
+    def snapshots(
+        self, start: float = 0.0, end: float = float("inf")
+    ) -> Iterator[SystemObs]:
+        """
+        Reconstruit les SystemObs enregistrés sur une plage, dans l'ordre chronologique.
+
+        Args:
+            start: Début de la plage (timestamp Unix, inclus)
+            end: Fin de la plage (timestamp Unix, inclus)
+
+        Yields:
+            Un SystemObs par cycle enregistré
+        """
+        rows: Iterator[Row] = heapq.merge(
+            self.query.read_bess(start, end),
+            self.query.read_pv(start, end),
+            self.query.read_project_data(start, end),
+            key=lambda row: row.timestamp,
+        )
+
+        # Dernière valeur connue de chaque donnée de projet (reportée), par identifiant de clé
+        project_data: dict[int, ProjectData] = {}
+        bess: list[Bess] = []
+        pv: list[Pv] = []
+        cycle_window = self.cycle_period / 2
+        # Timestamp de la première mesure du cycle en cours (None entre deux cycles)
+        cycle_start: Optional[float] = None
+        # Données de projet reçues depuis le dernier snapshot
+        pending_project_data = False
+
+        for row in rows:
+            if cycle_start is not None and row.timestamp - cycle_start > cycle_window:
+                yield self._build_snapshot(bess, pv, project_data)
+                bess, pv = [], []
+                cycle_start = None
+                pending_project_data = False
+
+            if isinstance(row, Bess):
+                bess.append(row)
+            elif isinstance(row, Pv):
+                pv.append(row)
+            else:
+                project_data[row.key_id] = row
+                pending_project_data = True
+                continue
+            if cycle_start is None:
+                cycle_start = row.timestamp
+
+        if cycle_start is not None or pending_project_data:
+            yield self._build_snapshot(bess, pv, project_data)
+
+    def steps(
+        self, start: float = 0.0, end: float = float("inf")
+    ) -> Iterator[ReplayStep]:
+        """
+        Rejoue les snapshots d'une plage à travers l'Orchestrator.
+
+        Args:
+            start: Début de la plage (timestamp Unix, inclus)
+            end: Fin de la plage (timestamp Unix, inclus)
+
+        Yields:
+            ReplayStep par snapshot, avec les commandes produites
+        """
+        first_timestamp: Optional[float] = None
+        wall_start = time.monotonic()
+
+        for system_obs in self.snapshots(start, end):
+            timestamp = self._snapshot_timestamp(system_obs)
+            if first_timestamp is None:
+                first_timestamp = timestamp
+                if self.clock is not None:
+                    self.clock.set_time(timestamp)
+            if self.clock is not None:
+                # L'horloge monotone avance de l'écart enregistré entre deux snapshots
+                self.clock.advance(max(0.0, timestamp - self.clock.time()))
+
+            if self.speed is not None:
+                # Cadence : l'écart entre snapshots est divisé par le facteur d'accélération
+                delay = (
+                    wall_start
+                    + (timestamp - first_timestamp) / self.speed
+                    - time.monotonic()
+                )
+                if delay > 0:
+                    time.sleep(delay)
+
+            yield ReplayStep(
+                timestamp=timestamp,
+                system_obs=system_obs,
+                commands=self.orchestrator.step(system_obs),
+            )
+
+    def run(
+        self,
+        start: float = 0.0,
+        end: float = float("inf"),
+        on_step: Optional[Callable[[ReplayStep], None]] = None,
+        record_commands: bool = True,
+    ) -> ReplayResult:
+        """
+        Rejoue une plage et enregistre les commandes produites.
+
+        Args:
+            start: Début de la plage (timestamp Unix, inclus)
+            end: Fin de la plage (timestamp Unix, inclus)
+            on_step: Fonction appelée après chaque snapshot (vérifications, export...)
+            record_commands: Si False, les commandes ne sont pas conservées en mémoire
+                             (seul le bilan est calculé)
+
+        Returns:
+            ReplayResult avec les commandes horodatées et le bilan du rejeu
+        """
+        result = ReplayResult()
+        snapshot_count = 0
+        command_count = 0
+        first_timestamp: Optional[float] = None
+        last_timestamp = 0.0
+        wall_start = time.monotonic()
+
+        for step in self.steps(start, end):
+            snapshot_count += 1
+            command_count += len(step.commands)
+            if first_timestamp is None:
+                first_timestamp = step.timestamp
+            last_timestamp = step.timestamp
+
+            if record_commands:
+                result.commands.extend((step.timestamp, cmd) for cmd in step.commands)
+            if on_step is not None:
+                on_step(step)
+
+        wall_seconds = time.monotonic() - wall_start
+        simulated_seconds = (
+            0.0 if first_timestamp is None else last_timestamp - first_timestamp
+        )
+        result.stats = ReplayStats(
+            snapshots=snapshot_count,
+            commands=command_count,
+            simulated_seconds=simulated_seconds,
+            wall_seconds=wall_seconds,
+            speedup=simulated_seconds / wall_seconds if wall_seconds > 0 else 0.0,
+        )
+        logger.info(
+            f"Rejeu terminé: {snapshot_count} snapshots, {command_count} commandes, "
+            f"{simulated_seconds:.0f}s rejouées en {wall_seconds:.2f}s "
+            f"(x{result.stats.speedup:.0f})"
+        )
+        return result
+
+    @staticmethod
+    def _build_snapshot(
+        bess: list[Bess], pv: list[Pv], project_data: dict[int, ProjectData]
+    ) -> SystemObs:
+        project_list = list(project_data.values())
+        return SystemObs(
+            bess=bess,
+            pv=pv,
+            project_data=project_list,
+            project_data_index=SystemObs.index_project_data(project_list),
+        )
+
+    @staticmethod
+    def _snapshot_timestamp(system_obs: SystemObs) -> float:
+        """Timestamp le plus récent du snapshot."""
+        return max(
+            row.timestamp
+            for rows in (system_obs.bess, system_obs.pv, system_obs.project_data)
+            for row in rows
+        )
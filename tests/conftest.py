@@ -0,0 +1,5 @@
+import sys
+from pathlib import Path
+
+# Le dépôt n'est pas installé : ses paquets sont importés depuis sa racine
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
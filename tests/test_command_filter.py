@@ -0,0 +1,88 @@
+from core.clock import VirtualClock
+from core.command_filter import CommandFilter
+from datamodel.datamodel import Command, EquipmentType
+
+
+def _bess(p_sp, q_sp=0.0, device_id="bess_1"):
+    return Command(pSp=p_sp, qSp=q_sp, equipment_type=EquipmentType.BESS, device_id=device_id)
+
+
+def _send(command_filter, commands):
+    """Filtre puis confirme l'écriture des commandes retenues (écriture réussie)."""
+    to_send = command_filter.filter(commands)
+    command_filter.mark_sent(to_send)
+    return to_send
+
+
+def test_deadband_suppresses_small_changes():
+    command_filter = CommandFilter(deadband=1.0, clock=VirtualClock())
+
+    assert _send(command_filter, [_bess(50.0)]) == [_bess(50.0)]
+    assert _send(command_filter, [_bess(50.5)]) == []
+    assert _send(command_filter, [_bess(52.0)]) == [_bess(52.0)]
+
+    stats = command_filter.get_stats()
+    assert (stats.received, stats.sent, stats.suppressed, stats.failed) == (3, 2, 1, 0)
+
+
+def test_deadband_per_device_overrides_type():
+    command_filter = CommandFilter(
+        deadband=10.0,
+        deadbands={EquipmentType.BESS: 5.0, "bess_2": 0.0},
+        clock=VirtualClock(),
+    )
+    _send(command_filter, [_bess(50.0), _bess(50.0, device_id="bess_2")])
+
+    assert _send(command_filter, [_bess(53.0), _bess(53.0, device_id="bess_2")]) == [
+        _bess(53.0, device_id="bess_2")
+    ]
+
+
+def test_failed_write_is_retransmitted():
+    command_filter = CommandFilter(deadband=1.0, clock=VirtualClock())
+
+    # Écriture en échec : rien n'est confirmé par mark_sent
+    assert command_filter.filter([_bess(50.0)]) == [_bess(50.0)]
+    assert command_filter.filter([_bess(50.0)]) == [_bess(50.0)]
+    assert command_filter.get_stats().failed == 2
+
+
+def test_unchanged_setpoint_is_refreshed():
+    clock = VirtualClock()
+    command_filter = CommandFilter(refresh_interval=10.0, clock=clock)
+    _send(command_filter, [_bess(50.0)])
+
+    clock.advance(5.0)
+    assert _send(command_filter, [_bess(50.0)]) == []
+    clock.advance(5.0)
+    assert _send(command_filter, [_bess(50.0)]) == [_bess(50.0)]
+    assert command_filter.get_stats().forced_refreshes == 1
+
+
+def test_max_write_rate_limits_changes():
+    clock = VirtualClock()
+    command_filter = CommandFilter(max_write_rate=1.0, clock=clock)
+    _send(command_filter, [_bess(50.0)])
+
+    clock.advance(0.5)
+    assert _send(command_filter, [_bess(60.0)]) == []
+    clock.advance(0.5)
+    assert _send(command_filter, [_bess(60.0)]) == [_bess(60.0)]
+
+
+def test_q_only_command_differs_from_zero_p():
+    command_filter = CommandFilter(deadband=1.0, clock=VirtualClock())
+    _send(command_filter, [_bess(0.0)])
+
+    # pSp None (Q seule) n'est pas une consigne de P nulle
+    assert _send(command_filter, [_bess(None)]) == [_bess(None)]
+    assert _send(command_filter, [_bess(None, 0.5)]) == []
+    assert _send(command_filter, [_bess(0.0)]) == [_bess(0.0)]
+
+
+def test_reset_forgets_sent_setpoints():
+    command_filter = CommandFilter(deadband=1.0, clock=VirtualClock())
+    _send(command_filter, [_bess(50.0)])
+    command_filter.reset()
+
+    assert _send(command_filter, [_bess(50.0)]) == [_bess(50.0)]
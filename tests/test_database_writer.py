@@ -0,0 +1,122 @@
+import time
+
+from database.interface import Storage
+from database.writer import DatabaseWriter
+from datamodel.datamodel import SystemObs
+from datamodel.project_data import ProjectData
+from datamodel.standard_data import Bess
+from monitoring.metrics import MetricsRegistry
+
+
+class _FlakyStorage(Storage):
+    """Stockage en mémoire dont les premières écritures échouent."""
+
+    def __init__(self, failures: int = 0, write_delay: float = 0.0):
+        self.failures = failures
+        self.write_delay = write_delay
+        self.attempts = 0
+        self.saved: list[SystemObs] = []
+        self.closed = False
+        self.closed_during_write = False
+        self._writing = False
+
+    def save_system_obs(self, system_obs):
+        self.save_batch([system_obs])
+
+    def save_batch(self, snapshots):
+        self._writing = True
+        try:
+            time.sleep(self.write_delay)
+            self.attempts += 1
+            if self.attempts <= self.failures:
+                raise OSError("database is locked")
+            snapshots = list(snapshots)
+            self.saved.extend(snapshots)
+            return len(snapshots)
+        finally:
+            self._writing = False
+
+    def close(self):
+        self.closed_during_write = self._writing
+        self.closed = True
+
+    def partitions_for_range(self, start, end):
+        return []
+
+
+def _snapshot(timestamp=1.0):
+    return SystemObs(
+        bess=[Bess(p=1.0, q=0.0, soc=50.0, timestamp=timestamp)],
+        project_data=[ProjectData(name="test_key", value=1.0, timestamp=timestamp)],
+    )
+
+
+def _write(storage, snapshots):
+    writer = DatabaseWriter(storage, commit_interval=0.0, metrics=MetricsRegistry())
+    writer.start()
+    for snapshot in snapshots:
+        writer.save_system_obs(snapshot)
+    writer.stop()
+    return writer.get_stats()
+
+
+def test_failed_batch_is_retried_once():
+    storage = _FlakyStorage(failures=1)
+    stats = _write(storage, [_snapshot()])
+
+    assert storage.attempts == 2
+    assert len(storage.saved) == 1
+    assert (stats.dropped_snapshots, stats.dropped_rows, stats.flushes) == (0, 0, 1)
+
+
+def test_batch_failing_twice_is_dropped_and_counted():
+    storage = _FlakyStorage(failures=2)
+    stats = _write(storage, [_snapshot()])
+
+    assert storage.attempts == 2
+    assert storage.saved == []
+    # 1 BESS + 1 donnée de projet + 1 ligne de grandeurs du site
+    assert (stats.dropped_snapshots, stats.dropped_rows, stats.flushes) == (1, 3, 0)
+
+
+def test_queue_is_drained_on_stop():
+    storage = _FlakyStorage()
+    stats = _write(storage, [_snapshot(float(i)) for i in range(20)])
+
+    assert len(storage.saved) == 20
+    assert stats.queue_depth == 0
+
+
+def test_full_queue_drops_snapshot_without_blocking():
+    writer = DatabaseWriter(_FlakyStorage(), max_queue_size=1, metrics=MetricsRegistry())
+    writer.save_system_obs(_snapshot())
+    writer.save_system_obs(_snapshot())
+
+    stats = writer.get_stats()
+    assert (stats.queue_depth, stats.dropped_snapshots, stats.dropped_rows) == (1, 1, 3)
+
+
+def test_close_waits_for_writer_thread_before_closing_database():
+    storage = _FlakyStorage(write_delay=0.5)
+    writer = DatabaseWriter(storage, commit_interval=0.0, metrics=MetricsRegistry())
+    writer.start()
+    writer.save_system_obs(_snapshot())
+    time.sleep(0.1)  # écriture en cours
+
+    # Arrêt plus court que l'écriture : la connexion reste ouverte jusqu'à sa fin
+    writer.stop = lambda timeout=5.0, stop=writer.stop: stop(timeout=0.05)
+    writer.close()
+    assert not storage.closed
+
+    deadline = time.monotonic() + 5.0
+    while not storage.closed and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert storage.closed
+    assert not storage.closed_during_write
+    assert len(storage.saved) == 1
+
+
+def test_close_without_thread_closes_database():
+    storage = _FlakyStorage()
+    DatabaseWriter(storage, metrics=MetricsRegistry()).close()
+    assert storage.closed
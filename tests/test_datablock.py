@@ -0,0 +1,60 @@
+import pytest
+
+from communication.server.datablock import DoubleBufferedDataBlock, merge_segments
+
+
+def test_merge_segments():
+    assert merge_segments([(10, 2), (0, 4), (4, 2), (20, 1)]) == [(0, 6), (10, 2), (20, 1)]
+    assert merge_segments([(0, 2), (5, 1)], max_gap=3) == [(0, 6)]
+
+
+def test_publish_writes_only_changed_blocks():
+    block = DoubleBufferedDataBlock(segments=[(0, 10), (100, 4)])
+
+    assert block.publish([(0, [1, 2, 3]), (100, [7, 8])]) == 5
+    assert block.getValues(0, 3) == [1, 2, 3]
+    assert block.getValues(100, 2) == [7, 8]
+
+    # Rien n'a changé : aucun tampon n'est recopié
+    buffers = block._buffers
+    assert block.publish([(0, [1, 2, 3]), (100, [7, 8])]) == 0
+    assert block._buffers is buffers
+
+    # Seul le segment modifié est recopié
+    assert block.publish([(0, [1, 2, 3]), (100, [7, 9])]) == 2
+    assert block._buffers[0] is buffers[0]
+    assert block.getValues(100, 2) == [7, 9]
+
+
+def test_publish_restores_value_overwritten_by_client():
+    block = DoubleBufferedDataBlock(0, 10)
+    block.publish([(0, [1, 2, 3])])
+
+    block.setValues(1, [99])
+    assert block.getValues(0, 3) == [1, 99, 3]
+
+    # Même publication : la valeur écrite par le client est remplacée
+    assert block.publish([(0, [1, 2, 3])]) == 3
+    assert block.getValues(0, 3) == [1, 2, 3]
+
+
+def test_published_buffer_is_not_modified_in_place():
+    block = DoubleBufferedDataBlock(0, 4)
+    block.publish([(0, [1, 2])])
+    reader_view = block._buffers[0]
+
+    block.publish([(0, [3, 4])])
+    assert reader_view.tolist()[:2] == [1, 2]
+    assert block.getValues(0, 2) == [3, 4]
+
+
+def test_sparse_block_rejects_unallocated_addresses():
+    block = DoubleBufferedDataBlock(segments=[(0, 2), (10, 2)])
+
+    assert block.validate(0, 2)
+    assert not block.validate(1, 2)
+    assert block.getValues(1, 10) == [0] * 10  # registres non alloués à 0
+    with pytest.raises(ValueError):
+        block.publish([(2, [1])])
+    with pytest.raises(ValueError):
+        block.setValues(5, [1])
@@ -0,0 +1,35 @@
+import pytest
+
+from core.dispatch import dispatch_fleet_command
+from datamodel.datamodel import Command, EquipmentType
+
+
+def test_targeted_command_is_returned_unchanged():
+    command = Command(pSp=10.0, qSp=1.0, equipment_type=EquipmentType.BESS, device_id="b")
+    assert dispatch_fleet_command(command, ["a", "b"]) == [command]
+
+
+def test_fleet_command_is_split_by_weight():
+    command = Command(pSp=90.0, qSp=30.0, equipment_type=EquipmentType.BESS)
+    shares = dispatch_fleet_command(command, ["a", "b", "c"], weights={"a": 2.0})
+
+    assert [share.device_id for share in shares] == ["a", "b", "c"]
+    assert [share.pSp for share in shares] == pytest.approx([45.0, 22.5, 22.5])
+    assert sum(share.qSp for share in shares) == pytest.approx(30.0)
+
+
+def test_zero_weights_fall_back_to_equal_split():
+    command = Command(pSp=10.0, qSp=0.0, equipment_type=EquipmentType.PV)
+    shares = dispatch_fleet_command(command, ["a", "b"], weights={"a": 0.0, "b": 0.0})
+    assert [share.pSp for share in shares] == [5.0, 5.0]
+
+
+def test_q_only_command_stays_q_only():
+    command = Command(pSp=None, qSp=9.0, equipment_type=EquipmentType.PV)
+    shares = dispatch_fleet_command(command, ["a", "b", "c"])
+    assert [(share.pSp, share.qSp) for share in shares] == [(None, 3.0)] * 3
+
+
+def test_empty_fleet_receives_nothing():
+    command = Command(pSp=10.0, qSp=0.0, equipment_type=EquipmentType.BESS)
+    assert dispatch_fleet_command(command, []) == []
@@ -0,0 +1,73 @@
+import pytest
+
+from communication.modbus_codec import (
+    BlockEncoder,
+    DataType,
+    FieldLayout,
+    decode_block,
+    encode_value,
+    register_count,
+)
+
+
+@pytest.mark.parametrize(
+    "data_type, value",
+    [
+        (DataType.INT16, -1234.0),
+        (DataType.UINT16, 65000.0),
+        (DataType.INT32, -100000.0),
+        (DataType.UINT32, 4_000_000_000.0),
+        (DataType.FLOAT32, 12.5),
+    ],
+)
+def test_encode_decode_round_trip(data_type, value):
+    registers = encode_value(value, data_type)
+    assert len(registers) == register_count(data_type)
+    assert decode_block(registers, [FieldLayout(0, data_type)]) == [value]
+
+
+def test_encode_applies_scale_and_word_order():
+    # Valeur brute = valeur / scale, mot de poids fort en premier
+    assert encode_value(12.34, DataType.INT16, scale=0.01) == [1234]
+    assert encode_value(0x12345, DataType.UINT32) == [0x0001, 0x2345]
+
+
+def test_integer_encoding_saturates():
+    assert encode_value(1e9, DataType.INT16) == [0x7FFF]
+    assert encode_value(-1e9, DataType.INT16) == [0x8000]
+    assert encode_value(-5.0, DataType.UINT16) == [0]
+
+
+def test_decode_block_reads_each_layout():
+    registers = [10, 0xFFFF, 0x0001, 0x0000, 500]
+    layouts = [
+        FieldLayout(4, DataType.INT16, scale=0.1),
+        FieldLayout(0, DataType.UINT16),
+        FieldLayout(1, DataType.INT16),
+        FieldLayout(2, DataType.UINT32),
+    ]
+    assert decode_block(registers, layouts) == [50.0, 10.0, -1.0, 65536.0]
+
+
+def test_block_encoder_matches_encode_value():
+    layouts = [
+        FieldLayout(3, DataType.FLOAT32),
+        FieldLayout(0, DataType.INT16, scale=0.01),
+        FieldLayout(1, DataType.INT32),
+    ]
+    encoder = BlockEncoder(6, layouts)
+    registers = encoder.encode([1.5, -2.5, 70000.0])
+
+    assert len(registers) == 6
+    assert registers[0:1] == encode_value(-2.5, DataType.INT16, scale=0.01)
+    assert registers[1:3] == encode_value(70000.0, DataType.INT32)
+    assert registers[3:5] == encode_value(1.5, DataType.FLOAT32)
+    assert registers[5] == 0  # registre non décrit
+    assert decode_block(registers, layouts) == pytest.approx([1.5, -2.5, 70000.0])
+
+
+def test_block_encoder_rejects_invalid_layouts():
+    with pytest.raises(ValueError):
+        BlockEncoder(4, [FieldLayout(0, DataType.INT32), FieldLayout(1, DataType.INT16)])
+    with pytest.raises(ValueError):
+        BlockEncoder(1, [FieldLayout(0, DataType.INT32)])
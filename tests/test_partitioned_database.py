@@ -0,0 +1,77 @@
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+from database.partitioned_database import PartitionedDatabase
+from database.query import DatabaseQuery
+from datamodel.datamodel import SystemObs
+from datamodel.project_data import ProjectData
+from datamodel.standard_data import Bess
+
+
+def _bess_snapshot(timestamp):
+    return SystemObs(bess=[Bess(p=1.0, q=0.0, soc=50.0, timestamp=timestamp)])
+
+
+def _bess_count(path):
+    connection = sqlite3.connect(str(path))
+    try:
+        return connection.execute("SELECT COUNT(*) FROM bess").fetchone()[0]
+    finally:
+        connection.close()
+
+
+@pytest.fixture
+def hourly_database(tmp_path):
+    database = PartitionedDatabase(
+        str(tmp_path), partition_period=timedelta(hours=1), vacuum_closed_partitions=False
+    )
+    yield database
+    database.close()
+
+
+def test_partition_start_is_aligned_on_midnight(hourly_database):
+    moment = datetime(2026, 3, 1, 13, 42, 5)
+    start = hourly_database.partition_start(moment)
+
+    assert start == datetime(2026, 3, 1, 13, 0)
+    assert hourly_database.partition_path(start).name == "2026_03_01_1300.db"
+
+
+def test_period_must_divide_a_day(tmp_path):
+    with pytest.raises(ValueError):
+        PartitionedDatabase(str(tmp_path), partition_period=timedelta(hours=7))
+
+
+def test_snapshots_are_routed_to_the_partition_of_their_timestamp(hourly_database):
+    current = hourly_database.partition_start(datetime.now())
+    previous_hour = (current - timedelta(seconds=1)).timestamp()
+    current_hour = (current + timedelta(seconds=1)).timestamp()
+    next_hour = (current + timedelta(hours=1, seconds=1)).timestamp()
+
+    rows = hourly_database.save_batch(
+        [_bess_snapshot(t) for t in (previous_hour, current_hour, next_hour, next_hour)]
+    )
+    assert rows == 8  # une ligne BESS et une ligne de grandeurs du site par snapshot
+
+    for moment, expected in (
+        (current - timedelta(hours=1), 1),
+        (current, 1),
+        (current + timedelta(hours=1), 2),
+    ):
+        assert _bess_count(hourly_database.partition_path(moment)) == expected
+
+
+def test_project_data_timestamp_routes_snapshot(hourly_database):
+    current = hourly_database.partition_start(datetime.now())
+    earlier = (current - timedelta(hours=2, seconds=-30)).timestamp()
+    snapshot = SystemObs(
+        project_data=[ProjectData(name="test_key", value=1.0, timestamp=earlier)]
+    )
+    hourly_database.save_batch([snapshot])
+
+    path = hourly_database.partition_path(current - timedelta(hours=2))
+    assert hourly_database.partitions_for_range(earlier, earlier) == [path]
+    query = DatabaseQuery(hourly_database)
+    assert [data.value for data in query.read_project_data(earlier, earlier)] == [1.0]
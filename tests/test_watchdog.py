@@ -0,0 +1,45 @@
+from core.clock import VirtualClock
+from metier.utils.watchog import Watchdog, WatchdogState
+
+
+def _watchdog():
+    clock = VirtualClock(start_time=1000.0)
+    return Watchdog(timeout_seconds=5.0, clock=clock), clock
+
+
+def test_changing_value_keeps_watchdog_online():
+    watchdog, clock = _watchdog()
+    watchdog.update(1.0, clock.time())
+    assert watchdog.get_state() == WatchdogState.DISCONNECTED
+
+    for value in range(2, 12):
+        clock.advance(1.0)
+        watchdog.update(float(value), clock.time())
+        assert watchdog.is_online()
+
+
+def test_timeout_without_heartbeat():
+    watchdog, clock = _watchdog()
+    watchdog.update(1.0, clock.time())
+    clock.advance(1.0)
+    watchdog.update(2.0, clock.time())
+
+    clock.advance(5.5)
+    assert watchdog.is_disconnected()
+
+
+def test_redelivered_sample_is_not_a_heartbeat():
+    watchdog, clock = _watchdog()
+    watchdog.update(1.0, 1000.0)
+    clock.advance(1.0)
+    watchdog.update(2.0, 1001.0)
+
+    # Snapshots suivants : même échantillon, et un échantillon plus ancien traité en retard
+    for _ in range(6):
+        clock.advance(1.0)
+        watchdog.update(2.0, 1001.0)
+        watchdog.update(1.0, 1000.0)
+    assert watchdog.is_disconnected()
+
+    watchdog.update(3.0, clock.time())
+    assert watchdog.is_online()